@@ -0,0 +1,49 @@
+"""Micro-benchmark: events per second through Parser.parse_event and GameEngine.apply.
+
+Run from the project root:
+
+    python -m benchmarks.bench_dispatch [--repeat 200]
+"""
+import argparse
+import logging
+import time
+from pathlib import Path
+
+from dominion_tracker.engine import TableEngine
+from dominion_tracker.matcher import DEFAULT_CARD_CSV
+from dominion_tracker.parser import Event, Parser, read_events
+
+SAMPLE_LOG = Path(__file__).resolve().parent.parent / "sample_logs" / "game_log.txt"
+PLAYER_IDS = ("O", "L")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=200, help="Times to replay the sample log")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    events = read_events(str(SAMPLE_LOG), PLAYER_IDS)
+    parser_obj = Parser(PLAYER_IDS[0], card_csv_path=str(DEFAULT_CARD_CSV), player_ids=PLAYER_IDS)
+
+    # Fresh Events per replay, built untimed: Event.tokens is cached, so reusing one would time cache hits
+    batches = [list(map(Event, events)) for _ in range(args.repeat)]
+    start = time.perf_counter()
+    actions = [parser_obj.parse_table_event(event) for batch in batches for event in batch]
+    parse_seconds = time.perf_counter() - start
+
+    actions = [action for action in actions if action]
+    start = time.perf_counter()
+    for i in range(args.repeat):
+        engine = TableEngine(PLAYER_IDS)
+        for action in actions[i * len(actions) // args.repeat:(i + 1) * len(actions) // args.repeat]:
+            engine.apply(action)
+    apply_seconds = time.perf_counter() - start
+
+    total_events = len(events) * args.repeat
+    print(f"parse_event: {total_events / parse_seconds:,.0f} events/s")
+    print(f"apply:       {len(actions) / apply_seconds:,.0f} actions/s")
+
+
+if __name__ == "__main__":
+    main()
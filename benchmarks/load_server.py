@@ -0,0 +1,125 @@
+"""Load test for the multi-game server (`dominion-tracker serve`).
+
+Run from the project root:
+
+    python -m benchmarks.load_server [--games 1000] [--connections 100] [--turns 20]
+
+Starts the server in a subprocess (one core), then replays `--games` synthetic games
+concurrently over `--connections` connections. Each game is fed one turn per request,
+with a state query after every `--query-every` feeds, so all games stay live at once.
+Reports request throughput and latency percentiles per request type.
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from benchmarks.synthetic import generate_game, load_kingdom_pool, player_ids
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def turn_chunks(lines: List[str]) -> List[List[str]]:
+    """Split a game's lines into the lines before each "Turn" line, turn by turn."""
+    chunks: List[List[str]] = [[]]
+    for line in lines:
+        if line.startswith("Turn") and chunks[-1]:
+            chunks.append([])
+        chunks[-1].append(line)
+    return chunks
+
+
+def percentile(samples: List[float], p: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+async def run_connection(host: str, port: int, games: List[Tuple[str, List[List[str]]]], players: List[str],
+                         query_every: int, latencies: Dict[str, List[float]]) -> None:
+    """Interleave the games of one connection turn by turn, one request in flight at a time."""
+    reader, writer = await asyncio.open_connection(host, port, limit=1 << 20)
+
+    async def request(payload: dict) -> dict:
+        start = time.perf_counter()
+        writer.write(json.dumps(payload).encode("utf-8") + b"\n")
+        await writer.drain()
+        response = json.loads(await reader.readline())
+        latencies[payload["op"]].append(time.perf_counter() - start)
+        if not response.get("ok"):
+            raise RuntimeError(response.get("error"))
+        return response
+
+    feeds = 0
+    for turn in range(max(len(chunks) for _, chunks in games)):
+        for game_id, chunks in games:
+            if turn < len(chunks):
+                payload = {"op": "feed", "game": game_id, "lines": chunks[turn]}
+                if turn == 0:
+                    payload["players"] = players
+                await request(payload)
+                feeds += 1
+                if feeds % query_every == 0:
+                    await request({"op": "state", "game": game_id})
+    for game_id, _ in games:
+        await request({"op": "end", "game": game_id})
+    writer.close()
+    await writer.wait_closed()
+
+
+async def load_test(host: str, port: int, args) -> Dict[str, List[float]]:
+    players = list(player_ids(args.players))
+    pool = load_kingdom_pool()
+    rng = random.Random(args.seed)
+    games = []
+    for i in range(args.games):
+        lines = list(generate_game(turns=args.turns, players=args.players, seed=args.seed + i,
+                                   kingdom=rng.sample(pool, 10)))
+        games.append((f"game-{i}", turn_chunks(lines)))
+
+    latencies: Dict[str, List[float]] = {"feed": [], "state": [], "end": []}
+    per_connection = [games[i::args.connections] for i in range(args.connections)]
+    start = time.perf_counter()
+    await asyncio.gather(*(run_connection(host, port, chunk, players, args.query_every, latencies)
+                           for chunk in per_connection if chunk))
+    elapsed = time.perf_counter() - start
+
+    total = sum(len(samples) for samples in latencies.values())
+    print(f"{args.games} games x {args.turns} turns over {args.connections} connections: "
+          f"{total:,} requests in {elapsed:.2f} s ({total / elapsed:,.0f} req/s)")
+    for op, samples in latencies.items():
+        print(f"{op:<6} {len(samples):>8,}  p50 {percentile(samples, 50) * 1000:7.2f} ms  "
+              f"p99 {percentile(samples, 99) * 1000:7.2f} ms  max {max(samples, default=0) * 1000:7.2f} ms")
+    return latencies
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=1000, help="Concurrent games")
+    parser.add_argument("--connections", type=int, default=100, help="Client connections sharing the games")
+    parser.add_argument("--turns", type=int, default=20, help="Turns per player per game")
+    parser.add_argument("--players", type=int, default=2, help="Players per game")
+    parser.add_argument("--query-every", type=int, default=5, help="State queries per N feed requests")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    server = subprocess.Popen([sys.executable, "-m", "dominion_tracker.main", "serve", "--port", "0",
+                               "--max-games", str(args.games * 2)],
+                              stdout=subprocess.PIPE, text=True, cwd=ROOT)
+    try:
+        # "serving on HOST:PORT"
+        host, port = server.stdout.readline().split()[-1].rsplit(":", 1)
+        asyncio.run(load_test(host, int(port), args))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
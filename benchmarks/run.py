@@ -0,0 +1,258 @@
+"""Benchmark suite for the read/parse/apply pipeline on synthetic logs.
+
+Run from the project root:
+
+    python -m benchmarks.run [--games 50] [--turns 30] [--players 2] [--only parse_event]
+
+`archive` replays the same log split into its games on all cores, so compare it
+with `main`, the single-process replay of the whole file.
+
+Each benchmark reports throughput from an untraced run and peak Python memory
+from a second run under tracemalloc.
+"""
+import argparse
+import contextlib
+import io
+import logging
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks.synthetic import player_ids, write_games
+from dominion_tracker import main as cli
+from dominion_tracker.draws import DrawPredictor
+from dominion_tracker.engine import TableEngine
+from dominion_tracker.matcher import DEFAULT_CARD_CSV
+from dominion_tracker.parser import Event, Parser, read_events
+
+# name -> (setup(context) -> callable returning the number of items processed, unit)
+BENCHMARKS: Dict[str, Tuple[Callable[[dict], Callable[[], int]], str]] = {}
+
+
+def benchmark(name: str, unit: str = "events"):
+    def register(setup):
+        BENCHMARKS[name] = (setup, unit)
+        return setup
+    return register
+
+
+@benchmark("read_events")
+def bench_read_events(ctx):
+    return lambda: len(read_events(str(ctx["log"]), ctx["player_ids"]))
+
+
+@benchmark("extract_cards")
+def bench_extract_cards(ctx):
+    texts = [event.lower() for event in ctx["events"]]
+    extract = ctx["parser"].extract_cards
+
+    def run():
+        for text in texts:
+            extract(text)
+        return len(texts)
+    return run
+
+
+@benchmark("parse_event")
+def bench_parse_event(ctx):
+    events = ctx["events"]
+    parse = ctx["parser"].parse_table_event
+
+    def run():
+        # Fresh Events each run, so cached tokens from the previous run are not reused
+        for event in map(Event, events):
+            parse(event)
+        return len(events)
+    return run
+
+
+@benchmark("apply", unit="actions")
+def bench_apply(ctx):
+    actions = ctx["actions"]
+
+    def run():
+        engine = TableEngine(ctx["player_ids"])
+        for action in actions:
+            engine.apply(action)
+        return len(actions)
+    return run
+
+
+@benchmark("apply_full", unit="actions")
+def bench_apply_full(ctx):
+    # Every player with full-information dict piles, the baseline for apply_compact
+    actions = ctx["actions"]
+
+    def run():
+        engine = TableEngine(ctx["player_ids"], hidden=False)
+        for action in actions:
+            engine.apply(action)
+        return len(actions)
+    return run
+
+
+@benchmark("apply_compact", unit="actions")
+def bench_apply_compact(ctx):
+    actions = ctx["actions"]
+
+    def run():
+        engine = TableEngine(ctx["player_ids"], compact=True)
+        for action in actions:
+            engine.apply(action)
+        return len(actions)
+    return run
+
+
+@benchmark("check_integrity", unit="actions")
+def bench_check_integrity(ctx):
+    from dominion_tracker.integrity import IntegrityMonitor
+
+    actions = ctx["actions"]
+
+    def run():
+        engine = TableEngine(ctx["player_ids"])
+        engine.check_integrity(IntegrityMonitor())
+        for action in actions:
+            engine.apply(action)
+        return len(actions)
+    return run
+
+
+@benchmark("emit_deltas", unit="actions")
+def bench_emit_deltas(ctx):
+    from dominion_tracker.main import emit_deltas
+
+    actions = ctx["actions"]
+
+    def run():
+        engine = TableEngine(ctx["player_ids"])
+        emit_deltas(engine, out=io.StringIO())
+        for action in actions:
+            engine.apply(action)
+        return len(actions)
+    return run
+
+
+@benchmark("emit_summary", unit="actions")
+def bench_emit_summary(ctx):
+    # What a per-action consumer had to do before deltas: a full summary after every apply
+    import json
+
+    actions = ctx["actions"]
+
+    def run():
+        engine = TableEngine(ctx["player_ids"])
+        out = io.StringIO()
+        for action in actions:
+            engine.apply(action)
+            out.write(json.dumps(engine.summary()) + "\n")
+        return len(actions)
+    return run
+
+
+@benchmark("predict", unit="predictions")
+def bench_predict(ctx):
+    # The acting player's state after each of the first 2000 actions
+    engine = TableEngine(ctx["player_ids"])
+    summaries = []
+    for action in ctx["actions"][:2000]:
+        engine.apply(action)
+        summaries.append(engine.engines[action.player].summary())
+
+    def run():
+        for summary in summaries:
+            DrawPredictor.from_summary(summary).report()
+        return len(summaries)
+    return run
+
+
+@benchmark("main")
+def bench_main(ctx):
+    argv = ["dominion-tracker", "--players", ",".join(ctx["player_ids"]), "--log", str(ctx["log"]), "--all-players"]
+
+    def run():
+        saved = sys.argv
+        sys.argv = argv
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                cli.main()
+        finally:
+            sys.argv = saved
+        return len(ctx["events"])
+    return run
+
+
+@benchmark("archive")
+def bench_archive(ctx):
+    from dominion_tracker.archive import replay_archives
+
+    def run():
+        # Every game on its own, one worker per core; counted in events for comparison with main
+        results = list(replay_archives([ctx["log"]], ctx["player_ids"]))
+        assert all("players" in result for result in results)
+        return len(ctx["events"])
+    return run
+
+
+@benchmark("simulate", unit="turns")
+def bench_simulate(ctx):
+    # One process, so turns/s is per core; simulate_many spreads games over all of them
+    from dominion_tracker.effects import EffectTable
+    from dominion_tracker.simulate import PriorityPolicy, simulate_game
+
+    cards = EffectTable.shared(str(DEFAULT_CARD_CSV)).cards
+    policy = PriorityPolicy.from_spec("smithy", cards)
+
+    def run():
+        return sum(simulate_game(policy, cards, seed=seed)[1] for seed in range(200))
+    return run
+
+
+def measure(run: Callable[[], int], repeat: int) -> Tuple[float, int]:
+    """Return (best items/sec over `repeat` runs, peak traced bytes of one run)."""
+    best = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        items = run()
+        best = max(best, items / (time.perf_counter() - start))
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=50, help="Games concatenated into the log")
+    parser.add_argument("--turns", type=int, default=30, help="Turns per player per game")
+    parser.add_argument("--players", type=int, default=2, help="Players per game")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per benchmark (best is reported)")
+    parser.add_argument("--only", action="append", choices=sorted(BENCHMARKS), help="Run only these benchmarks")
+    args = parser.parse_args(argv)
+
+    # Concatenated games carry state over, so invalid-move warnings are expected here
+    logging.disable(logging.WARNING)
+    ids = player_ids(args.players)
+    with tempfile.TemporaryDirectory() as tmp:
+        log = write_games(Path(tmp) / "synthetic.txt", games=args.games, turns=args.turns,
+                          players=args.players, seed=args.seed)
+        parser_obj = Parser(ids[0], card_csv_path=str(DEFAULT_CARD_CSV), player_ids=ids)
+        events = read_events(str(log), ids)
+        actions = [action for action in map(parser_obj.parse_table_event, events) if action]
+        ctx = {"log": log, "player_ids": ids, "parser": parser_obj, "events": events, "actions": actions}
+
+        print(f"{args.games} games x {args.turns} turns x {args.players} players: "
+              f"{len(events):,} events, {len(actions):,} actions")
+        for name in args.only or BENCHMARKS:
+            setup, unit = BENCHMARKS[name]
+            rate, peak = measure(setup(ctx), args.repeat)
+            print(f"{name:<14} {rate:>12,.0f} {unit}/s   peak {peak / 1024:>9,.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Startup-time check for the CLI: import cost and a small end-to-end run.
+
+Run from the project root:
+
+    python -m benchmarks.startup [--budget-ms 150] [--repeat 5]
+
+Reports the cumulative `-X importtime` of dominion_tracker.main, its ten slowest
+imports, and the wall time of `python -m dominion_tracker.main` on a one-game log.
+Exits non-zero if the end-to-end run exceeds the budget.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+from benchmarks.synthetic import player_ids, write_games
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def import_times(module: str = "dominion_tracker.main") -> List[Tuple[int, str]]:
+    """(cumulative microseconds, module) for every import made by `import module`."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, check=True, cwd=ROOT)
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times.append((int(cumulative), name.strip()))
+    return times
+
+
+def run_cli(argv: List[str], repeat: int) -> float:
+    """Best wall time in milliseconds of a fresh interpreter running the CLI."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "dominion_tracker.main", *argv],
+                       stdout=subprocess.DEVNULL, check=True, cwd=ROOT)
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget-ms", type=float, default=150.0, help="Maximum end-to-end wall time")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (best is reported)")
+    args = parser.parse_args(argv)
+
+    times = import_times()
+    total = next(us for us, name in times if name == "dominion_tracker.main")
+    print(f"import dominion_tracker.main: {total / 1000:.1f} ms")
+    for us, name in sorted(times, reverse=True)[1:11]:
+        print(f"  {us / 1000:>7.1f} ms  {name}")
+
+    ids = player_ids(2)
+    with tempfile.TemporaryDirectory() as tmp:
+        log = write_games(Path(tmp) / "game.txt", games=1, turns=15, players=2, seed=0)
+        elapsed = run_cli(["--players", ",".join(ids), "--log", os.fspath(log), "--all-players"], args.repeat)
+    verdict = "ok" if elapsed <= args.budget_ms else "OVER BUDGET"
+    print(f"end-to-end one-game run: {elapsed:.1f} ms (budget {args.budget_ms:.0f} ms) {verdict}")
+    return 0 if elapsed <= args.budget_ms else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""Synthetic Dominion log generator for benchmarks.
+
+Games follow the same bookkeeping the tracker uses (cleanup, then a shuffle of the
+whole discard pile when the deck runs short, then a 5-card draw), so a generated
+log replays without invalid moves when every player is tracked.
+"""
+import random
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from dominion_tracker.matcher import DEFAULT_CARD_CSV, load_card_names
+
+BASE_CARDS = ("Copper", "Curse", "Estate", "Silver", "Duchy", "Gold", "Province")
+TREASURES = {"Copper": 1, "Silver": 2, "Gold": 3}
+# Single-letter ids like the real logs; "T" is left out so player lines never look like "Turn" lines
+PLAYER_LETTERS = "ABCDEFGHIJKLMNOPQRSUVWXYZ"
+
+
+def player_ids(players: int) -> tuple:
+    return tuple(PLAYER_LETTERS[:players])
+
+
+def load_kingdom_pool(card_csv_path: Path = DEFAULT_CARD_CSV) -> List[str]:
+    return [name for name in load_card_names(card_csv_path).values() if name not in BASE_CARDS]
+
+
+def plural(name: str) -> str:
+    if name.endswith("s"):
+        return name
+    if name.endswith("y"):
+        return name[:-1] + "ies"
+    return name + "s"
+
+
+def card_phrase(cards: Dict[str, int]) -> str:
+    """Render counts the way the logs do: "3 Coppers, an Estate, and a Village"."""
+    parts = []
+    for name, count in cards.items():
+        if count == 1:
+            article = "an" if name[0].lower() in "aeiou" else "a"
+            parts.append(f"{article} {name}")
+        else:
+            parts.append(f"{count} {plural(name)}")
+    if len(parts) == 1:
+        return parts[0]
+    if len(parts) == 2:
+        return f"{parts[0]} and {parts[1]}"
+    return ", ".join(parts[:-1]) + f", and {parts[-1]}"
+
+
+class _Player:
+    def __init__(self, pid: str, rng: random.Random):
+        self.pid = pid
+        self.rng = rng
+        self.deck = Counter({"Copper": 7, "Estate": 3})
+        self.hand: Counter = Counter()
+        self.played: Counter = Counter()
+        self.discard: Counter = Counter()
+
+    def draw(self, count: int = 5) -> Iterator[str]:
+        if sum(self.deck.values()) < count:
+            self.deck.update(self.discard)
+            self.discard.clear()
+            yield from (self.pid, " shuffles their deck.")
+        pool = list(self.deck.elements())
+        drawn = Counter(self.rng.sample(pool, min(count, len(pool))))
+        self.deck.subtract(drawn)
+        self.deck = +self.deck
+        self.hand.update(drawn)
+        if drawn:
+            yield from (self.pid, " draws ", card_phrase(drawn), ".")
+
+    def play(self, cards: Counter, coins: int = 0) -> Iterator[str]:
+        self.hand.subtract(cards)
+        self.hand = +self.hand
+        self.played.update(cards)
+        yield from (self.pid, " plays ", card_phrase(cards))
+        if coins:
+            yield from (". (+$", str(coins), ")")
+        else:
+            yield "."
+
+    def cleanup(self) -> None:
+        self.discard.update(self.played)
+        self.discard.update(self.hand)
+        self.played.clear()
+        self.hand.clear()
+
+
+def generate_game(turns: int = 20, players: int = 2, kingdom: Optional[Sequence[str]] = None,
+                  seed: int = 0, game_id: int = 100000000) -> Iterator[str]:
+    """Yield the lines of one synthetic game log with `turns` turns per player."""
+    rng = random.Random(seed)
+    if kingdom is None:
+        kingdom = rng.sample(load_kingdom_pool(), 10)
+    supply = ["Silver", "Gold", "Province", "Duchy"] + list(kingdom)
+    table = [_Player(pid, rng) for pid in player_ids(players)]
+
+    yield f"Game #{game_id}, unrated."
+    yield ""
+    yield "Card Pool: level 10"
+    for player in table:
+        yield from (player.pid, " starts with ", "7 Coppers", ".")
+        yield from (player.pid, " starts with ", "3 Estates", ".")
+    for player in table:
+        yield from player.draw()
+
+    for turn in range(1, turns + 1):
+        for player in table:
+            yield f"Turn {turn} - Player {player.pid}"
+            actions = [card for card in player.hand if card not in TREASURES and card not in BASE_CARDS]
+            if actions:
+                yield from player.play(Counter([rng.choice(actions)]))
+            treasures = Counter({card: n for card, n in player.hand.items() if card in TREASURES})
+            if treasures:
+                coins = sum(TREASURES[card] * n for card, n in treasures.items())
+                yield from player.play(treasures, coins)
+            gained = rng.choice(supply)
+            player.discard[gained] += 1
+            yield from (player.pid, " buys and gains ", card_phrase({gained: 1}), ".")
+            player.cleanup()
+            yield from player.draw()
+    yield f"Turn {turns + 1} - Player {table[0].pid}"
+
+
+def write_games(path: Path, games: int = 1, **kwargs) -> Path:
+    """Write `games` concatenated synthetic games to `path`."""
+    seed = kwargs.pop("seed", 0)
+    with open(path, "w") as f:
+        for i in range(games):
+            for line in generate_game(seed=seed + i, game_id=100000000 + i, **kwargs):
+                f.write(line + "\n")
+    return path
@@ -0,0 +1,136 @@
+"""Replay archives that concatenate many games into one text file.
+
+Every game starts with a header line such as "Game #162962491, unrated.". The
+archive is memory-mapped and scanned for those headers, so finding the games
+never reads the file into Python memory. Worker processes receive only
+(path, start, end) byte ranges and map the file themselves; each decodes one
+game at a time straight from the mapping and replays it through the event
+reader, parser and a TableEngine.
+"""
+import mmap
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from dominion_tracker.batch import _init_worker, default_window, submit_bounded
+from dominion_tracker.engine import TableEngine
+from dominion_tracker.matcher import DEFAULT_CARD_CSV
+from dominion_tracker.parser import EventReader, Parser
+
+GAME_HEADER = b"Game #"
+_GAME_ID_RE = re.compile(rb"Game #(\d+)")
+
+
+def find_games(buffer) -> List[Tuple[int, int]]:
+    """(start, end) byte range of every game in buffer, split at lines starting with "Game #".
+
+    Anything before the first header belongs to no game; a buffer without any header is
+    treated as a single game.
+    """
+    size = len(buffer)
+    starts = [0] if buffer[:len(GAME_HEADER)] == GAME_HEADER else []
+    needle = b"\n" + GAME_HEADER
+    pos = buffer.find(needle)
+    while pos != -1:
+        starts.append(pos + 1)
+        pos = buffer.find(needle, pos + len(needle))
+    if not starts:
+        return [(0, size)] if size else []
+    return list(zip(starts, starts[1:] + [size]))
+
+
+def replay_game(buffer, start: int, end: int, parser_obj: Parser, player_ids: tuple) -> Dict[str, Any]:
+    """Replay the game in buffer[start:end] for every player; `parser_obj` must be fresh."""
+    match = _GAME_ID_RE.match(buffer, start, end)
+    result: Dict[str, Any] = {"game": match.group(1).decode("ascii") if match else None, "offset": start}
+    with memoryview(buffer) as view:
+        try:
+            # Decodes from the mapping directly, without copying the slice to bytes first
+            text = str(view[start:end], "utf-8")
+        except UnicodeDecodeError as e:
+            result["error"] = str(e)
+            return result
+    engine = TableEngine(player_ids)
+    reader = EventReader(player_ids)
+    parse = parser_obj.parse_table_event
+    for line in text.splitlines():
+        for event_text in reader.feed(line):
+            action = parse(event_text)
+            if action:
+                engine.apply(action)
+    for event_text in reader.close():
+        action = parse(event_text)
+        if action:
+            engine.apply(action)
+    result["players"] = engine.summary()
+    return result
+
+
+def _replay_ranges(path: str, ranges: List[Tuple[int, int]], player_ids: tuple,
+                   card_csv_path: str) -> List[Dict[str, Any]]:
+    results = []
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            for start, end in ranges:
+                parser_obj = Parser(player_id=player_ids[0], card_csv_path=card_csv_path, player_ids=player_ids)
+                results.append({"log": path, **replay_game(buffer, start, end, parser_obj, player_ids)})
+    except OSError as e:
+        return [{"log": path, "offset": start, "error": str(e)} for start, _ in ranges]
+    return results
+
+
+def scan_archive(path: str) -> List[Tuple[int, int]]:
+    """Game byte ranges of the archive at path, found through a read-only mapping."""
+    with open(path, "rb") as f:
+        if not f.seek(0, 2):
+            # mmap refuses empty files
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return find_games(buffer)
+
+
+def _batches(ranges: List[Tuple[int, int]], batch_bytes: int,
+             games_per_batch: Optional[int] = None) -> Iterator[List[Tuple[int, int]]]:
+    batch: List[Tuple[int, int]] = []
+    size = 0
+    for start, end in ranges:
+        batch.append((start, end))
+        size += end - start
+        if size >= batch_bytes or len(batch) == games_per_batch:
+            yield batch
+            batch, size = [], 0
+    if batch:
+        yield batch
+
+
+def _scan_error(path: str, error: str) -> List[Dict[str, Any]]:
+    return [{"log": path, "error": error}]
+
+
+def _tasks(paths: Iterable[str], player_ids: tuple, batch_bytes: int, games_per_batch: Optional[int],
+           card_csv_path: str) -> Iterator[Tuple[Callable[..., List[Dict[str, Any]]], tuple]]:
+    for path in map(str, paths):
+        try:
+            ranges = scan_archive(path)
+        except OSError as e:
+            yield _scan_error, (path, str(e))
+            continue
+        for batch in _batches(ranges, batch_bytes, games_per_batch):
+            yield _replay_ranges, (path, batch, player_ids, card_csv_path)
+
+
+def replay_archives(paths: Iterable[str], player_ids: tuple, workers: Optional[int] = None,
+                    batch_bytes: int = 1 << 20, ordered: bool = True,
+                    card_csv_path: str = str(DEFAULT_CARD_CSV), games_per_batch: Optional[int] = None,
+                    window: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Replay every game of every archive in a process pool, streaming per-game results.
+
+    Games are submitted in batches of about `batch_bytes` of log text, and at most
+    `games_per_batch` games when given, so small games share one task. Archives are
+    scanned only as batches are needed, with at most `window` batches in flight
+    (default: two per worker). With ordered=False results are yielded as soon as
+    each batch finishes.
+    """
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(card_csv_path,)) as pool:
+        tasks = _tasks(paths, player_ids, batch_bytes, games_per_batch, card_csv_path)
+        yield from submit_bounded(pool, tasks, window or default_window(workers), ordered)
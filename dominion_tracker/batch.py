@@ -0,0 +1,144 @@
+import glob
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from dominion_tracker.effects import EffectTable
+from dominion_tracker.engine import TableEngine
+from dominion_tracker.matcher import DEFAULT_CARD_CSV, CardMatcher
+from dominion_tracker.parser import Parser, iter_events
+
+
+def iter_log_paths(targets: Iterable[str], pattern: str = "*.txt") -> Iterator[Path]:
+    """Expand directories (recursively, by pattern) and globs into log file paths."""
+    for target in targets:
+        path = Path(target)
+        if path.is_dir():
+            yield from sorted(p for p in path.rglob(pattern) if p.is_file())
+        elif path.is_file():
+            yield path
+        else:
+            yield from (Path(p) for p in sorted(glob.glob(target, recursive=True)) if Path(p).is_file())
+
+
+def replay_log(log_path: Path, player_ids: tuple, card_csv_path: str = str(DEFAULT_CARD_CSV)) -> Dict[str, Any]:
+    """Replay one log for every player and return its final state as a JSON-ready dict."""
+    parser_obj = Parser(player_id=player_ids[0], card_csv_path=card_csv_path, player_ids=player_ids)
+    engine = TableEngine(player_ids)
+    try:
+        with open(log_path) as log_file:
+            for event_text in iter_events(log_file, player_ids=player_ids):
+                action = parser_obj.parse_table_event(event_text)
+                if action:
+                    engine.apply(action)
+    except (OSError, UnicodeDecodeError) as e:
+        return {"log": str(log_path), "error": str(e)}
+    return {"log": str(log_path), "players": engine.summary()}
+
+
+def _replay_chunk(log_paths: List[Path], player_ids: tuple, card_csv_path: str) -> List[Dict[str, Any]]:
+    return [replay_log(path, player_ids, card_csv_path) for path in log_paths]
+
+
+def _init_worker(card_csv_path: str) -> None:
+    # Load the card table once per worker; every Parser in this process reuses it
+    CardMatcher.shared(card_csv_path)
+    EffectTable.shared(card_csv_path)
+
+
+def _chunks(paths: Iterable[Path], chunksize: int) -> Iterator[List[Path]]:
+    chunk = []
+    for path in paths:
+        chunk.append(path)
+        if len(chunk) >= chunksize:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def submit_bounded(pool: Executor, tasks: Iterable[Tuple[Callable[..., List[Dict[str, Any]]], tuple]],
+                   window: int, ordered: bool = True) -> Iterator[Dict[str, Any]]:
+    """Run (function, args) tasks returning result lists with at most `window` of them in flight.
+
+    Tasks are only pulled from `tasks` as earlier ones finish, so neither the task
+    list nor the finished results pile up in memory. With ordered=False results are
+    yielded as soon as each task finishes.
+    """
+    tasks = iter(tasks)
+    in_flight: deque = deque()
+
+    def fill() -> None:
+        for function, args in tasks:
+            in_flight.append(pool.submit(function, *args))
+            if len(in_flight) >= window:
+                return
+
+    fill()
+    while in_flight:
+        if ordered:
+            done: Future = in_flight.popleft()
+        else:
+            done = next(iter(wait(in_flight, return_when=FIRST_COMPLETED).done))
+            in_flight.remove(done)
+        results = done.result()
+        fill()
+        yield from results
+
+
+def default_window(workers: Optional[int]) -> int:
+    """Tasks kept in flight: two per worker, so no worker waits for the next one."""
+    return 2 * (workers or os.cpu_count() or 1)
+
+
+def replay_many(log_paths: Iterable[Path], player_ids: tuple, workers: Optional[int] = None,
+                chunksize: int = 16, ordered: bool = True,
+                card_csv_path: str = str(DEFAULT_CARD_CSV), window: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Replay many logs in a process pool, streaming per-game results.
+
+    Logs are submitted in chunks to amortise inter-process overhead, at most `window`
+    chunks at a time (default: two per worker). With ordered=False results are
+    yielded as soon as each chunk finishes.
+    """
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(card_csv_path,)) as pool:
+        tasks = ((_replay_chunk, (chunk, player_ids, card_csv_path)) for chunk in _chunks(log_paths, chunksize))
+        yield from submit_bounded(pool, tasks, window or default_window(workers), ordered)
+
+
+def batch_main(argv: Optional[List[str]] = None) -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="dominion-tracker batch")
+    parser.add_argument("targets", nargs="+", help="Log files, directories or glob patterns")
+    parser.add_argument("--players", required=True, help="Comma separated player IDs")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="Logs per submitted task (default 16); with --archive, the most games per task")
+    parser.add_argument("--unordered", action="store_true", help="Emit results as soon as they are ready")
+    parser.add_argument("--pattern", default="*.txt", help="File pattern used when a target is a directory")
+    parser.add_argument("--archive", action="store_true", help="Each file concatenates many games; replay every game found at its 'Game #' header")
+    parser.add_argument("--output", default="-", help="JSON-lines output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    player_ids = tuple(args.players.split(","))
+    log_paths = iter_log_paths(args.targets, pattern=args.pattern)
+    if args.archive:
+        from dominion_tracker.archive import replay_archives
+
+        results = replay_archives(log_paths, player_ids, workers=args.workers, ordered=not args.unordered,
+                                  games_per_batch=args.chunksize)
+    else:
+        results = replay_many(log_paths, player_ids, workers=args.workers,
+                              chunksize=args.chunksize or 16, ordered=not args.unordered)
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        for result in results:
+            out.write(json.dumps(result) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
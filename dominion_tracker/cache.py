@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from dominion_tracker.engine import Action, ActionType
+from dominion_tracker.matcher import DEFAULT_CARD_CSV
+from dominion_tracker.parser import Parser, iter_events
+
+_MAGIC = b"DTAC2\n"
+# Part of every cache key; bump it whenever parsing changes, so actions parsed before are not reused
+PARSER_VERSION = 1
+_ACTION_TYPES = {t.value: t for t in ActionType}
+
+
+def file_hash(path: Path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def encode_actions(actions: List[Action]) -> bytes:
+    """Pack actions as name tables plus a flat array of [type, player, source, target, n, card ids...]."""
+    cards: Dict[str, int] = {}
+    players: Dict[Optional[str], int] = {}
+    piles: Dict[Optional[str], int] = {None: 0}
+    data = array("H")
+    for action in actions:
+        data.append(action.type.value)
+        data.append(players.setdefault(action.player, len(players)))
+        data.append(piles.setdefault(action.source, len(piles)))
+        data.append(piles.setdefault(action.target, len(piles)))
+        data.append(len(action.cards))
+        data.extend(cards.setdefault(card, len(cards)) for card in action.cards)
+    header = json.dumps({"cards": list(cards), "players": list(players), "piles": list(piles)}).encode("utf-8")
+    return _MAGIC + len(header).to_bytes(4, "little") + header + data.tobytes()
+
+
+def decode_actions(blob: bytes) -> List[Action]:
+    if not blob.startswith(_MAGIC):
+        raise ValueError("Not an action cache file")
+    start = len(_MAGIC)
+    header_size = int.from_bytes(blob[start:start + 4], "little")
+    header = json.loads(blob[start + 4:start + 4 + header_size])
+    cards, players, piles = header["cards"], header["players"], header["piles"]
+    data = array("H")
+    data.frombytes(blob[start + 4 + header_size:])
+
+    actions = []
+    i = 0
+    while i < len(data):
+        count = data[i + 4]
+        ids = data[i + 5:i + 5 + count]
+        actions.append(Action(_ACTION_TYPES[data[i]], [cards[c] for c in ids], players[data[i + 1]],
+                              piles[data[i + 2]], piles[data[i + 3]]))
+        i += 5 + count
+    return actions
+
+
+class ActionCache:
+    """Caches the parsed action stream of log files under `cache_dir`.
+
+    Entries are keyed by PARSER_VERSION, the log content hash, the card CSV hash and
+    how the log was parsed. Log hashes are remembered by (size, mtime), so an
+    unchanged file is not re-read; that index keeps the `max_index_entries` most
+    recently hashed files. Total entry size is capped at `max_bytes`; the least
+    recently used entries go first.
+    """
+
+    def __init__(self, cache_dir: Path, card_csv_path: Path = DEFAULT_CARD_CSV, max_bytes: int = 256 << 20,
+                 max_index_entries: int = 10000):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_index_entries = max_index_entries
+        self.index_path = self.cache_dir / "index.json"
+        self._index: Dict[str, Tuple[int, int, str]] = self._load_index()
+        self.card_csv_hash = self.fingerprint(Path(card_csv_path))
+
+    def _load_index(self) -> Dict[str, Tuple[int, int, str]]:
+        try:
+            with open(self.index_path) as f:
+                return {path: tuple(entry) for path, entry in json.load(f).items()}
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self) -> None:
+        # Oldest first: drop the files hashed longest ago
+        for path in list(self._index)[:max(0, len(self._index) - self.max_index_entries)]:
+            del self._index[path]
+        tmp = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._index, f)
+        os.replace(tmp, self.index_path)
+
+    def fingerprint(self, path: Path) -> str:
+        """Content hash of a file, skipping the read when size and mtime are unchanged."""
+        path = Path(path).resolve()
+        stat = path.stat()
+        entry = self._index.pop(str(path), None)
+        if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            # Back at the end, as the most recently used
+            self._index[str(path)] = entry
+            return entry[2]
+        digest = file_hash(path)
+        self._index[str(path)] = (stat.st_size, stat.st_mtime_ns, digest)
+        self._save_index()
+        return digest
+
+    def key(self, log_path: Path, parser_obj: Parser, table: bool) -> str:
+        mode = "table" if table else f"player:{parser_obj.player_id}"
+        parts = [str(PARSER_VERSION), self.fingerprint(log_path), self.card_csv_hash, mode,
+                 ",".join(parser_obj.player_ids)]
+        return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+    def actions(self, log_path: Path, parser_obj: Parser, table: bool = False) -> List[Action]:
+        """Parsed actions of a log, from the cache when possible."""
+        entry = self.cache_dir / f"{self.key(log_path, parser_obj, table)}.actions"
+        try:
+            blob = entry.read_bytes()
+        except OSError:
+            blob = None
+        if blob is not None:
+            try:
+                actions = decode_actions(blob)
+            except (ValueError, KeyError, IndexError):
+                actions = None
+            if actions is not None:
+                os.utime(entry)  # mark as recently used
+                return actions
+
+        parse = parser_obj.parse_table_event if table else parser_obj.parse_event
+        with open(log_path) as log_file:
+            actions = [a for a in map(parse, iter_events(log_file, player_ids=parser_obj.player_ids)) if a]
+        tmp = Path(f"{entry}.{os.getpid()}.tmp")
+        tmp.write_bytes(encode_actions(actions))
+        os.replace(tmp, entry)
+        self.evict()
+        return actions
+
+    def evict(self) -> None:
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        for path in self.cache_dir.glob("*.actions"):
+            stat = path.stat()
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink()
+            total -= size
@@ -0,0 +1,161 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from dominion_tracker.engine import Action, GameEngine, TableEngine
+from dominion_tracker.parser import EventReader
+
+
+def _sample_hash(path: Path, size: int, sample: int = 1 << 16) -> str:
+    """SHA-256 of the first and last `sample` bytes of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        digest.update(f.read(sample))
+        if size > sample:
+            f.seek(max(sample, size - sample))
+            digest.update(f.read(sample))
+    return digest.hexdigest()
+
+
+class Checkpoint:
+    """Engine snapshot taken at the start of a turn, plus where that turn starts in the log."""
+
+    __slots__ = ("turn", "label", "offset", "state")
+
+    def __init__(self, turn: int, label: str, offset: int, state: Dict[str, Any]):
+        self.turn = turn
+        self.label = label
+        self.offset = offset
+        self.state = state
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"turn": self.turn, "label": self.label, "offset": self.offset, "state": self.state}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Checkpoint":
+        return cls(data["turn"], data["label"], data["offset"], data["state"])
+
+    def __repr__(self):
+        return f"Checkpoint(turn={self.turn}, label={self.label!r}, offset={self.offset})"
+
+
+class CheckpointedReplay:
+    """Replays a log while snapshotting the engine at every `every`-th "Turn" line.
+
+    Turn N is the N-th "Turn" line of the log (1-based, counting every player's turns).
+    A checkpoint for turn N holds the state after everything before that line, i.e.
+    after the previous player's cleanup and draw, and the byte offset of the line itself.
+    A fresh EventReader started at that offset picks the game up exactly there.
+
+    Saved checkpoints only fit the same log content, parse mode ("table" for a
+    TableEngine, else "player:<first player id>"), player ids and `every`, so load()
+    checks all of them.
+    """
+
+    def __init__(self, log_path: Path, parse: Callable[[str], Optional[Action]],
+                 engine: Union[GameEngine, TableEngine], player_ids: tuple, every: int = 1):
+        self.log_path = Path(log_path)
+        self.parse = parse
+        self.engine = engine
+        self.player_ids = player_ids
+        self.every = every
+        self.mode = "table" if isinstance(engine, TableEngine) else f"player:{player_ids[0]}"
+        self.checkpoints: List[Checkpoint] = []
+        self.start = Checkpoint(0, "", 0, engine.snapshot())
+        self.turn = 0
+        self.offset = 0
+
+    def _apply(self, events: List[str]) -> None:
+        for event_text in events:
+            action = self.parse(event_text)
+            if action:
+                self.engine.apply(action)
+
+    def _record(self, checkpoint: Checkpoint) -> None:
+        if self.checkpoints and self.checkpoints[-1].turn >= checkpoint.turn:
+            return
+        self.checkpoints.append(checkpoint)
+
+    def run(self, until_turn: Optional[int] = None) -> Union[GameEngine, TableEngine]:
+        """Replay from the current position to the start of `until_turn` (or the end of the log)."""
+        reader = EventReader(self.player_ids)
+        with open(self.log_path, "rb") as f:
+            f.seek(self.offset)
+            for raw_line in f:
+                line_start = self.offset
+                line = raw_line.decode("utf-8")
+                # Stripped like EventReader.feed does, so both agree on what a Turn line is
+                label = line.strip()
+                if label.startswith("Turn"):
+                    # The Turn line releases everything before it
+                    self._apply(reader.feed(line))
+                    self.turn += 1
+                    if self.turn % self.every == 0:
+                        self._record(Checkpoint(self.turn, label, line_start, self.engine.snapshot()))
+                    if self.turn == until_turn:
+                        # Resume at this line next time, with a reader that has not seen it yet
+                        self.offset = line_start
+                        self.turn -= 1
+                        return self.engine
+                else:
+                    self._apply(reader.feed(line))
+                self.offset = line_start + len(raw_line)
+        self._apply(reader.close())
+        return self.engine
+
+    def seek(self, turn: int) -> Union[GameEngine, TableEngine]:
+        """Restore the engine to the start of `turn`, replaying only from the nearest checkpoint."""
+        if turn <= 0:
+            self.engine.restore(self.start.state)
+            self.turn = self.offset = 0
+            return self.engine
+
+        nearest = self.start
+        for checkpoint in self.checkpoints:
+            if checkpoint.turn > turn:
+                break
+            nearest = checkpoint
+        self.engine.restore(nearest.state)
+        # A checkpoint sits on its Turn line; count that line again when we read it
+        self.turn = max(nearest.turn - 1, 0)
+        self.offset = nearest.offset
+        if nearest.turn == turn and nearest is not self.start:
+            return self.engine
+        return self.run(until_turn=turn)
+
+    def _key(self) -> Dict[str, Any]:
+        """What saved checkpoints must match to be reused by this replay.
+
+        The log is identified by size, mtime and a hash of its first and last bytes,
+        so checking the key costs the same however long the log is.
+        """
+        stat = self.log_path.stat()
+        return {
+            "log": str(self.log_path),
+            "log_size": stat.st_size,
+            "log_mtime_ns": stat.st_mtime_ns,
+            "log_sample_sha256": _sample_hash(self.log_path, stat.st_size),
+            "mode": self.mode,
+            "players": list(self.player_ids),
+            "every": self.every,
+        }
+
+    def save(self, path: Path) -> None:
+        data = {
+            **self._key(),
+            "start": self.start.to_dict(),
+            "checkpoints": [checkpoint.to_dict() for checkpoint in self.checkpoints],
+        }
+        with open(path, "w") as f:
+            json.dump(data, f)
+
+    def load(self, path: Path) -> bool:
+        """Load saved checkpoints; returns False (loading nothing) if they belong to another log or setup."""
+        with open(path) as f:
+            data = json.load(f)
+        if any(data.get(name) != value for name, value in self._key().items()):
+            return False
+        self.start = Checkpoint.from_dict(data["start"])
+        self.checkpoints = [Checkpoint.from_dict(c) for c in data["checkpoints"]]
+        return True
@@ -0,0 +1,166 @@
+from functools import lru_cache
+from math import comb
+from typing import Dict, Iterator, List, Mapping, Tuple
+
+from dominion_tracker.state import UNKNOWN_CARD
+
+# Coin produced by basic treasures when played
+TREASURE_VALUES: Dict[str, int] = {"Copper": 1, "Silver": 2, "Gold": 3, "Platinum": 5}
+
+
+@lru_cache(maxsize=4096)
+def _comb(n: int, k: int) -> int:
+    return comb(n, k)
+
+
+def hypergeometric_pmf(population: int, successes: int, draws: int) -> List[float]:
+    """P(exactly k successes) for k = 0..draws when drawing without replacement."""
+    total = _comb(population, draws)
+    return [_comb(successes, k) * _comb(population - successes, draws - k) / total for k in range(draws + 1)]
+
+
+class DrawPredictor:
+    """Exact distribution of the next hand drawn from a deck and discard pile.
+
+    Cards left in the deck are drawn first; if the deck runs short the discard pile
+    is shuffled and the rest of the hand comes from it, as in the real game.
+    """
+
+    def __init__(self, deck: Mapping[str, int], discard: Mapping[str, int], hand_size: int = 5):
+        self.deck = {card: count for card, count in deck.items() if count}
+        self.discard = {card: count for card, count in discard.items() if count}
+        deck_size = sum(self.deck.values())
+        if deck_size >= hand_size:
+            # Whole hand comes from the deck
+            self.certain: Dict[str, int] = {}
+            self.pool = self.deck
+            self.draws = hand_size
+        else:
+            # Whole deck is drawn, the rest is drawn from the reshuffled discard pile
+            self.certain = dict(self.deck)
+            self.pool = self.discard
+            self.draws = min(hand_size - deck_size, sum(self.discard.values()))
+        self.pool_size = sum(self.pool.values())
+
+    @classmethod
+    def from_summary(cls, summary: Mapping[str, Mapping[str, int]], after_cleanup: bool = True,
+                     hand_size: int = 5) -> "DrawPredictor":
+        """Predict from a PlayerState summary; after_cleanup puts hand and played cards in the discard first.
+
+        A HiddenPlayerState summary still counts its unknown ("?") cards in the deck,
+        so the deck holds more cards than are left to draw. The cards left are a
+        uniformly random subset of it: a hand the deck covers is drawn from all of
+        it, and a short deck is split over every subset it may be. The unknown cards
+        go back into the reshuffle as the rest of the deck counts; with
+        after_cleanup=False that still includes the ones held in hand.
+        """
+        discard: Dict[str, int] = {}
+        unknown = 0
+        for pile in ("discard", "hand", "played", "set_aside", "mats"):
+            for card, count in summary.get(pile, {}).items():
+                if card == UNKNOWN_CARD:
+                    unknown += count
+                elif pile == "discard" or (after_cleanup and pile in ("hand", "played")):
+                    discard[card] = discard.get(card, 0) + count
+        deck = {card: count for card, count in summary.get("deck", {}).items() if count}
+        left = sum(deck.values()) - unknown
+        if not unknown or left >= hand_size:
+            return cls(deck, discard, hand_size=hand_size)
+
+        total = _comb(sum(deck.values()), left)
+        components = []
+        for drawn, ways in _subsets(list(deck.items()), left):
+            pool = dict(discard)
+            for card, count in deck.items():
+                rest = count - drawn.get(card, 0)
+                if rest:
+                    pool[card] = pool.get(card, 0) + rest
+            components.append((ways / total, cls(drawn, pool, hand_size=hand_size)))
+        return MixedDrawPredictor(components)
+
+    def count_distribution(self, card: str) -> List[float]:
+        """P(exactly k copies of card in the next hand), indexed by k."""
+        certain = self.certain.get(card, 0)
+        pmf = hypergeometric_pmf(self.pool_size, self.pool.get(card, 0), self.draws)
+        return [0.0] * certain + pmf
+
+    def prob_at_least(self, card: str, k: int) -> float:
+        return sum(self.count_distribution(card)[k:])
+
+    def expected_count(self, card: str) -> float:
+        expected = self.certain.get(card, 0)
+        if self.pool_size:
+            expected += self.draws * self.pool.get(card, 0) / self.pool_size
+        return expected
+
+    def expected_coin(self, values: Mapping[str, int] = TREASURE_VALUES) -> float:
+        return sum(value * self.expected_count(card) for card, value in values.items())
+
+    def coin_distribution(self, values: Mapping[str, int] = TREASURE_VALUES) -> Dict[int, float]:
+        """Exact P(hand produces $c) from treasures, by a DP over cards grouped by coin value."""
+        groups: Dict[int, int] = {}
+        for card, count in self.pool.items():
+            value = values.get(card, 0)
+            groups[value] = groups.get(value, 0) + count
+        # ways[n][c]: ways to pick n pool cards worth c coins
+        ways: List[Dict[int, int]] = [{0: 1}] + [{} for _ in range(self.draws)]
+        for value, size in groups.items():
+            new_ways: List[Dict[int, int]] = [{} for _ in range(self.draws + 1)]
+            for n, by_coin in enumerate(ways):
+                for coin, count in by_coin.items():
+                    for j in range(min(size, self.draws - n) + 1):
+                        bucket = new_ways[n + j]
+                        key = coin + value * j
+                        bucket[key] = bucket.get(key, 0) + count * _comb(size, j)
+            ways = new_ways
+
+        base = sum(values.get(card, 0) * count for card, count in self.certain.items())
+        total = _comb(self.pool_size, self.draws)
+        return {base + coin: count / total for coin, count in sorted(ways[self.draws].items())}
+
+    def report(self, coin_thresholds=(5, 6, 8)) -> Dict[str, object]:
+        distribution = self.coin_distribution()
+        return {
+            "expected_coin": round(self.expected_coin(), 3),
+            "coin_at_least": {k: round(sum((p for c, p in distribution.items() if c >= k), 0.0), 4) for k in coin_thresholds},
+        }
+
+
+def _subsets(cards: List[Tuple[str, int]], size: int) -> Iterator[Tuple[Dict[str, int], int]]:
+    """Every multiset of `size` cards out of `cards`, with the number of ways to pick it."""
+    if not cards:
+        if not size:
+            yield {}, 1
+        return
+    (card, count), rest = cards[0], cards[1:]
+    for taken in range(min(count, size) + 1):
+        for subset, ways in _subsets(rest, size - taken):
+            if taken:
+                subset[card] = taken
+            yield subset, ways * _comb(count, taken)
+
+
+class MixedDrawPredictor(DrawPredictor):
+    """Weighted mix of DrawPredictors, for a next hand whose deck part is itself unknown."""
+
+    def __init__(self, components: List[Tuple[float, DrawPredictor]]):
+        self.components = components
+
+    def count_distribution(self, card: str) -> List[float]:
+        result: List[float] = []
+        for weight, predictor in self.components:
+            for k, p in enumerate(predictor.count_distribution(card)):
+                if k == len(result):
+                    result.append(0.0)
+                result[k] += weight * p
+        return result
+
+    def expected_count(self, card: str) -> float:
+        return sum(weight * predictor.expected_count(card) for weight, predictor in self.components)
+
+    def coin_distribution(self, values: Mapping[str, int] = TREASURE_VALUES) -> Dict[int, float]:
+        result: Dict[int, float] = {}
+        for weight, predictor in self.components:
+            for coin, p in predictor.coin_distribution(values).items():
+                result[coin] = result.get(coin, 0.0) + weight * p
+        return dict(sorted(result.items()))
@@ -0,0 +1,125 @@
+"""Card effects that decide which piles a logged move uses.
+
+Besides the name, the card table may give each card its types, its cost and an
+Effects column of pile hints such as "gain_to=hand" (Mine) or "discard_from=deck"
+(Vassal). A hint applies to the first move of its kind each player logs while
+that card is the last one played at the table, so "O gains a Silver" right after
+"O plays a Mine" puts the Silver into O's hand (a second gain goes to the discard
+pile as usual), and "L discards a Gold" after "O plays a Bandit" takes it from
+L's deck.
+
+Types and Cost are filled in for the basic supply cards, the Base, Intrigue and
+Seaside kingdoms and every card with an Effects hint; the other rows leave them
+blank, which loads as no types and an unknown (None) cost. Cost holds coins only,
+so potion and debt costs stay blank too. The columns are compiled into the
+matcher's precompiled <csv>.idx, so a warm start reads no CSV.
+"""
+import os
+from typing import Dict, Mapping, Optional, Tuple
+
+from dominion_tracker.engine import ActionType
+from dominion_tracker.matcher import CardMatcher, load_card_table
+
+# Pile names a hint may use; "supply" and "trash" are outside the tracked piles
+PILE_NAMES = ("deck", "hand", "discard", "played", "set_aside", "mats", "supply", "trash")
+
+# Hint key -> (action type it applies to, whether it names the source or the target pile)
+HINT_KEYS: Dict[str, Tuple[ActionType, str]] = {
+    "gain_to": (ActionType.GAIN, "target"),
+    "trash_from": (ActionType.TRASH, "source"),
+    "discard_from": (ActionType.DISCARD_HAND, "source"),
+    "topdeck_from": (ActionType.TOPDECK, "source"),
+    "set_aside_from": (ActionType.SET_ASIDE, "source"),
+    "put_from": (ActionType.PUT_IN_HAND, "source"),
+    "mat_from": (ActionType.TO_MAT, "source"),
+}
+
+_NO_HINT: Tuple[Optional[str], Optional[str]] = (None, None)
+
+
+class CardInfo:
+    """Types, cost and effect hints of one card from the card table."""
+
+    __slots__ = ("name", "types", "cost", "effects")
+
+    def __init__(self, name: str, types: Tuple[str, ...] = (), cost: Optional[int] = None,
+                 effects: Optional[Dict[str, str]] = None):
+        self.name = name
+        self.types = types
+        self.cost = cost
+        self.effects = effects or {}
+
+    def has_type(self, card_type: str) -> bool:
+        return card_type in self.types
+
+    def __repr__(self):
+        return f"CardInfo({self.name!r}, types={self.types}, cost={self.cost}, effects={self.effects})"
+
+
+def parse_effects(text: str) -> Dict[str, str]:
+    """Parse "gain_to=deck;discard_from=deck" into a dict, rejecting unknown keys and piles."""
+    effects = {}
+    for item in filter(None, (part.strip() for part in text.split(";"))):
+        key, _, pile = item.partition("=")
+        key, pile = key.strip(), pile.strip()
+        if key not in HINT_KEYS:
+            raise ValueError(f"Unknown effect hint {key!r}")
+        if pile not in PILE_NAMES:
+            raise ValueError(f"Unknown pile {pile!r} in effect hint {item!r}")
+        effects[key] = pile
+    return effects
+
+
+def load_card_info(path: str) -> Dict[str, CardInfo]:
+    """Read the card CSV into CardInfo by display name; Types, Cost and Effects columns are optional."""
+    return {name: CardInfo(name, *row) for name, row in load_card_table(path)[1].items()}
+
+
+class EffectTable:
+    """Effect hints compiled into one dict lookup per move.
+
+    `hints` maps (action type, last played card) to a (source, target) pile override;
+    moves without an entry use the action type's default piles.
+    """
+
+    _shared: Dict[str, "EffectTable"] = {}
+
+    def __init__(self, cards: Mapping[str, CardInfo] = {}):
+        self.cards = dict(cards)
+        self.hints: Dict[Tuple[ActionType, str], Tuple[Optional[str], Optional[str]]] = {}
+        for name, info in self.cards.items():
+            for key, pile in info.effects.items():
+                action_type, side = HINT_KEYS[key]
+                source, target = self.hints.get((action_type, name), _NO_HINT)
+                if side == "source":
+                    source = pile
+                else:
+                    target = pile
+                self.hints[(action_type, name)] = (source, target)
+
+    @classmethod
+    def from_csv(cls, card_csv_path: str) -> "EffectTable":
+        # The shared matcher holds the card rows, from its precompiled index when it is fresh
+        cards = CardMatcher.shared(card_csv_path).cards
+        return cls({name: CardInfo(name, *row) for name, row in cards.items()})
+
+    @classmethod
+    def shared(cls, card_csv_path: str) -> "EffectTable":
+        """One table per card CSV, reused by every Parser in the process."""
+        key = os.path.realpath(card_csv_path)
+        table = cls._shared.get(key)
+        if table is None:
+            table = cls._shared[key] = cls.from_csv(card_csv_path)
+        return table
+
+    def piles(self, action_type: ActionType, last_played: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+        """(source, target) override for a move made while last_played is in effect."""
+        return self.hints.get((action_type, last_played), _NO_HINT)
+
+    def cost(self, card: str) -> Optional[int]:
+        info = self.cards.get(card)
+        return info.cost if info is not None else None
+
+    def types(self, card: str) -> Tuple[str, ...]:
+        info = self.cards.get(card)
+        return info.types if info is not None else ()
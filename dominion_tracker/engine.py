@@ -1,10 +1,18 @@
 from enum import Enum, auto
-from typing import List, Dict
-from dominion_tracker.state import PlayerState, InvalidCardMove
+from time import perf_counter_ns
+from typing import TYPE_CHECKING, Callable, List, Dict, Iterable, Optional, Tuple, Union
+from dominion_tracker.state import CardIndex, CompactPlayerState, HiddenPlayerState, PlayerState, InvalidCardMove
 import logging
 
+if TYPE_CHECKING:
+    from dominion_tracker.integrity import IntegrityMonitor
+    from dominion_tracker.profiling import Stats
+
 logger = logging.getLogger(__name__)
 
+# (pile, card, change in count), e.g. ("hand", "Village", -1)
+Delta = Tuple[str, str, int]
+
 
 class ActionType(Enum):
     DRAW = auto()
@@ -17,67 +25,278 @@ class ActionType(Enum):
     DISCARD_WHOLE_PLAYED = auto()
     END_TURN = auto()
     TRASH = auto()
+    TOPDECK = auto()
+    SET_ASIDE = auto()
+    PUT_IN_HAND = auto()
+    TO_MAT = auto()
+    RETURN_TO_SUPPLY = auto()
 
 
 class Action:
-    def __init__(self, type: ActionType, cards: List[str]):
+    """A move of cards; `source`/`target` name piles that override the type's default piles."""
+
+    __slots__ = ("type", "cards", "player", "source", "target")
+
+    def __init__(self, type: ActionType, cards: List[str], player: Optional[str] = None,
+                 source: Optional[str] = None, target: Optional[str] = None):
         self.type = type
         self.cards = cards
+        self.player = player
+        self.source = source
+        self.target = target
 
     def __repr__(self):
-        return f"Action(type={self.type}, cards={self.cards})"
+        piles = ""
+        if self.source is not None or self.target is not None:
+            piles = f", source={self.source}, target={self.target}"
+        return f"Action(type={self.type}, cards={self.cards}, player={self.player}{piles})"
+
+
+def _end_turn(state, action: Action) -> None:
+    state.move_whole_played_to_discard()
+    state.move_whole_hand_to_discard()
+
+
+def _move(source: Optional[str], target: Optional[str], verb: str) -> Callable[[PlayerState, Action], None]:
+    """Handler moving the action's cards from source to target unless the action overrides them."""
+    def handler(state, action: Action) -> None:
+        state.move_between(action.source or source, action.target or target, action.cards, verb)
+    return handler
+
+
+def _with_default(method: str, move: Callable[[PlayerState, Action], None]) -> Callable[[PlayerState, Action], None]:
+    """Call the state's dedicated method for the default piles and `move` for overridden ones."""
+    def handler(state, action: Action) -> None:
+        if action.source is None and action.target is None:
+            getattr(state, method)(action.cards)
+        else:
+            move(state, action)
+    return handler
+
+
+def _put_in_hand(state, action: Action) -> None:
+    # Cards set aside earlier (Haven) come back to hand; otherwise they come from the deck
+    source = action.source
+    if source is None:
+        source = "set_aside" if state.has_cards("set_aside", action.cards) else "deck"
+    state.move_between(source, "hand", action.cards, "put into hand")
+
+
+# ActionType -> default (source, target) piles of its card moves, None being outside the
+# tracked piles; PUT_IN_HAND takes from set_aside instead when the cards are there
+DEFAULT_PILES: Dict[ActionType, Tuple[Optional[str], Optional[str]]] = {
+    ActionType.DRAW: ("deck", "hand"),
+    ActionType.PLAY: ("hand", "played"),
+    ActionType.DISCARD_PLAYED: ("played", "discard"),
+    ActionType.DISCARD_HAND: ("hand", "discard"),
+    ActionType.GAIN: (None, "discard"),
+    ActionType.TRASH: ("hand", None),
+    ActionType.TOPDECK: ("hand", "deck"),
+    ActionType.SET_ASIDE: ("deck", "set_aside"),
+    ActionType.PUT_IN_HAND: ("deck", "hand"),
+    ActionType.TO_MAT: ("hand", "mats"),
+    ActionType.RETURN_TO_SUPPLY: ("hand", None),
+}
+# ActionType -> handler(state, action)
+_HANDLERS: Dict[ActionType, Callable[[PlayerState, Action], None]] = {
+    ActionType.DRAW: lambda state, action: state.move_from_deck_to_hand(action.cards),
+    ActionType.PLAY: lambda state, action: state.move_from_hand_to_played(action.cards),
+    ActionType.DISCARD_PLAYED: lambda state, action: state.move_from_played_to_discard(action.cards),
+    ActionType.DISCARD_HAND: _with_default("move_from_hand_to_discard", _move("hand", "discard", "discard")),
+    ActionType.SHUFFLE: lambda state, action: state.move_whole_discard_to_deck(),
+    ActionType.DISCARD_WHOLE_HAND: lambda state, action: state.move_whole_hand_to_discard(),
+    ActionType.DISCARD_WHOLE_PLAYED: lambda state, action: state.move_whole_played_to_discard(),
+    ActionType.GAIN: _with_default("gain_cards", _move("supply", "discard", "gain")),
+    ActionType.END_TURN: _end_turn,
+    ActionType.TRASH: _with_default("trash_cards", _move("hand", "trash", "trash")),
+    ActionType.TOPDECK: _move("hand", "deck", "topdeck"),
+    ActionType.SET_ASIDE: _move("deck", "set_aside", "set aside"),
+    ActionType.PUT_IN_HAND: _put_in_hand,
+    ActionType.TO_MAT: _move("hand", "mats", "put on a mat"),
+    ActionType.RETURN_TO_SUPPLY: _move("hand", "supply", "return"),
+}
 
 
 class GameEngine:
-    def __init__(self, starting_deck: Dict[str, int] = {"Copper": 7, "Estate": 3}) -> None:
-        self.state = PlayerState()
-        for card, count in starting_deck.items():
-            self.state.deck[card] = count
-           
+    def __init__(self, starting_deck: Dict[str, int] = {"Copper": 7, "Estate": 3},
+                 state: Optional[Union[PlayerState, CompactPlayerState]] = None) -> None:
+        self.state = state if state is not None else PlayerState()
+        self.state.add_to_deck(starting_deck)
+        self.stats: Optional["Stats"] = None
+        self.subscribers: List[Callable[[Action, List[Delta]], None]] = []
+        self.integrity: Optional["IntegrityMonitor"] = None
+        self._integrity_player: Optional[str] = None
+        self._changes: List[Delta] = []
 
     def apply(self, action: Action) -> None:
+        handler = _HANDLERS.get(action.type)
+        if handler is None:
+            logger.error(f"Unknown action type: {action.type}")
+            raise ValueError(f"Unknown action type: {action.type}")
 
         try:
-            if action.type == ActionType.DRAW:
-                self.state.move_from_deck_to_hand(action.cards)
+            handler(self.state, action)
+        except InvalidCardMove as e:
+            logger.warning(f"Invalid move: {e}")
+            if self.stats is not None:
+                self.stats.record_invalid(action.type.name, e.card)
+            if self.integrity is not None:
+                self.integrity.reject(e)
 
-            elif action.type == ActionType.PLAY:
-                self.state.move_from_hand_to_played(action.cards)
+    def _timed_apply(self, action: Action) -> None:
+        start = perf_counter_ns()
+        GameEngine.apply(self, action)
+        self.stats.record_action(action.type.name, perf_counter_ns() - start)
 
-            elif action.type == ActionType.DISCARD_PLAYED:
-                self.state.move_from_played_to_discard(action.cards)
+    def _observed_apply(self, action: Action) -> None:
+        changes = self._changes = []
+        if self.stats is not None:
+            self._timed_apply(action)
+        else:
+            GameEngine.apply(self, action)
+        # Changes made outside apply() (restore) go to a list nobody reads
+        self._changes = []
+        if self.integrity is not None:
+            self.integrity.check(self._integrity_player, action)
+        if not changes:
+            return
+        if len(changes) > 1:
+            # Net out cards that passed through a pile within the action (an unknown card resolved, then played)
+            net: Dict[Tuple[str, str], int] = {}
+            for pile, card, change in changes:
+                net[pile, card] = net.get((pile, card), 0) + change
+            changes = [(pile, card, change) for (pile, card), change in net.items() if change]
+        for callback in self.subscribers:
+            callback(action, changes)
 
-            elif action.type == ActionType.DISCARD_HAND:
-                self.state.move_from_hand_to_discard(action.cards)
+    def _checked_apply(self, action: Action) -> None:
+        if self.stats is not None:
+            self._timed_apply(action)
+        else:
+            GameEngine.apply(self, action)
+        # Called for every action: a rejected trash changes nothing but still diverges
+        self.integrity.check(self._integrity_player, action)
 
-            elif action.type == ActionType.SHUFFLE:
-                self.state.move_whole_discard_to_deck()
-            
-            elif action.type == ActionType.DISCARD_WHOLE_HAND:
-                self.state.move_whole_hand_to_discard()
+    def _install_apply(self) -> None:
+        # The slower paths are swapped in per instance, so a plain engine runs apply() with no extra checks.
+        # Only subscribers need the delta records; the integrity check reads the piles themselves
+        if self.subscribers:
+            self.state.on_change = self._record_change
+            self.apply = self._observed_apply
+        elif self.integrity is not None:
+            self.apply = self._checked_apply
+        elif self.stats is not None:
+            self.apply = self._timed_apply
+        else:
+            self.__dict__.pop("apply", None)
+        if not self.subscribers:
+            self.state.on_change = None
 
-            elif action.type == ActionType.DISCARD_WHOLE_PLAYED:
-                self.state.move_whole_played_to_discard()
+    def instrument(self, stats: Optional["Stats"]) -> None:
+        """Count and time every apply() into stats; None switches instrumentation off again."""
+        self.stats = stats
+        self._install_apply()
 
-            elif action.type == ActionType.GAIN:
-                self.state.gain_cards(action.cards)
+    def subscribe(self, callback: Callable[[Action, List[Delta]], None]) -> None:
+        """Call callback(action, deltas) after every apply() that changes a pile.
 
-            elif action.type == ActionType.END_TURN:
-                self.state.move_whole_played_to_discard()
-                self.state.move_whole_hand_to_discard()
-            
-            elif action.type == ActionType.TRASH:
-                self.state.trash_cards(action.cards)
+        Deltas are (pile, card, change) records netted per pile and card, so a consumer
+        holding the previous summary() stays in sync in O(changed cards) per action.
+        """
+        self.subscribers.append(callback)
+        self._install_apply()
 
-            else:
-                logger.error(f"Unknown action type: {action.type}")
-                raise ValueError(f"Unknown action type: {action.type}")
+    def unsubscribe(self, callback: Callable[[Action, List[Delta]], None]) -> None:
+        self.subscribers.remove(callback)
+        self._install_apply()
 
-        except InvalidCardMove as e:
-            logger.warning(f"Invalid move: {e}")
+    def check_integrity(self, monitor: Optional["IntegrityMonitor"], player: Optional[str] = None) -> None:
+        """Check card conservation into monitor at every turn end; None switches the checks off again.
+
+        `player` keys this engine's totals in a monitor shared by several engines.
+        """
+        self.integrity = monitor
+        self._integrity_player = player
+        if monitor is not None:
+            monitor.start(player, self.state)
+        self._install_apply()
+
+    def _record_change(self, pile: str, card: str, change: int) -> None:
+        self._changes.append((pile, card, change))
 
     def summary(self) -> Dict[str, Dict[str, int]]:
         return self.state.summary()
 
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """Copy of the current piles that restore() can bring back later."""
+        return self.state.summary()
+
+    def restore(self, snapshot: Dict[str, Dict[str, int]]) -> None:
+        self.state.load_summary(snapshot)
+        if self.integrity is not None:
+            self.integrity.start(self._integrity_player, self.state)
+
     def __str__(self) -> str:
         return str(self.state)
+
+
+class TableEngine:
+    """Tracks every player at the table, routing each action by its player id.
+
+    Opponents' draws are hidden in the log, so players get a HiddenPlayerState unless
+    hidden=False. Compact states cannot track hidden cards, so compact=True defaults
+    to hidden=False and rejects hidden=True.
+    """
+
+    def __init__(self, player_ids: Iterable[str], starting_deck: Dict[str, int] = {"Copper": 7, "Estate": 3},
+                 compact: bool = False, hidden: Optional[bool] = None) -> None:
+        if hidden is None:
+            hidden = not compact
+        elif hidden and compact:
+            raise ValueError("Compact states cannot track hidden draws; pass hidden=False")
+        # Compact states share one card index so a table only allocates slots for the cards in play
+        index = CardIndex() if compact else None
+        self.engines: Dict[str, GameEngine] = {
+            pid: GameEngine(starting_deck, state=self._new_state(index, compact, hidden))
+            for pid in player_ids
+        }
+
+    @staticmethod
+    def _new_state(index: Optional[CardIndex], compact: bool, hidden: bool):
+        if compact:
+            return CompactPlayerState(index)
+        return HiddenPlayerState() if hidden else PlayerState()
+
+    def apply(self, action: Action) -> None:
+        engine = self.engines.get(action.player)
+        if engine is None:
+            raise ValueError(f"Unknown player: {action.player}")
+        engine.apply(action)
+
+    def instrument(self, stats: Optional["Stats"]) -> None:
+        """Collect every player's apply() counters and timings into one Stats object."""
+        for engine in self.engines.values():
+            engine.instrument(stats)
+
+    def subscribe(self, callback: Callable[[Action, List[Delta]], None]) -> None:
+        """Subscribe callback to every player's deltas; action.player tells whose piles changed."""
+        for engine in self.engines.values():
+            engine.subscribe(callback)
+
+    def check_integrity(self, monitor: Optional["IntegrityMonitor"]) -> None:
+        """Check every player's card conservation into one monitor, keyed by player id."""
+        for pid, engine in self.engines.items():
+            engine.check_integrity(monitor, pid)
+
+    def summary(self) -> Dict[str, Dict[str, Dict[str, int]]]:
+        return {pid: engine.summary() for pid, engine in self.engines.items()}
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, int]]]:
+        return {pid: engine.snapshot() for pid, engine in self.engines.items()}
+
+    def restore(self, snapshot: Dict[str, Dict[str, Dict[str, int]]]) -> None:
+        for pid, engine in self.engines.items():
+            engine.restore(snapshot[pid])
+
+    def __str__(self) -> str:
+        return "\n".join(f"{pid}: {engine}" for pid, engine in self.engines.items())
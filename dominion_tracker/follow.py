@@ -0,0 +1,77 @@
+import asyncio
+import os
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, List, Optional
+
+
+class LogFollower:
+    """Read a growing log file incrementally, resuming from the last byte offset.
+
+    A trailing line without a newline is kept back until the rest of it is written,
+    so every returned line is complete. When the file is truncated or replaced by a
+    new file at the same path, reading starts over from its first byte and
+    `restarts` goes up by one, so a caller can drop what it built from the old lines.
+    """
+
+    def __init__(self, path: Path, offset: int = 0, encoding: str = "utf-8") -> None:
+        self.path = Path(path)
+        self.offset = offset
+        self.encoding = encoding
+        self._partial = b""
+        self._file: Optional[BinaryIO] = None
+        self.restarts = 0
+
+    def open(self) -> None:
+        if self._file is None:
+            self._file = open(self.path, "rb")
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "LogFollower":
+        self.open()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def read_new_lines(self) -> List[str]:
+        """Return the complete lines appended since the last call."""
+        self.open()
+        stat = os.fstat(self._file.fileno())
+        try:
+            replaced = os.stat(self.path).st_ino != stat.st_ino
+        except FileNotFoundError:
+            # Moved away with no new file yet; keep reading the old one
+            replaced = False
+        if replaced:
+            self.close()
+            self.open()
+            stat = os.fstat(self._file.fileno())
+        size = stat.st_size
+        if replaced or size < self.offset:
+            # Truncated or replaced: start over
+            self.offset = 0
+            self._partial = b""
+            self.restarts += 1
+        if size == self.offset:
+            return []
+
+        self._file.seek(self.offset)
+        data = self._file.read(size - self.offset)
+        self.offset += len(data)
+
+        chunks = (self._partial + data).split(b"\n")
+        self._partial = chunks.pop()
+        return [chunk.decode(self.encoding) for chunk in chunks]
+
+    async def lines(self, poll_interval: float = 0.05) -> AsyncIterator[List[str]]:
+        """Yield batches of new lines forever, sleeping between size checks."""
+        while True:
+            batch = self.read_new_lines()
+            if batch:
+                yield batch
+            else:
+                await asyncio.sleep(poll_interval)
@@ -0,0 +1,190 @@
+"""Opt-in card-conservation checks of the tracked piles against the log.
+
+IntegrityMonitor keeps, for each player, the composition the log implies: the
+starting deck plus every logged gain, minus every logged trash or return. It is
+built from the actions alone, never from what apply() did with them, so it can
+catch the tracker losing or inventing cards. Moves between piles leave it
+unchanged, and an action costs O(its cards) only when it crosses the supply.
+
+At the end of each turn the monitor compares it with the player's tracked piles
+(state.total_cards()), and once more for every player when it reports. A turn
+costs O(cards the player owns), so the check stays cheap next to apply() and
+needs no per-action delta records.
+
+Tracking also departs from the log wherever the log moves a card the tracker does
+not have where the move takes it from, e.g. a draw of a Gold the deck never got.
+apply() rejects such a move without changing any pile, so the engine hands its
+InvalidCardMove to reject() and the action is recorded as a Divergence at once.
+
+Each Divergence names the action and event at which the counts were found to
+disagree; for a turn-end check that is the action ending the turn. The card's
+expected count is then resynced to the tracked one, so each later divergence is
+reported on its own.
+"""
+import logging
+import sys
+from typing import TYPE_CHECKING, Dict, List, Optional, TextIO, Union
+
+from dominion_tracker.engine import DEFAULT_PILES, Action, ActionType
+from dominion_tracker.state import OUTSIDE_PILES, UNKNOWN_CARD, InvalidCardMove
+
+if TYPE_CHECKING:
+    from dominion_tracker.state import CompactPlayerState, PlayerState
+
+logger = logging.getLogger(__name__)
+
+
+def supply_change(action: Action) -> int:
+    """+1 if the action brings its cards into the player's piles, -1 if it takes them out, else 0."""
+    source, target = DEFAULT_PILES.get(action.type, (None, None))
+    source = action.source or source
+    target = action.target or target
+    if source is None and target is None:
+        return 0
+    source_outside = source is None or source in OUTSIDE_PILES
+    target_outside = target is None or target in OUTSIDE_PILES
+    if source_outside == target_outside:
+        return 0
+    return 1 if source_outside else -1
+
+
+# ActionType -> supply_change of its actions that name no piles of their own
+_DEFAULT_CHANGES: Dict[ActionType, int] = {t: supply_change(Action(t, [])) for t in ActionType}
+
+
+class Divergence:
+    """The action after which a player's tracked cards stopped matching the log.
+
+    `expected` and `actual` are the player's copies of `card` by the log and by the
+    tracker. For a move apply() rejected, `reason` holds the InvalidCardMove message
+    and `expected` the copies the log moves.
+    """
+
+    __slots__ = ("index", "event", "player", "action", "card", "expected", "actual", "reason")
+
+    def __init__(self, index: int, event: Optional[str], player: Optional[str], action: Action,
+                 card: str, expected: int, actual: int, reason: Optional[str] = None):
+        self.index = index
+        self.event = event
+        self.player = player
+        self.action = action
+        self.card = card
+        self.expected = expected
+        self.actual = actual
+        self.reason = reason
+
+    def __str__(self):
+        where = f"action #{self.index}" + (f" ({self.event!r})" if self.event is not None else "")
+        if self.reason is not None:
+            return f"diverged at {where}: {self.action.type.name} rejected, {self.reason}"
+        who = f"{self.player} has" if self.player is not None else "tracked"
+        return f"diverged at {where}: {who} {self.actual} {self.card}, the log implies {self.expected}"
+
+    def to_dict(self) -> Dict[str, object]:
+        return {"index": self.index, "event": self.event, "player": self.player, "action": self.action.type.name,
+                "card": self.card, "expected": self.expected, "actual": self.actual, "reason": self.reason}
+
+
+class IntegrityMonitor:
+    """Per-player card totals implied by the log, checked against the piles at every turn end.
+
+    Attach it with GameEngine.check_integrity or TableEngine.check_integrity. A caller
+    that knows the event text can set `event` before each apply() so divergences name it.
+    """
+
+    def __init__(self):
+        # Nonzero counts only, so a turn end that matches is one dict comparison
+        self.expected: Dict[Optional[str], Dict[str, int]] = {}
+        self.states: Dict[Optional[str], Union["PlayerState", "CompactPlayerState"]] = {}
+        self.divergences: List[Divergence] = []
+        self.actions = 0
+        self.event: Optional[str] = None
+        self._rejected: Optional[InvalidCardMove] = None
+        self._last: Dict[Optional[str], Action] = {}
+
+    def start(self, player: Optional[str], state: Union["PlayerState", "CompactPlayerState"]) -> None:
+        """(Re)start a player's expected totals from the cards state holds now."""
+        self.states[player] = state
+        self.expected[player] = {card: count for card, count in state.total_cards().items() if count}
+
+    def reject(self, error: InvalidCardMove) -> None:
+        """Note that apply() rejected the action being applied; the next check() reports it."""
+        self._rejected = error
+
+    def check(self, player: Optional[str], action: Action) -> Optional[Divergence]:
+        """Fold one applied action into the expected totals; returns the divergence it revealed, if any."""
+        self.actions += 1
+        self._last[player] = action
+        if action.source is None and action.target is None:
+            sign = _DEFAULT_CHANGES.get(action.type, 0)
+        else:
+            sign = supply_change(action)
+        if sign:
+            self._add(player, action.cards, sign)
+
+        divergence = None
+        if self._rejected is not None:
+            divergence = self._reject_action(player, action, sign)
+        if action.type is ActionType.END_TURN:
+            divergence = self.verify(player) or divergence
+        return divergence
+
+    def _reject_action(self, player: Optional[str], action: Action, sign: int) -> Divergence:
+        rejected, self._rejected = self._rejected, None
+        card = rejected.card if rejected.card is not None else (action.cards[0] if action.cards else "")
+        actual = self.states[player].total_cards().get(card, 0)
+        divergence = Divergence(self.actions, self.event, player, action, card,
+                                action.cards.count(card), actual, str(rejected))
+        self._record(divergence)
+        if sign:
+            # Nothing moved, so the log's gain or trash is already reported; leave the totals as tracked
+            self._add(player, action.cards, -sign)
+        return divergence
+
+    def _add(self, player: Optional[str], cards: List[str], change: int) -> None:
+        expected = self.expected[player]
+        for card in cards:
+            if card != UNKNOWN_CARD:
+                count = expected.get(card, 0) + change
+                if count:
+                    expected[card] = count
+                else:
+                    del expected[card]
+
+    def verify(self, player: Optional[str]) -> Optional[Divergence]:
+        """Compare a player's expected totals with their piles; returns the last divergence found."""
+        state = self.states.get(player)
+        action = self._last.get(player)
+        if state is None or action is None:
+            return None
+        expected = self.expected[player]
+        actual = state.total_cards()
+        if actual == expected:
+            return None
+        divergence = None
+        for card in sorted(expected.keys() | actual.keys()):
+            count = actual.get(card, 0)
+            if card != UNKNOWN_CARD and expected.get(card, 0) != count:
+                divergence = Divergence(self.actions, self.event, player, action, card, expected.get(card, 0), count)
+                self._record(divergence)
+                if count:
+                    expected[card] = count
+                else:
+                    del expected[card]
+        return divergence
+
+    def _record(self, divergence: Divergence) -> None:
+        self.divergences.append(divergence)
+        logger.warning(str(divergence))
+
+    def report(self, out: Optional[TextIO] = None) -> None:
+        """Check every player's piles once more, then print the divergences."""
+        out = out if out is not None else sys.stderr
+        for player in self.states:
+            self.verify(player)
+        if not self.divergences:
+            print(f"integrity: {self.actions:,} actions checked, card totals match the log", file=out)
+            return
+        print(f"integrity: {len(self.divergences)} divergence(s) in {self.actions:,} actions", file=out)
+        for divergence in self.divergences:
+            print(f"  {divergence}", file=out)
@@ -0,0 +1,339 @@
+"""Lockstep replay of many games with every game's piles packed into shared integers.
+
+LockstepEngine tracks N games x players x piles x card slots. Each (player, pile,
+card slot) row is one Python int with a 16-bit lane per game, lane g holding game
+g's count. Slot numbers come from each game's own CardIndex, so a row is as long
+as the largest game's card set. Each step applies one action per game. Every
+card move of the step with the same player, piles and slot is folded into one
+delta int, so updating all of those games is a single big-int subtraction and
+addition. A whole-pile move masks the lanes of the games that make it.
+
+Lanes keep their top bit clear, so subtracting a delta from a row with that
+"guard" bit set in every lane never borrows across lanes. A cleared guard bit
+then marks a game whose source pile lacked the cards. That game's move is
+skipped and counted in `invalid[game]`, and no InvalidCardMove is raised, so the
+rest of the step still applies. Counts follow PlayerState, the full-information
+state GameEngine tracks by default, and must stay below 2**15 per pile. Like
+PlayerState, a move skips the placeholders of cards the log does not name.
+
+Encoding still visits every card of every action in Python; from LANE_ARRAY_GAMES
+games on it gathers each step's counts in per-key lane arrays and builds every
+delta int once. On benchmarks/lockstep.py's default 1000 games that measured
+about 1.4x looping GameEngine.apply end to end (1.0x when encoding added shifted
+ints), while apply_step alone runs near 10x the loop: encoding is most of the time.
+"""
+import sys
+from array import array
+from collections import Counter
+from itertools import zip_longest
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from dominion_tracker.engine import DEFAULT_PILES, Action, ActionType
+from dominion_tracker.state import EXTRA_PILES, OUTSIDE_PILES, PILES, UNKNOWN_CARD, CardIndex
+
+LANE_BITS = 16
+_LANE_MAX = (1 << LANE_BITS) - 1
+# Games from which steps are gathered in lane arrays rather than shifted ints
+LANE_ARRAY_GAMES = 400
+# Lane arrays are read as ints in the machine's byte order
+_BYTE_ORDER = sys.byteorder
+_PILE_NUMBERS = {pile: number for number, pile in enumerate(PILES)}
+# Source row of a route whose PUT_IN_HAND source depends on the counts
+_FALLBACK = -2
+
+# ActionType -> whole-pile moves it makes
+_WHOLE_MOVES: Dict[ActionType, Tuple[Tuple[str, str], ...]] = {
+    ActionType.SHUFFLE: (("discard", "deck"),),
+    ActionType.DISCARD_WHOLE_HAND: (("hand", "discard"),),
+    ActionType.DISCARD_WHOLE_PLAYED: (("played", "discard"),),
+    ActionType.END_TURN: (("played", "discard"), ("hand", "discard")),
+}
+
+
+class Step:
+    """The actions of one lockstep step, folded into per-row deltas and lane masks.
+
+    `moves` maps (source pile row, target pile row, card slot) to the delta of every
+    game moving that card between those piles (row -1 is outside the tracked piles),
+    `whole` maps (source pile row, target pile row) to the lanes of the games moving
+    that whole pile, and
+    `fallbacks` holds the PUT_IN_HAND moves whose source depends on the counts.
+    """
+
+    __slots__ = ("moves", "whole", "fallbacks")
+
+    def __init__(self):
+        self.moves: Dict[Tuple[int, int, int], int] = {}
+        self.whole: Dict[Tuple[int, int], int] = {}
+        self.fallbacks: List[Tuple[int, Optional[str], Dict[int, int]]] = []
+
+
+class LockstepEngine:
+    """Piles of len(indexes) games x players, replayed one step at a time.
+
+    Each game has its own CardIndex, which must already hold every card the game
+    uses (see for_games).
+    """
+
+    def __init__(self, player_ids: Sequence[str], indexes: Sequence[CardIndex],
+                 starting_deck: Dict[str, int] = {"Copper": 7, "Estate": 3}):
+        self.games = len(indexes)
+        self.player_ids = tuple(player_ids)
+        self.players = {pid: number for number, pid in enumerate(self.player_ids)}
+        self.indexes = list(indexes)
+        for index in self.indexes:
+            for card in starting_deck:
+                index.intern(card)
+        self.cards = max(map(len, self.indexes), default=0)
+        self.rows = [0] * (len(self.player_ids) * len(PILES) * self.cards)
+        self.invalid = array("I", bytes(4 * self.games))
+        # Top bit of every lane
+        self._guard = int.from_bytes(b"\x00\x80" * self.games, "little")
+        # (player, pile) -> row of its slot 0, or -1 for piles outside the tracked ones
+        self._pile_rows: Dict[Tuple[Optional[str], Optional[str]], int] = {}
+        for player in (None,) + self.player_ids:
+            for pile in PILES:
+                self._pile_rows[player, pile] = self._row(player, pile)
+            for pile in (None,) + OUTSIDE_PILES:
+                self._pile_rows[player, pile] = -1
+        # (type, player, source, target) -> route, see _route
+        self._routes: Dict[tuple, tuple] = {}
+        # Zero count in every lane, copied into the per-key lane arrays of _encode_lanes
+        self._empty_lanes = bytes(2 * self.games)
+        # Lane arrays pay a fixed cost per key that only pays off with many games
+        self._encode = self._encode_lanes if self.games >= LANE_ARRAY_GAMES else self._encode_shifted
+
+        for game, index in enumerate(self.indexes):
+            shift = game * LANE_BITS
+            for card, count in starting_deck.items():
+                for pid in self.player_ids:
+                    self.rows[self._row(pid, "deck") + index.ids[card]] += count << shift
+
+    @classmethod
+    def for_games(cls, games: Sequence[Sequence[Action]], player_ids: Sequence[str],
+                  starting_deck: Dict[str, int] = {"Copper": 7, "Estate": 3}) -> "LockstepEngine":
+        """Engine sized for `games`, with slots for exactly the cards each game uses."""
+        indexes = []
+        for actions in games:
+            cards = set().union(*[action.cards for action in actions])
+            cards.discard(UNKNOWN_CARD)
+            indexes.append(CardIndex(list(starting_deck) + sorted(cards)))
+        return cls(player_ids, indexes, starting_deck)
+
+    def _row(self, player: Optional[str], pile: str) -> int:
+        """Row of slot 0 of a player's pile; a None player is the first one."""
+        number = self.players.get(player) if player is not None else 0
+        if number is None:
+            raise ValueError(f"Unknown player: {player}")
+        return (number * len(PILES) + _PILE_NUMBERS[pile]) * self.cards
+
+    def _route(self, action: Action) -> Tuple[Optional[Tuple[Tuple[int, int], ...]], int, int]:
+        """(whole-pile row pairs or None, source row, target row) of an action's type, player and piles."""
+        rows = self._pile_rows
+        player = action.player
+        pairs = _WHOLE_MOVES.get(action.type)
+        if pairs is not None:
+            return tuple((rows[player, source], rows[player, target]) for source, target in pairs), -1, -1
+        if action.type is ActionType.PUT_IN_HAND and action.source is None:
+            return None, _FALLBACK, _FALLBACK
+        default = DEFAULT_PILES.get(action.type)
+        if default is None:
+            raise ValueError(f"Unknown action type: {action.type}")
+        return None, rows[player, action.source or default[0]], rows[player, action.target or default[1]]
+
+    def encode_step(self, actions: Iterable[Tuple[int, Action]]) -> Step:
+        """Fold (game, action) pairs, at most one per game, into a Step."""
+        step = Step()
+        self._encode(step, actions)
+        return step
+
+    def _encode_lanes(self, step: Step, actions: Iterable[Tuple[int, Optional[Action]]]) -> None:
+        # Counts are gathered into one lane array per key and turned into a delta int once,
+        # where adding `1 << (game * LANE_BITS)` per card would copy an ever longer int.
+        # Move keys are ((source row + 1) * span + target row + 1) * cards + slot until then,
+        # an int being cheaper to build and hash than the (source, target, slot) tuple
+        moves: Dict[int, array] = {}
+        whole: Dict[Tuple[int, int], array] = {}
+        cards = self.cards
+        span = len(self.rows) + 1
+        routes = self._routes
+        indexes = self.indexes
+        empty = self._empty_lanes
+        for game, action in actions:
+            if action is None:
+                continue
+            route_key = (action.type, action.player, action.source, action.target)
+            try:
+                route = routes.get(route_key)
+                if route is None:
+                    route = routes[route_key] = self._route(action)
+                pairs, source_row, target_row = route
+                if pairs is not None:
+                    for key in pairs:
+                        lanes = whole.get(key)
+                        if lanes is None:
+                            lanes = whole[key] = array("H", empty)
+                        lanes[game] = _LANE_MAX
+                    continue
+
+                ids = indexes[game].ids
+                if source_row == _FALLBACK:
+                    step.fallbacks.append((game, action.player, Counter(ids[card] for card in action.cards
+                                                                        if card != UNKNOWN_CARD)))
+                    continue
+                # Repeated cards just add up in the lane
+                base = ((source_row + 1) * span + target_row + 1) * cards
+                for card in action.cards:
+                    if card != UNKNOWN_CARD:
+                        key = base + ids[card]
+                        lanes = moves.get(key)
+                        if lanes is None:
+                            lanes = moves[key] = array("H", empty)
+                        lanes[game] += 1
+            except KeyError as e:
+                raise ValueError(f"{e.args[0]!r} is not a player or card of game {game}") from None
+        for key, lanes in moves.items():
+            rows, slot = divmod(key, cards)
+            key = (rows // span - 1, rows % span - 1, slot)
+            step.moves[key] = step.moves.get(key, 0) + int.from_bytes(lanes, _BYTE_ORDER)
+        for key, lanes in whole.items():
+            step.whole[key] = step.whole.get(key, 0) | int.from_bytes(lanes, _BYTE_ORDER)
+
+    def _encode_shifted(self, step: Step, actions: Iterable[Tuple[int, Optional[Action]]]) -> None:
+        # Adds each card's shifted one to the step's delta ints directly
+        moves, whole = step.moves, step.whole
+        routes = self._routes
+        indexes = self.indexes
+        for game, action in actions:
+            if action is None:
+                continue
+            route_key = (action.type, action.player, action.source, action.target)
+            try:
+                route = routes.get(route_key)
+                if route is None:
+                    route = routes[route_key] = self._route(action)
+                pairs, source_row, target_row = route
+                if pairs is not None:
+                    lanes = _LANE_MAX << (game * LANE_BITS)
+                    for key in pairs:
+                        whole[key] = whole.get(key, 0) | lanes
+                    continue
+
+                ids = indexes[game].ids
+                if source_row == _FALLBACK:
+                    step.fallbacks.append((game, action.player, Counter(ids[card] for card in action.cards
+                                                                        if card != UNKNOWN_CARD)))
+                    continue
+                one = 1 << (game * LANE_BITS)
+                # Repeated cards just add up in the delta
+                for card in action.cards:
+                    if card != UNKNOWN_CARD:
+                        key = (source_row, target_row, ids[card])
+                        moves[key] = moves.get(key, 0) + one
+            except KeyError as e:
+                raise ValueError(f"{e.args[0]!r} is not a player or card of game {game}") from None
+
+    def encode_steps(self, games: Sequence[Sequence[Action]]) -> List[Step]:
+        """Every lockstep step of `games`, step k holding each game's k-th action."""
+        steps = []
+        # zip_longest transposes the games into steps, padding the games that already ended with None
+        for actions in zip_longest(*games):
+            step = Step()
+            self._encode(step, enumerate(actions))
+            steps.append(step)
+        return steps
+
+    def apply_step(self, step: Step) -> List[int]:
+        """Apply one step; returns the games whose move was invalid and so skipped."""
+        rows = self.rows
+        guard = self._guard
+
+        # Lanes whose guard bit is borrowed by the subtraction lack the cards
+        short = 0
+        for (source, _, slot), delta in step.moves.items():
+            if source >= 0:
+                short |= ~((rows[source + slot] | guard) - delta) & guard
+        flagged: List[int] = []
+        if short:
+            flagged = self._flag(short)
+            keep = ~((short >> (LANE_BITS - 1)) * _LANE_MAX)
+        for (source, target, slot), delta in step.moves.items():
+            if short:
+                delta &= keep
+            if source >= 0:
+                rows[source + slot] -= delta
+            if target >= 0:
+                rows[target + slot] += delta
+
+        cards = self.cards
+        for (source, target), lanes in step.whole.items():
+            for slot in range(cards):
+                moved = rows[source + slot] & lanes
+                if moved:
+                    rows[source + slot] -= moved
+                    rows[target + slot] += moved
+
+        for game, player, counts in step.fallbacks:
+            if not self._put_in_hand(game, player, counts):
+                self.invalid[game] += 1
+                flagged.append(game)
+        return flagged
+
+    def _flag(self, short: int) -> List[int]:
+        """Count an invalid move for every game whose guard bit is set in `short`."""
+        games = []
+        while short:
+            lowest = short & -short
+            game = lowest.bit_length() // LANE_BITS - 1
+            self.invalid[game] += 1
+            games.append(game)
+            short ^= lowest
+        return games
+
+    def _put_in_hand(self, game: int, player: Optional[str], counts: Dict[int, int]) -> bool:
+        # Like GameEngine: cards set aside earlier come back to hand, otherwise they come from the deck
+        shift = game * LANE_BITS
+        rows = self.rows
+        hand = self._row(player, "hand")
+        for pile in ("set_aside", "deck"):
+            source = self._row(player, pile)
+            if all((rows[source + slot] >> shift) & _LANE_MAX >= count for slot, count in counts.items()):
+                for slot, count in counts.items():
+                    rows[source + slot] -= count << shift
+                    rows[hand + slot] += count << shift
+                return True
+        return False
+
+    def replay(self, games: Sequence[Sequence[Action]]) -> None:
+        """Replay every game's actions in lockstep, step k applying each game's k-th action."""
+        for step in self.encode_steps(games):
+            self.apply_step(step)
+
+    def count(self, game: int, player: Optional[str], pile: str, card: str) -> int:
+        slot = self.indexes[game].ids.get(card)
+        if slot is None:
+            return 0
+        return (self.rows[self._row(player, pile) + slot] >> (game * LANE_BITS)) & _LANE_MAX
+
+    def summary(self, game: int) -> Dict[str, Dict[str, Dict[str, int]]]:
+        """Per-player piles of one game, in the PlayerState.summary() format."""
+        names = self.indexes[game].names
+        shift = game * LANE_BITS
+        result = {}
+        for pid in self.player_ids:
+            piles = {}
+            for pile in PILES:
+                row = self._row(pid, pile)
+                cards = {}
+                for slot, name in enumerate(names):
+                    count = (self.rows[row + slot] >> shift) & _LANE_MAX
+                    if count:
+                        cards[name] = count
+                if cards or pile not in EXTRA_PILES:
+                    piles[pile] = cards
+            result[pid] = piles
+        return result
+
+    def flagged(self) -> List[int]:
+        """Games with at least one invalid move."""
+        return [game for game, count in enumerate(self.invalid) if count]
@@ -1,37 +1,250 @@
-from pathlib import Path
-from dominion_tracker.parser import Parser, read_events
-from dominion_tracker.engine import GameEngine
+from dominion_tracker.parser import EventReader, Parser, iter_events
+from dominion_tracker.engine import Action, GameEngine, TableEngine
+from dominion_tracker.matcher import DEFAULT_CARD_CSV
+from typing import TYPE_CHECKING, Callable, Optional, Union
+import os
 import sys
 
+if TYPE_CHECKING:
+    from dominion_tracker.integrity import IntegrityMonitor
+    from dominion_tracker.profiling import Stats
+
+
+def print_state(engine: Union[GameEngine, TableEngine], predict: bool = False, out=None) -> None:
+    """Print the engine summary and, with predict, the odds for each player's next hand."""
+    # Looked up per call so redirected stdout is honoured
+    out = out if out is not None else sys.stdout
+    summary = engine.summary()
+    print(summary, file=out, flush=True)
+    if predict:
+        from dominion_tracker.draws import DrawPredictor
+
+        if isinstance(engine, TableEngine):
+            report = {pid: DrawPredictor.from_summary(s).report() for pid, s in summary.items()}
+        else:
+            report = DrawPredictor.from_summary(summary).report()
+        print({"next_hand": report}, file=out, flush=True)
+
+
+def emit_deltas(engine: Union[GameEngine, TableEngine], out=None) -> None:
+    """Print the current piles once, then one JSON line of deltas per action that changes them."""
+    import json
+
+    out = out if out is not None else sys.stdout
+    out.write(json.dumps({"snapshot": engine.summary()}) + "\n")
+
+    def write(action: Action, deltas) -> None:
+        out.write(json.dumps({"player": action.player, "action": action.type.name, "deltas": deltas}) + "\n")
+
+    engine.subscribe(write)
+
+
+async def follow_log(log_path: str, parse: Callable[[str], Optional[Action]],
+                     engine: Union[GameEngine, TableEngine], player_ids: tuple,
+                     poll_interval: float = 0.05, out=None, predict: bool = False,
+                     emit: str = "summary") -> None:
+    """Track a growing log, printing an updated summary whenever new events change the state.
+
+    With emit="deltas" the engine's subscribers do the printing; the output is only flushed.
+    When the log is truncated or replaced, the engine goes back to its starting piles
+    and the new file is read from the top (with emit="deltas", after a new snapshot line).
+    Events the reader holds back are released after every batch of lines, except
+    the cleanup draw that a "Turn" line may still need to put after "ends turn".
+    """
+    import json
+    from dominion_tracker.follow import LogFollower
+
+    out = out if out is not None else sys.stdout
+    start = engine.snapshot()
+    reader = EventReader(player_ids)
+
+    def apply_event(event_text: str) -> bool:
+        action = parse(event_text)
+        if action:
+            engine.apply(action)
+        return bool(action)
+
+    with LogFollower(log_path) as follower:
+        restarts = follower.restarts
+        async for lines in follower.lines(poll_interval=poll_interval):
+            changed = False
+            if follower.restarts != restarts:
+                restarts = follower.restarts
+                engine.restore(start)
+                reader = EventReader(player_ids)
+                changed = True
+                if emit == "deltas":
+                    out.write(json.dumps({"snapshot": engine.summary()}) + "\n")
+            for line in lines:
+                for event_text in reader.feed(line):
+                    changed = apply_event(event_text) or changed
+            for event_text in reader.flush():
+                changed = apply_event(event_text) or changed
+            if changed:
+                if emit == "deltas":
+                    out.flush()
+                else:
+                    print_state(engine, predict=predict, out=out)
+
+
 def main():
+    if sys.argv[1:2] == ["batch"]:
+        from dominion_tracker.batch import batch_main
+        return batch_main(sys.argv[2:])
+    if sys.argv[1:2] == ["serve"]:
+        from dominion_tracker.server import serve_main
+        return serve_main(sys.argv[2:])
+    if sys.argv[1:2] == ["simulate"]:
+        from dominion_tracker.simulate import simulate_main
+        return simulate_main(sys.argv[2:])
+
     import argparse
 
     parser = argparse.ArgumentParser()
     parser.add_argument("--players", required=True, help="Comma separated player IDs")
     parser.add_argument("--log", required=True, help="Path to the game log file")
+    parser.add_argument("--all-players", action="store_true", help="Track every player in --players from one pass over the log")
+    parser.add_argument("--follow", action="store_true", help="Keep the log open and print updates as it grows")
+    parser.add_argument("--turn", type=int, default=None, help="Print the state at the start of the N-th Turn line instead of the end")
+    parser.add_argument("--checkpoints", default=None, help="Per-turn checkpoint file to reuse (or create) for --turn")
+    parser.add_argument("--predict", action="store_true", help="Also print next-hand draw odds (expected coin, P($5+) ...)")
+    actions_source = parser.add_mutually_exclusive_group()
+    actions_source.add_argument("--store", default=None, help="Append every parsed action to this SQLite event store")
+    actions_source.add_argument("--cache-dir", default=None, help="Reuse parsed actions of unchanged logs from this directory")
+    parser.add_argument("--profile", action="store_true", help="Print per-action counters, apply latencies, stage timings and invalid moves to stderr at exit")
+    parser.add_argument("--profile-out", default=None, help="Also write a cProfile/pstats dump of the run to this file (implies --profile)")
+    parser.add_argument("--check-integrity", action="store_true", help="Check card conservation at every turn end and report the events where tracking diverged from the log to stderr")
+    parser.add_argument("--emit", choices=("summary", "deltas"), default="summary", help="Print the final piles (summary) or a starting snapshot then one JSON line of (pile, card, change) deltas per action")
+    parser.add_argument("--poll-interval", type=float, default=0.05, help="Seconds between checks for new lines in --follow mode")
     args = parser.parse_args()
+    if args.emit == "deltas" and (args.turn is not None or args.checkpoints):
+        parser.error("--emit deltas streams every action and cannot be combined with --turn or --checkpoints")
+    if args.store and (args.follow or args.turn is not None or args.checkpoints):
+        parser.error("--store records a whole log in one pass and cannot be combined with --follow, --turn or --checkpoints")
+    if args.cache_dir and (args.follow or args.turn is not None or args.checkpoints):
+        parser.error("--cache-dir caches whole logs and cannot be combined with --follow, --turn or --checkpoints")
 
     player_ids = tuple(args.players.split(","))
-    log_path = Path(args.log).resolve()
+    log_path = os.path.realpath(args.log)
 
-    # Determine project root (two levels up from this file)
-    project_root = Path(__file__).resolve().parent.parent
-
-    # Use absolute path for cards CSV
-    card_csv_path = project_root / "cards" / "dominion_cards.csv"
+    card_csv_path = DEFAULT_CARD_CSV
 
     # Instantiate parser with absolute path
-    parser_obj = Parser(player_id=player_ids[0], card_csv_path=str(card_csv_path))
-    engine = GameEngine()
+    parser_obj = Parser(player_id=player_ids[0], card_csv_path=str(card_csv_path), player_ids=player_ids)
+    engine = TableEngine(player_ids) if args.all_players else GameEngine()
 
-    events = read_events(str(log_path), player_ids=player_ids)
+    monitor = None
+    if args.check_integrity:
+        from dominion_tracker.integrity import IntegrityMonitor
 
-    for event_text in events:
-        action = parser_obj.parse_event(event_text)
-        if action:
+        monitor = IntegrityMonitor()
+        if isinstance(engine, TableEngine):
+            engine.check_integrity(monitor)
+        else:
+            engine.check_integrity(monitor, player_ids[0])
+
+    stats = profiler = None
+    if args.profile or args.profile_out:
+        import cProfile
+        from dominion_tracker.profiling import Stats
+
+        stats = Stats()
+        parser_obj.instrument(stats)
+        engine.instrument(stats)
+        profiler = cProfile.Profile() if args.profile_out else None
+    if profiler is not None:
+        profiler.enable()
+    try:
+        track(args, player_ids, log_path, parser_obj, engine, stats, monitor)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile_out)
+        if stats is not None:
+            stats.report(sys.stderr)
+        if monitor is not None:
+            monitor.report(sys.stderr)
+
+
+def track(args, player_ids: tuple, log_path: str, parser_obj: Parser,
+          engine: Union[GameEngine, TableEngine], stats: Optional["Stats"] = None,
+          monitor: Optional["IntegrityMonitor"] = None) -> None:
+    """Run the mode selected on the command line and print the resulting state."""
+    parse = parser_obj.parse_table_event if args.all_players else parser_obj.parse_event
+    if monitor is not None:
+        parse_event = parse
+
+        def parse(event_text: str) -> Optional[Action]:
+            # Lets a divergence name the event whose action caused it
+            monitor.event = event_text
+            return parse_event(event_text)
+    emit = args.emit
+    if emit == "deltas":
+        emit_deltas(engine)
+
+    def show_state() -> None:
+        if emit != "deltas":
+            print_state(engine, predict=args.predict)
+
+    if args.follow:
+        import asyncio
+
+        try:
+            asyncio.run(follow_log(log_path, parse, engine, player_ids, poll_interval=args.poll_interval,
+                                   predict=args.predict, emit=emit))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    if args.turn is not None or args.checkpoints:
+        from dominion_tracker.checkpoint import CheckpointedReplay
+
+        replay = CheckpointedReplay(log_path, parse, engine, player_ids)
+        checkpoint_path = args.checkpoints
+        if checkpoint_path is None or not os.path.exists(checkpoint_path) or not replay.load(checkpoint_path):
+            replay.run()
+            if checkpoint_path is not None:
+                replay.save(checkpoint_path)
+        # Without --turn, seek past the last checkpoint to get the final state
+        replay.seek(args.turn if args.turn is not None else sys.maxsize)
+        show_state()
+        return
+
+    if args.cache_dir:
+        from dominion_tracker.cache import ActionCache
+
+        cache = ActionCache(args.cache_dir, card_csv_path=DEFAULT_CARD_CSV)
+        for action in cache.actions(log_path, parser_obj, table=args.all_players):
             engine.apply(action)
+        show_state()
+        return
+
+    store = recorder = None
+    if args.store:
+        from dominion_tracker.store import EventStore
+
+        store = EventStore(args.store)
+        recorder = store.recorder(source=str(log_path))
+
+    try:
+        with open(log_path) as log_file:
+            events = iter_events(log_file, player_ids=player_ids)
+            if stats is not None:
+                events = stats.timed_iter("read_events", events)
+            for event_text in events:
+                action = parse(event_text)
+                if recorder is not None:
+                    recorder.observe(event_text, action)
+                if action:
+                    engine.apply(action)
+        if recorder is not None:
+            recorder.finish()
+    finally:
+        if store is not None:
+            store.close()
+
+    show_state()
 
-    print(engine.summary())
 
 if __name__ == "__main__":
     main()
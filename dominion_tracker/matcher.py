@@ -0,0 +1,225 @@
+import marshal
+import os
+import re
+import sys
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from dominion_tracker.state import UNKNOWN_CARD
+
+# Card table shipped with the project (two levels up from this file); os.path keeps
+# pathlib out of the CLI's import path
+DEFAULT_CARD_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "cards", "dominion_cards.csv")
+
+# Bump when the precompiled index layout changes
+_INDEX_VERSION = 2
+
+# A card's (types, cost or None, effect hints) from the card table's optional columns
+CardRow = Tuple[Tuple[str, ...], Optional[int], Dict[str, str]]
+
+# Drops "(+$3)" coin annotations and splits on whitespace, "." and "," in one pass
+_TOKEN_RE = re.compile(r"\(\+\$.*?\)|([^\s.,]+)")
+
+
+def tokenize(text: str) -> List[str]:
+    """Card-matching tokens of lowercased text: words and counts, without coin annotations."""
+    return [token for token in _TOKEN_RE.findall(text) if token]
+
+
+def load_card_table(path: str) -> Tuple[Dict[str, str], Dict[str, CardRow]]:
+    """Read the card CSV: lowercase card names to display names, and each card's CardRow.
+
+    The first column is the name; Types, Cost and Effects columns are optional and
+    may be left blank. Effects are validated by dominion_tracker.effects.parse_effects.
+    """
+    import csv
+    from dominion_tracker.effects import parse_effects
+
+    card_names: Dict[str, str] = {}
+    cards: Dict[str, CardRow] = {}
+    with open(path, newline='', encoding='utf-8') as csvfile:
+        reader = csv.reader(csvfile)
+        header = {column.strip(): number for number, column in enumerate(next(reader, []))}
+
+        def column(row: List[str], name: str) -> str:
+            number = header.get(name)
+            return row[number].strip() if number is not None and number < len(row) else ""
+
+        for row in reader:
+            if not row:
+                continue
+            name = row[0].strip()
+            if not name:
+                continue
+            card_names[name.lower()] = name
+            types = tuple(t.strip() for t in column(row, "Types").split(" - ") if t.strip())
+            cost = column(row, "Cost")
+            try:
+                effects = parse_effects(column(row, "Effects"))
+            except ValueError as e:
+                raise ValueError(f"{path}: {name}: {e}") from None
+            cards[name] = (types, int(cost) if cost.isdigit() else None, effects)
+    return card_names, cards
+
+
+def load_card_names(path: str) -> Dict[str, str]:
+    """Read the card CSV and map lowercase card names to their display names."""
+    return load_card_table(path)[0]
+
+
+def word_variants(word: str) -> List[str]:
+    """Spellings of a card word as it may appear in a log ("village" -> "villages")."""
+    variants = [word]
+    if not word.endswith("s"):
+        variants.append(word + "s")
+    if word.endswith("y"):
+        variants.append(word[:-1] + "ies")
+    return variants
+
+
+# Key under which a trie node stores the card name it completes; tokens are never empty
+_NAME = ""
+
+
+class CardMatcher:
+    """Token-level trie over card names, built once and shared between parsers.
+
+    Plural spellings are baked into the trie edges, so matching an event is a
+    single left-to-right walk over its tokens without joining candidate strings.
+    `cards` carries the card table's CardRows along, so the precompiled index also
+    spares EffectTable a read of the CSV.
+    """
+
+    _shared: Dict[str, "CardMatcher"] = {}
+
+    def __init__(self, card_names: Mapping[str, str], max_card_words: Optional[int] = None,
+                 cards: Optional[Mapping[str, CardRow]] = None) -> None:
+        self.card_names: Mapping[str, str] = dict(card_names)
+        self.cards: Dict[str, CardRow] = dict(cards or {})
+        self.max_card_words = 0
+        # Nested dicts: token -> child node, plus _NAME -> card name on terminal nodes
+        self._root: Dict[str, dict] = {}
+        for key, name in self.card_names.items():
+            words = key.split()
+            if max_card_words is not None and len(words) > max_card_words:
+                continue
+            self._insert(words, name)
+            self.max_card_words = max(self.max_card_words, len(words))
+        # Hidden cards ("draws 5 cards", "discards a card") match as placeholders
+        if "card" not in self.card_names:
+            self._insert(["card"], UNKNOWN_CARD)
+
+    def _insert(self, words: List[str], name: str) -> None:
+        node = self._root
+        for word in words:
+            child = node.get(word)
+            if child is None:
+                child = node[word] = {}
+            # Plural spellings lead to the same child; exact card words take precedence
+            for variant in word_variants(word)[1:]:
+                node.setdefault(variant, child)
+            node = child
+        node.setdefault(_NAME, name)
+
+    def to_bytes(self) -> bytes:
+        """Serialize the compiled matcher; shared trie nodes stay shared."""
+        return marshal.dumps((_INDEX_VERSION, self.card_names, self.max_card_words, self._root, self.cards))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CardMatcher":
+        fields = marshal.loads(data)
+        if fields[0] != _INDEX_VERSION:
+            raise ValueError(f"Unsupported card index version {fields[0]}")
+        _, card_names, max_card_words, root, cards = fields
+        matcher = cls.__new__(cls)
+        matcher.card_names = card_names
+        matcher.cards = cards
+        matcher.max_card_words = max_card_words
+        matcher._root = root
+        return matcher
+
+    @classmethod
+    def from_csv(cls, card_csv_path: str, max_card_words: Optional[int] = None,
+                 precompiled: bool = True) -> "CardMatcher":
+        """Build a matcher for a card CSV.
+
+        With precompiled, the compiled trie is cached next to the CSV (as <csv>.idx) on
+        first use and loaded from there while the CSV's size and mtime are unchanged.
+        """
+        path = os.fspath(card_csv_path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            precompiled = False
+        if not precompiled:
+            card_names, cards = load_card_table(path)
+            return cls(card_names, max_card_words=max_card_words, cards=cards)
+
+        index_path = path + ".idx"
+        stamp = (stat.st_size, stat.st_mtime_ns, max_card_words, sys.version_info[:2])
+        try:
+            with open(index_path, "rb") as f:
+                saved_stamp, data = marshal.load(f)
+            if saved_stamp == stamp:
+                return cls.from_bytes(data)
+        except (OSError, ValueError, EOFError, TypeError):
+            pass
+
+        card_names, cards = load_card_table(path)
+        matcher = cls(card_names, max_card_words=max_card_words, cards=cards)
+        try:
+            tmp = f"{index_path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                marshal.dump((stamp, matcher.to_bytes()), f)
+            os.replace(tmp, index_path)
+        except OSError:
+            pass  # Read-only install: build from the CSV every time
+        return matcher
+
+    @classmethod
+    def shared(cls, card_csv_path: str, max_card_words: Optional[int] = None) -> "CardMatcher":
+        """Return a process-wide matcher for this CSV, reading the file only once."""
+        key = f"{os.path.realpath(card_csv_path)}:{max_card_words}"
+        matcher = cls._shared.get(key)
+        if matcher is None:
+            matcher = cls._shared[key] = cls.from_csv(card_csv_path, max_card_words)
+        return matcher
+
+    def tokenize(self, text: str) -> List[str]:
+        return tokenize(text)
+
+    def match_tokens(self, tokens: List[str]) -> List[str]:
+        """Greedy longest match of card names over tokens, honouring leading counts."""
+        root = self._root
+        result = []
+        i = 0
+        n = len(tokens)
+        while i < n:
+            # Handle leading numeric count
+            if tokens[i].isdigit():
+                count = int(tokens[i])
+                i += 1
+            else:
+                count = 1
+
+            node = root
+            j = i
+            match: Tuple[Optional[str], int] = (None, i)
+            while j < n:
+                node = node.get(tokens[j])
+                if node is None:
+                    break
+                j += 1
+                if _NAME in node:
+                    match = (node[_NAME], j)
+
+            name, end = match
+            if name is not None:
+                result.extend([name] * count)
+                i = end
+            else:
+                i += 1  # Skip unrecognized token
+
+        return result
+
+    def extract(self, text: str) -> List[str]:
+        return self.match_tokens(self.tokenize(text))
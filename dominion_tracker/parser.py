@@ -1,40 +1,129 @@
 import re
-from typing import List, Optional
+from collections import deque
+from functools import cached_property
+from typing import TYPE_CHECKING, Deque, Iterable, Iterator, List, Optional, Set, Tuple
+from dominion_tracker.effects import EffectTable
 from dominion_tracker.engine import Action, ActionType
-import csv
-from pathlib import Path
+from dominion_tracker.matcher import CardMatcher, tokenize
 
-def read_events(file_path: str, player_ids: tuple[str, ...]) -> list[str]:
-    events = []
-    current_event = []
+if TYPE_CHECKING:
+    from dominion_tracker.profiling import Stats
+
+# First line of every game, also where each game of a concatenated log starts
+GAME_HEADER = "Game #"
+
+
+class Event(str):
+    """One log event: the joined event text plus its card-matching tokens.
+
+    It is a str, so anything that stores, prints or compares events keeps working.
+    `tokens` is computed on first use and kept, so an event is lowercased and
+    tokenized at most once however many parsers read it.
+    """
+
+    @cached_property
+    def tokens(self) -> List[str]:
+        return tokenize(self.lower())
 
-    with open(file_path) as f:
-        lines = [line.strip() for line in f if line.strip()]  # Strip and skip empty lines
 
-    for i, line in enumerate(lines):
+class EventReader:
+    """Push-based event grouper: feed log lines, get back the events that are complete.
+
+    Only the last two events are held back, which is enough to place the synthetic
+    "ends turn" event before the draw (and optional shuffle) that precedes a "Turn" line.
+    Everything before a "Turn" line is released as soon as that line arrives. A
+    "Game #" header line always starts an event of its own, so the games of a
+    concatenated log stay apart.
+    """
+
+    def __init__(self, player_ids: tuple[str, ...]) -> None:
+        self.player_ids = player_ids
+        self.pending: Deque[str] = deque()
+        self.current_event: List[str] = []
+        # Player of the last event released, who ends the turn if nothing is pending
+        self._last_player: Optional[str] = None
+
+    def feed(self, raw_line: str) -> List[str]:
+        line = raw_line.strip()
+        if not line:
+            return []
+
+        pending = self.pending
         # New event starts
-        if line.startswith("Turn") or any(line.startswith(pid) for pid in player_ids):
-            if current_event:
-                events.append(" ".join(current_event))
-                current_event = []
-
-        current_event.append(line)
-
-        if line.startswith("Turn"):
-            # Look back in the last few events to find the draw (and optional shuffle) event of "O"
-            pos = len(events) - 1
-            player_id = events[pos].split()[0]
-            if pos > 0 and "shuffles" in events[pos - 1]:
-                insert_at = pos - 1
-            else:
-                insert_at = pos
-            events.insert(insert_at, f"{player_id} ends turn")
+        is_turn = line.startswith("Turn")
+        is_game = line.startswith(GAME_HEADER)
+        if is_turn or is_game or line.startswith(self.player_ids):
+            if self.current_event:
+                pending.append(Event(" ".join(self.current_event)))
+                self.current_event = []
+
+        if is_game:
+            # The previous game is over, so none of its events wait for a "Turn" line
+            self.current_event.append(line)
+            ready = self._release(len(pending))
+            self._last_player = None
+            return ready
+
+        self.current_event.append(line)
+
+        if is_turn and (pending or self._last_player):
+            # The turn ends before its cleanup draw (and the shuffle that may precede it)
+            player_id = pending[-1].split()[0] if pending else self._last_player
+            at = len(pending)
+            if pending and _is_draw(pending[-1]):
+                at -= 2 if len(pending) > 1 and "shuffles" in pending[-2] else 1
+            pending.insert(at, Event(f"{player_id} ends turn"))
+            return self._release(len(pending))
+
+        return self._release(len(pending) - 2)
+
+    def flush(self) -> List[str]:
+        """Release the held-back events that no "Turn" line can still reorder.
+
+        Only a trailing draw or shuffle, and a shuffle right before a draw, stay
+        pending. The event still being read is not complete until the next one
+        starts, so it stays too.
+        """
+        pending = self.pending
+        keep = 0
+        if pending and "shuffles" in pending[-1]:
+            keep = 1
+        elif pending and _is_draw(pending[-1]):
+            keep = 2 if len(pending) > 1 and "shuffles" in pending[-2] else 1
+        return self._release(len(pending) - keep)
+
+    def _release(self, count: int) -> List[str]:
+        ready = [self.pending.popleft() for _ in range(count)]
+        if ready and ready[-1].startswith(self.player_ids):
+            self._last_player = ready[-1].split()[0]
+        return ready
+
+    def close(self) -> List[str]:
+        """Release everything still buffered, including the last (unterminated) event."""
+        ready = list(self.pending)
+        self.pending.clear()
+        if self.current_event:
+            ready.append(Event(" ".join(self.current_event)))
+            self.current_event = []
+        return ready
+
+
+def _is_draw(event: str) -> bool:
+    return event.split(None, 2)[1:2] == ["draws"]
 
-    # Append last event if it exists
-    if current_event:
-        events.append(" ".join(current_event))
 
-    return events
+def iter_events(lines: Iterable[str], player_ids: tuple[str, ...]) -> Iterator[str]:
+    """Lazily group log lines into events from any file-like object or line iterator."""
+    reader = EventReader(player_ids)
+    for line in lines:
+        yield from reader.feed(line)
+    yield from reader.close()
+
+
+def read_events(file_path: str, player_ids: tuple[str, ...]) -> list[Event]:
+    with open(file_path) as f:
+        return list(iter_events(f, player_ids))
+
 
 def singularize(card_name: str) -> str:
     if card_name.endswith("ies"):
@@ -43,102 +132,160 @@ def singularize(card_name: str) -> str:
         return card_name[:-1]       # e.g. "coppers" -> "copper"
     return card_name
 
+# Verb -> (action type, whether the rest of the event names cards)
+_VERB_ACTIONS = {
+    "draws": (ActionType.DRAW, True),
+    "plays": (ActionType.PLAY, True),
+    # Discard from hand or played? We'll assume hand for now
+    "discards": (ActionType.DISCARD_HAND, True),
+    # Shuffle means move discard to deck, no cards involved
+    "shuffles": (ActionType.SHUFFLE, False),
+    "buys and gains": (ActionType.GAIN, True),
+    "gains": (ActionType.GAIN, True),
+    "trashes": (ActionType.TRASH, True),
+    "ends": (ActionType.END_TURN, False),
+    "topdecks": (ActionType.TOPDECK, True),
+    "sets aside": (ActionType.SET_ASIDE, True),
+    "returns": (ActionType.RETURN_TO_SUPPLY, True),
+    "exiles": (ActionType.TO_MAT, True),
+    # Where the cards go is in the rest of the event ("into their hand", "on their Island mat")
+    "puts": (None, True),
+}
+# Word after "their" in "from/into/onto/on their ..." -> pile
+_PLACES = {"hand": "hand", "deck": "deck", "discard": "discard", "mat": "mats"}
+# Pile a card is put into -> action type of "puts"
+_PUT_ACTIONS = {"hand": ActionType.PUT_IN_HAND, "deck": ActionType.TOPDECK,
+                "discard": ActionType.DISCARD_HAND, "mats": ActionType.TO_MAT}
+# Verb -> number of tokens it spans, to find where the card names start in Event.tokens
+_VERB_TOKENS = {verb: len(verb.split()) for verb in _VERB_ACTIONS}
+_VERB_RE = re.compile(r"\s+(" + "|".join(re.escape(verb) for verb in _VERB_ACTIONS) + r")\b")
+
+
 class Parser:
+    """Turns events into Actions.
+
+    Card effects from the card table (see dominion_tracker.effects) pick the piles of
+    moves made while a card is the last one played at the table; an explicit
+    "from/into/onto their ..." in the event wins over both.
+    """
 
-    def __init__(self, player_id: str, card_csv_path: str = "cards/dominion_cards.csv", max_card_words: int = 3):
+    def __init__(self, player_id: str, card_csv_path: str = "cards/dominion_cards.csv",
+                 max_card_words: Optional[int] = None, matcher: Optional[CardMatcher] = None,
+                 player_ids: Optional[tuple[str, ...]] = None, effects: Optional[EffectTable] = None):
         self.player_id = player_id
-        self.max_card_words = max_card_words
-        path = Path(card_csv_path)
-        self.valid_card_names = self._load_card_names(path)
-
-    
-    def _load_card_names(self, path: Path) -> dict:
-        card_names = {}
-        with open(path, newline='', encoding='utf-8') as csvfile:
-            reader = csv.reader(csvfile)
-            next(reader, None)  # Skip header
-            for row in reader:
-                if not row:
-                    continue
-                name = row[0].strip()
-                if name:
-                    card_names[name.lower()] = name
-        return card_names
+        self.player_ids = player_ids or (player_id,)
+        if effects is None:
+            # A matcher passed in may not come from a card CSV, so there are no effects to load
+            effects = EffectTable.shared(card_csv_path) if matcher is None else EffectTable()
+        if matcher is None:
+            matcher = CardMatcher.shared(card_csv_path, max_card_words=max_card_words)
+        self.matcher = matcher
+        self.effects = effects
+        self.max_card_words = matcher.max_card_words
+        self.valid_card_names = matcher.card_names
+        # Player id -> number of tokens it spans (normally 1)
+        self._id_tokens = {pid: len(tokenize(pid.lower())) for pid in self.player_ids}
+        # Last card played at the table this turn, whose effect hints are in force
+        self.last_played: Optional[str] = None
+        # (player, action type) pairs that last_played's hints already routed a move of
+        self._hinted: Set[Tuple[str, ActionType]] = set()
 
     def parse_event(self, event: str) -> Optional[Action]:
         """Parse a full event string into an Action for the specified player, or None."""
         
         if not event.startswith(self.player_id):
+            self._observe(event)
             return None
 
-        text = event.lower()
-
-        cards = self.extract_cards(text)
+        return self._parse_action(self.player_id, event)
 
-        # Determine action type from keywords
-        if "draws" in text:
-            return Action(ActionType.DRAW, cards)
+    def parse_table_event(self, event: str) -> Optional[Action]:
+        """Parse an event for whichever tracked player it starts with, or None."""
+        player_id = event.split(" ", 1)[0]
+        if player_id not in self.player_ids:
+            if player_id == "Turn":
+                self.last_played = None
+            return None
 
-        if "plays" in text:
-            return Action(ActionType.PLAY, cards)
+        return self._parse_action(player_id, event)
 
-        if "discards" in text:
-            # Discard from hand or played? We'll assume hand for now
-            return Action(ActionType.DISCARD_HAND, cards)
+    def _observe(self, event: str) -> None:
+        """Follow the plays and turn ends of other players, whose cards' effects reach this one."""
+        if event.startswith("Turn"):
+            self.last_played = None
+        elif self.effects.hints and event.startswith(self.player_ids) and (" plays " in event or event.endswith(" ends turn")):
+            player_id = event.split(" ", 1)[0]
+            if player_id in self.player_ids:
+                self._parse_action(player_id, event)
 
-        if "shuffles" in text:
-            # Shuffle means move discard to deck, cards param empty (usually)
-            return Action(ActionType.SHUFFLE, [])
+    def _parse_action(self, player_id: str, event: str) -> Optional[Action]:
+        # Classify the verb right after the player id before touching the rest of the text
+        match = _VERB_RE.match(event, len(player_id))
+        if match is None:
+            return None
 
-        if "buys and gains" in text or "gains" in text:
-            return Action(ActionType.GAIN, cards)
-        
-        if "trashes" in text:
-            return Action(ActionType.TRASH, cards)
-        
-        if "ends" in text:
-            return Action(ActionType.END_TURN, [])
+        verb = match.group(1)
+        action_type, has_cards = _VERB_ACTIONS[verb]
+        if not has_cards:
+            if action_type is ActionType.END_TURN:
+                self.last_played = None
+            return Action(action_type, [], player_id)
+        if isinstance(event, Event):
+            # Reuse the event's tokens, skipping the player id and the verb
+            tokens = event.tokens[self._id_tokens[player_id] + _VERB_TOKENS[verb]:]
+        else:
+            tokens = tokenize(event[match.end():].lower())
 
-        return None
+        source = target = None
+        if "their" in tokens:
+            # "... from their hand", "... onto their deck", "... on their Native Village mat"
+            cut = tokens.index("their")
+            place = next((_PLACES[token] for token in tokens[cut + 1:] if token in _PLACES), None)
+            if cut and tokens[cut - 1] == "from":
+                source = place
+            else:
+                target = place
+            tokens = tokens[:cut - 1] if cut else []
+        if action_type is None:
+            # "puts": the destination decides the kind of move
+            action_type = _PUT_ACTIONS.get(target)
+            if action_type is None:
+                return None
+            target = None
 
+        cards = self.match_cards(tokens)
+        if action_type is ActionType.PLAY:
+            if cards:
+                self.last_played = cards[-1]
+                self._hinted.clear()
+        elif self.last_played is not None and verb != "buys and gains":
+            # A hint routes one move of its kind per player, so "P1 gains a Silver" after
+            # a Mine's gain, or a later discard after a Bandit's, uses the default piles
+            hint_source, hint_target = self.effects.piles(action_type, self.last_played)
+            if (hint_source and not source) or (hint_target and not target):
+                hinted = (player_id, action_type)
+                if hinted not in self._hinted:
+                    self._hinted.add(hinted)
+                    source = source or hint_source
+                    target = target or hint_target
+        return Action(action_type, cards, player_id, source, target)
 
     def extract_cards(self, text: str) -> List[str]:
         """Extract card names (single or multi-word) from text using known card name list."""
+        return self.match_cards(tokenize(text))
 
-        # Normalize input
-        clean_text = re.sub(r"\(\+\$.*?\)", "", text)
-        clean_text = re.sub(r"[.,]", " ", clean_text)
-        tokens = clean_text.split()
-
-        for i in range(len(tokens)):
-            tokens[i] = singularize(tokens[i])
-
-        result = []
-        i = 0
-        while i < len(tokens):
-
-            # Handle leading numeric count
-            if tokens[i].isdigit():
-                count = int(tokens[i])
-                i += 1
-            else:
-                count = 1
-
-            # Try to match up to 3-word card names (greedy)
-            matched = False
-            for span in range(self.max_card_words, 0, -1):
-                if i + span <= len(tokens):
-                    candidate = " ".join(tokens[i:i + span])
-                    if candidate in self.valid_card_names:
-                        result.extend([self.valid_card_names[candidate]] * count)
-                        i += span
-                        matched = True
-                        break
-
-            if not matched:
-                i += 1  # Skip unrecognized token
-
-        return result
-    
+    def match_cards(self, tokens: List[str]) -> List[str]:
+        """Card names in already tokenized, lowercased text."""
+        return self.matcher.match_tokens(tokens)
 
+    def instrument(self, stats: Optional["Stats"]) -> None:
+        """Time parse_event/parse_table_event and extract_cards into stats; None removes the timers.
 
+        parse_event time includes the extract_cards time of the same event.
+        """
+        for name in ("parse_event", "parse_table_event", "match_cards"):
+            self.__dict__.pop(name, None)
+        if stats is not None:
+            self.parse_event = stats.timed("parse_event", self.parse_event)
+            self.parse_table_event = stats.timed("parse_event", self.parse_table_event)
+            self.match_cards = stats.timed("extract_cards", self.match_cards)
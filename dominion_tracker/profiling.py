@@ -0,0 +1,133 @@
+from collections import Counter
+from time import perf_counter_ns
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO, TypeVar
+import sys
+
+T = TypeVar("T")
+
+
+class Histogram:
+    """Latency histogram with power-of-two nanosecond buckets.
+
+    Bucket b counts samples in [2**(b-1), 2**b) ns, so adding a sample is one
+    int.bit_length() and a list increment.
+    """
+
+    __slots__ = ("buckets", "count", "total_ns")
+
+    def __init__(self):
+        self.buckets: List[int] = [0] * 64
+        self.count = 0
+        self.total_ns = 0
+
+    def add(self, ns: int) -> None:
+        self.buckets[ns.bit_length()] += 1
+        self.count += 1
+        self.total_ns += ns
+
+    def percentile(self, p: float) -> int:
+        """Upper bound in ns of the bucket holding the p-th percentile (0 < p <= 100)."""
+        target = self.count * p / 100
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= target:
+                return 1 << bucket
+        return 0
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "count": self.count,
+            "mean_us": round(self.total_ns / self.count / 1000, 3) if self.count else 0.0,
+            "p50_us": self.percentile(50) / 1000,
+            "p99_us": self.percentile(99) / 1000,
+            # upper bound of each non-empty bucket -> samples
+            "buckets_us": {(1 << b) / 1000: n for b, n in enumerate(self.buckets) if n},
+        }
+
+
+class Stats:
+    """Opt-in counters and timings for a replay.
+
+    Nothing here runs unless a Stats object is attached with GameEngine.instrument,
+    TableEngine.instrument or Parser.instrument, so an uninstrumented replay pays nothing.
+    """
+
+    def __init__(self):
+        self.actions: Counter = Counter()
+        self.latency: Dict[str, Histogram] = {}
+        self.invalid_moves: Counter = Counter()
+        self.invalid_by_action: Counter = Counter()
+        # stage -> [calls, total ns]
+        self.stages: Dict[str, List[int]] = {}
+
+    def record_action(self, action_type: str, ns: int) -> None:
+        self.actions[action_type] += 1
+        histogram = self.latency.get(action_type)
+        if histogram is None:
+            histogram = self.latency[action_type] = Histogram()
+        histogram.add(ns)
+
+    def record_invalid(self, action_type: str, card: Optional[str]) -> None:
+        self.invalid_moves[card if card is not None else "<unknown>"] += 1
+        self.invalid_by_action[action_type] += 1
+
+    def record_stage(self, stage: str, ns: int, calls: int = 1) -> None:
+        entry = self.stages.get(stage)
+        if entry is None:
+            entry = self.stages[stage] = [0, 0]
+        entry[0] += calls
+        entry[1] += ns
+
+    def timed(self, stage: str, func: Callable[..., T]) -> Callable[..., T]:
+        """Wrap func so every call is added to `stage`."""
+        def wrapper(*args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record_stage(stage, perf_counter_ns() - start)
+        wrapper.__wrapped__ = func
+        return wrapper
+
+    def timed_iter(self, stage: str, items: Iterable[T]) -> Iterator[T]:
+        """Yield from items, adding the time spent producing each one to `stage`."""
+        iterator = iter(items)
+        while True:
+            start = perf_counter_ns()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.record_stage(stage, perf_counter_ns() - start, calls=0)
+                return
+            self.record_stage(stage, perf_counter_ns() - start)
+            yield item
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "actions": dict(self.actions),
+            "apply_latency": {name: histogram.to_dict() for name, histogram in self.latency.items()},
+            "stages": {stage: {"calls": calls, "total_ms": round(ns / 1e6, 3),
+                               "mean_us": round(ns / calls / 1000, 3) if calls else 0.0}
+                       for stage, (calls, ns) in self.stages.items()},
+            "invalid_moves": dict(self.invalid_moves.most_common()),
+            "invalid_by_action": dict(self.invalid_by_action),
+        }
+
+    def report(self, out: TextIO = sys.stderr) -> None:
+        """Human-readable dump, one section per kind of measurement."""
+        print("== stages ==", file=out)
+        for stage, (calls, ns) in self.stages.items():
+            mean = ns / calls / 1000 if calls else 0.0
+            print(f"{stage:<16} {calls:>10,} calls {ns / 1e6:>10.2f} ms  {mean:>8.2f} us/call", file=out)
+        print("== apply latency by action ==", file=out)
+        for name, histogram in sorted(self.latency.items()):
+            mean = histogram.total_ns / histogram.count / 1000
+            print(f"{name:<22} {histogram.count:>10,}  mean {mean:>7.2f} us  "
+                  f"p50 <{histogram.percentile(50) / 1000:.2f} us  p99 <{histogram.percentile(99) / 1000:.2f} us",
+                  file=out)
+        if self.invalid_moves:
+            print("== invalid moves by card ==", file=out)
+            for card, count in self.invalid_moves.most_common():
+                print(f"{card:<22} {count:>10,}", file=out)
+        out.flush()
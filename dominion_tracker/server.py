@@ -0,0 +1,287 @@
+"""Asyncio service that tracks many live games at once.
+
+Clients connect over TCP and exchange JSON lines, one response per request, in order:
+
+    {"op": "feed", "game": "g1", "players": ["O", "L"], "lines": ["Turn 1 - O", ...]}
+    {"op": "state", "game": "g1"}
+    {"op": "end", "game": "g1"}
+    {"op": "stats"}
+
+"players" is only needed on the first feed of a game. Like --follow, a game's state
+lags the fed lines by the last few events, which are held back until the next
+"Turn" line (or "end") shows how they are ordered.
+"""
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from dominion_tracker.effects import EffectTable
+from dominion_tracker.engine import TableEngine
+from dominion_tracker.matcher import DEFAULT_CARD_CSV, CardMatcher
+from dominion_tracker.parser import EventReader, Parser
+
+# Longest request line a client may send
+MAX_LINE_BYTES = 1 << 20
+# Shortest pause between idle-game sweeps, however short the idle timeout
+MIN_EVICT_INTERVAL = 0.5
+
+
+class UnknownGame(KeyError):
+    """A request named a game that is not live and did not send players to start it."""
+
+
+async def _skip_line(reader: asyncio.StreamReader) -> bool:
+    """Discard the stream up to and including the next newline; False if it ends first."""
+    while True:
+        try:
+            await reader.readuntil(b"\n")
+            return True
+        except asyncio.LimitOverrunError as e:
+            await reader.readexactly(e.consumed)
+        except asyncio.IncompleteReadError:
+            return False
+
+
+class GameSession:
+    """Reader, parser and engine of one live game."""
+
+    __slots__ = ("game_id", "player_ids", "parser", "engine", "reader", "last_seen", "actions")
+
+    def __init__(self, game_id: str, player_ids: tuple, matcher: CardMatcher, now: float = 0.0,
+                 effects: Optional[EffectTable] = None):
+        self.game_id = game_id
+        self.player_ids = player_ids
+        self.parser = Parser(player_ids[0], matcher=matcher, player_ids=player_ids, effects=effects)
+        self.engine = TableEngine(player_ids)
+        self.reader = EventReader(player_ids)
+        self.last_seen = now
+        self.actions = 0
+
+    def _apply(self, events: Iterable[str]) -> int:
+        applied = 0
+        parse = self.parser.parse_table_event
+        for event_text in events:
+            action = parse(event_text)
+            if action:
+                self.engine.apply(action)
+                applied += 1
+        self.actions += applied
+        return applied
+
+    def feed(self, lines: Iterable[str]) -> int:
+        """Feed raw log lines; returns the number of actions applied."""
+        feed = self.reader.feed
+        return sum(self._apply(feed(line)) for line in lines)
+
+    def close(self) -> int:
+        """Apply the events still held back by the reader."""
+        return self._apply(self.reader.close())
+
+    def state(self) -> Dict[str, Dict[str, Dict[str, int]]]:
+        return self.engine.summary()
+
+
+class GamePool:
+    """Live games by id, bounded to `max_games`, in least recently used order.
+
+    A new game beyond the bound evicts the least recently used one, and evict_idle()
+    drops games not touched for `idle_timeout` seconds. Both pop from the old end of
+    the OrderedDict, so eviction costs O(evicted games).
+    """
+
+    def __init__(self, max_games: int = 10000, idle_timeout: float = 600.0,
+                 matcher: Optional[CardMatcher] = None, clock: Callable[[], float] = time.monotonic,
+                 effects: Optional[EffectTable] = None):
+        self.max_games = max_games
+        self.idle_timeout = idle_timeout
+        self.matcher = matcher if matcher is not None else CardMatcher.shared(DEFAULT_CARD_CSV)
+        if effects is None and matcher is None:
+            effects = EffectTable.shared(DEFAULT_CARD_CSV)
+        self.effects = effects
+        self.clock = clock
+        self.sessions: "OrderedDict[str, GameSession]" = OrderedDict()
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    def get(self, game_id: str, player_ids: Optional[Iterable[str]] = None) -> GameSession:
+        """The session of game_id, started with player_ids if it is new; raises UnknownGame otherwise."""
+        now = self.clock()
+        session = self.sessions.get(game_id)
+        if session is None:
+            if not player_ids:
+                raise UnknownGame(game_id)
+            session = GameSession(game_id, tuple(player_ids), self.matcher, now, self.effects)
+            self.sessions[game_id] = session
+            while len(self.sessions) > self.max_games:
+                self.sessions.popitem(last=False)
+                self.evicted += 1
+        else:
+            self.sessions.move_to_end(game_id)
+            session.last_seen = now
+        return session
+
+    def remove(self, game_id: str) -> Optional[GameSession]:
+        return self.sessions.pop(game_id, None)
+
+    def evict_idle(self) -> int:
+        """Drop games idle for longer than idle_timeout; returns how many were dropped."""
+        deadline = self.clock() - self.idle_timeout
+        dropped = 0
+        while self.sessions:
+            session = next(iter(self.sessions.values()))
+            if session.last_seen > deadline:
+                break
+            self.sessions.popitem(last=False)
+            dropped += 1
+        self.evicted += dropped
+        return dropped
+
+
+def _is_str_list(value: Any) -> bool:
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+def _invalid_fields(request: Dict[str, Any]) -> Optional[str]:
+    """Why a game request's fields have the wrong types, or None if they are fine."""
+    if "game" not in request:
+        return "Missing 'game'"
+    if not isinstance(request["game"], str):
+        return "'game' must be a string"
+    if request.get("players") is not None and not _is_str_list(request["players"]):
+        return "'players' must be a list of strings"
+    if "lines" in request and not _is_str_list(request["lines"]):
+        return "'lines' must be a list of strings"
+    return None
+
+
+class GameServer:
+    """JSON-lines front end of a GamePool."""
+
+    def __init__(self, pool: GamePool):
+        self.pool = pool
+        self.requests = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._evictor: Optional[asyncio.Task] = None
+        self._ops = {"feed": self._feed, "state": self._state, "end": self._end, "stats": self._stats}
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Answer one request; errors are reported in the response rather than raised."""
+        self.requests += 1
+        name = request.get("op")
+        op = self._ops.get(name) if isinstance(name, str) else None
+        if op is None:
+            return {"ok": False, "error": f"Unknown op: {name!r}"}
+        if op != self._stats:
+            error = _invalid_fields(request)
+            if error is not None:
+                return {"ok": False, "error": error}
+        try:
+            return op(request)
+        except UnknownGame as e:
+            return {"ok": False, "error": f"Unknown game {e.args[0]!r}; send players to start it"}
+
+    def _feed(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        session = self.pool.get(request["game"], request.get("players"))
+        return {"ok": True, "actions": session.feed(request.get("lines", ()))}
+
+    def _state(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        return {"ok": True, "state": self.pool.get(request["game"]).state()}
+
+    def _end(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        session = self.pool.get(request["game"])
+        session.close()
+        self.pool.remove(session.game_id)
+        return {"ok": True, "state": session.state()}
+
+    def _stats(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        return {"ok": True, "games": len(self.pool), "evicted": self.pool.evicted, "requests": self.requests}
+
+    async def _client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b"\n")
+                except asyncio.IncompleteReadError as e:
+                    line = e.partial
+                except asyncio.LimitOverrunError:
+                    # Drop the over-long line but keep the connection for the requests after it
+                    if not await _skip_line(reader):
+                        break
+                    writer.write(json.dumps({"ok": False, "error": "Request line is over the size limit"}).encode("utf-8") + b"\n")
+                    await writer.drain()
+                    continue
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except ValueError as e:
+                    response = {"ok": False, "error": f"Invalid JSON: {e}"}
+                else:
+                    if isinstance(request, dict):
+                        response = self.handle(request)
+                    else:
+                        response = {"ok": False, "error": "Request must be a JSON object"}
+                writer.write(json.dumps(response).encode("utf-8") + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _evict_idle_games(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            self.pool.evict_idle()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765,
+                    evict_interval: float = 10.0, limit: int = MAX_LINE_BYTES) -> asyncio.AbstractServer:
+        """Start listening; idle games are evicted every evict_interval seconds while it runs.
+
+        Request lines longer than limit bytes are answered with an error and skipped.
+        """
+        self._server = await asyncio.start_server(self._client, host, port, limit=limit)
+        self._evictor = asyncio.get_running_loop().create_task(self._evict_idle_games(evict_interval))
+        return self._server
+
+    def close(self) -> None:
+        if self._evictor is not None:
+            self._evictor.cancel()
+        if self._server is not None:
+            self._server.close()
+
+
+async def serve(host: str, port: int, pool: GamePool, evict_interval: float = 10.0,
+                ready: Optional[Callable[[str, int], None]] = None) -> None:
+    game_server = GameServer(pool)
+    server = await game_server.start(host, port, evict_interval=evict_interval)
+    if ready is not None:
+        ready(*server.sockets[0].getsockname()[:2])
+    try:
+        await server.serve_forever()
+    finally:
+        game_server.close()
+
+
+def serve_main(argv: Optional[List[str]] = None) -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="dominion-tracker serve")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port (0 picks a free one)")
+    parser.add_argument("--max-games", type=int, default=10000, help="Live games kept before the least recently used is dropped")
+    parser.add_argument("--idle-timeout", type=float, default=600.0, help="Seconds without requests before a game is dropped")
+    args = parser.parse_args(argv)
+
+    pool = GamePool(max_games=args.max_games, idle_timeout=args.idle_timeout)
+
+    def ready(host: str, port: int) -> None:
+        print(f"serving on {host}:{port}", flush=True)
+
+    try:
+        asyncio.run(serve(args.host, args.port, pool, evict_interval=max(MIN_EVICT_INTERVAL, min(10.0, args.idle_timeout)), ready=ready))
+    except KeyboardInterrupt:
+        pass
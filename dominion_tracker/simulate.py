@@ -0,0 +1,271 @@
+"""Monte Carlo solitaire games played through GameEngine to compare buy policies.
+
+simulate_game plays one game as the Actions a log of it would hold (DRAW, PLAY,
+GAIN, END_TURN, SHUFFLE), applied by a GameEngine over a CompactPlayerState, so
+every pile is an array of counts and no card is a Python object. Drawing a
+uniformly random card from the deck's counts is the same as drawing the top card
+of a shuffled deck, so a SHUFFLE only moves the discard pile back. Each game's
+random.Random is seeded from (seed, game number), which fixes every draw.
+
+Costs and types come from the card table. What a card does when played is not in
+it, so PLAY_EFFECTS lists the treasures and the plain kingdom cards a policy may buy.
+"""
+import random
+import sys
+from abc import ABC, abstractmethod
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+
+from dominion_tracker.effects import CardInfo, EffectTable
+from dominion_tracker.engine import Action, ActionType, GameEngine
+from dominion_tracker.matcher import DEFAULT_CARD_CSV
+from dominion_tracker.state import CardIndex, CompactPlayerState
+
+STARTING_DECK = {"Copper": 7, "Estate": 3}
+HAND_SIZE = 5
+
+# Card -> (+cards, +actions, +buys, +coins) when played
+PLAY_EFFECTS: Dict[str, Tuple[int, int, int, int]] = {
+    "Copper": (0, 0, 0, 1),
+    "Silver": (0, 0, 0, 2),
+    "Gold": (0, 0, 0, 3),
+    "Platinum": (0, 0, 0, 5),
+    "Moat": (2, 0, 0, 0),
+    "Village": (1, 2, 0, 0),
+    "Smithy": (3, 0, 0, 0),
+    "Laboratory": (2, 1, 0, 0),
+    "Market": (1, 1, 1, 1),
+    "Festival": (0, 2, 1, 2),
+    "Council Room": (4, 0, 1, 0),
+    "Bazaar": (1, 2, 0, 1),
+}
+TREASURES = frozenset(("Copper", "Silver", "Gold", "Platinum"))
+# Action cards in the order they are played: villages first, so the draws that follow can still be played
+ACTION_ORDER = sorted((card for card in PLAY_EFFECTS if card not in TREASURES),
+                      key=lambda card: (PLAY_EFFECTS[card][1], PLAY_EFFECTS[card][0]), reverse=True)
+
+# Preset name -> policy spec, see PriorityPolicy.from_spec
+POLICIES = {
+    "big_money": "Province,Gold,Silver",
+    "smithy": "Province,Gold,Smithy:1,Silver",
+    "double_smithy": "Province,Gold,Smithy:2,Silver",
+    "laboratory": "Province,Gold,Laboratory,Silver",
+    "council_room": "Province,Gold,Council Room:1,Silver",
+}
+
+
+class BuyPolicy(ABC):
+    """Picks the card to gain with each buy; subclass it and implement choose()."""
+
+    @abstractmethod
+    def choose(self, coins: int, turn: int, gained: Mapping[str, int]) -> Optional[str]:
+        """Card to buy with `coins`, or None to stop buying; `gained` counts the cards bought so far."""
+
+
+class PriorityPolicy(BuyPolicy):
+    """Buys the first affordable card of a priority list that is under its limit."""
+
+    __slots__ = ("rules",)
+
+    def __init__(self, rules: List[Tuple[str, int, Optional[int]]]):
+        # (card, cost, most copies to buy or None for no limit), best first
+        self.rules = rules
+
+    @classmethod
+    def from_spec(cls, spec: str, cards: Mapping[str, CardInfo]) -> "PriorityPolicy":
+        """Parse "Province,Gold,Smithy:1,Silver" (or a POLICIES name) against the card table."""
+        spec = POLICIES.get(spec, spec)
+        rules = []
+        for item in filter(None, (part.strip() for part in spec.split(","))):
+            card, _, limit = item.partition(":")
+            card = card.strip()
+            info = cards.get(card)
+            if info is None or info.cost is None:
+                raise ValueError(f"Unknown card or cost in policy: {card!r}")
+            if info.has_type("Action") and card not in PLAY_EFFECTS:
+                raise ValueError(f"The simulator cannot play {card!r}")
+            rules.append((card, info.cost, int(limit) if limit else None))
+        if not rules:
+            raise ValueError(f"Empty policy: {spec!r}")
+        return cls(rules)
+
+    def choose(self, coins: int, turn: int, gained: Mapping[str, int]) -> Optional[str]:
+        for card, cost, limit in self.rules:
+            if cost <= coins and (limit is None or gained.get(card, 0) < limit):
+                return card
+        return None
+
+
+def _draw(engine: GameEngine, state: CompactPlayerState, rng: random.Random, count: int) -> None:
+    """Draw `count` random cards from the deck, shuffling the discard pile in when it runs out."""
+    names = state.index.names
+    while count:
+        deck = state.deck.tolist()
+        left = sum(deck)
+        if not left:
+            if not any(state.discard):
+                return
+            engine.apply(Action(ActionType.SHUFFLE, []))
+            continue
+        drawn = []
+        for _ in range(min(count, left)):
+            pick = rng.randrange(left)
+            card_id = 0
+            while pick >= deck[card_id]:
+                pick -= deck[card_id]
+                card_id += 1
+            deck[card_id] -= 1
+            left -= 1
+            drawn.append(names[card_id])
+        engine.apply(Action(ActionType.DRAW, drawn))
+        count -= len(drawn)
+
+
+def simulate_game(policy: BuyPolicy, cards: Mapping[str, CardInfo], provinces: int = 4,
+                  seed: int = 0, max_turns: int = 50) -> Tuple[Optional[int], int]:
+    """Play one game until `provinces` Provinces are bought.
+
+    Returns (turn the last one was bought or None if max_turns ran out, turns played).
+    """
+    rng = random.Random(seed)
+    index = CardIndex(STARTING_DECK)
+    state = CompactPlayerState(index)
+    engine = GameEngine(STARTING_DECK, state=state)
+    names, ids = index.names, index.ids
+    gained: Dict[str, int] = {}
+    _draw(engine, state, rng, HAND_SIZE)
+
+    for turn in range(1, max_turns + 1):
+        actions, buys, coins = 1, 1, 0
+        while actions:
+            hand = state.hand
+            card = next((card for card in ACTION_ORDER if card in ids and hand[ids[card]]), None)
+            if card is None:
+                break
+            plus_cards, plus_actions, plus_buys, plus_coins = PLAY_EFFECTS[card]
+            engine.apply(Action(ActionType.PLAY, [card]))
+            actions += plus_actions - 1
+            buys += plus_buys
+            coins += plus_coins
+            if plus_cards:
+                _draw(engine, state, rng, plus_cards)
+
+        treasures = []
+        for card_id, count in enumerate(state.hand):
+            if count and names[card_id] in TREASURES:
+                treasures.extend([names[card_id]] * count)
+                coins += PLAY_EFFECTS[names[card_id]][3] * count
+        if treasures:
+            engine.apply(Action(ActionType.PLAY, treasures))
+
+        for _ in range(buys):
+            card = policy.choose(coins, turn, gained)
+            if card is None:
+                break
+            engine.apply(Action(ActionType.GAIN, [card]))
+            coins -= cards[card].cost
+            gained[card] = gained.get(card, 0) + 1
+        if gained.get("Province", 0) >= provinces:
+            return turn, turn
+
+        engine.apply(Action(ActionType.END_TURN, []))
+        _draw(engine, state, rng, HAND_SIZE)
+    return None, max_turns
+
+
+def _simulate_chunk(start: int, stop: int, spec: str, provinces: int, seed: int, max_turns: int,
+                    card_csv_path: str) -> Tuple[Counter, int]:
+    cards = EffectTable.shared(card_csv_path).cards
+    policy = PriorityPolicy.from_spec(spec, cards)
+    finished: Counter = Counter()
+    turns = 0
+    for game in range(start, stop):
+        # A distinct stream per game, so the result does not depend on the chunking
+        finish, played = simulate_game(policy, cards, provinces, seed * 2 ** 32 + game, max_turns)
+        finished[finish] += 1
+        turns += played
+    return finished, turns
+
+
+def _init_worker(card_csv_path: str) -> None:
+    # Load the card table once per worker; every chunk in this process reuses it
+    EffectTable.shared(card_csv_path)
+
+
+def _ranges(games: int, chunksize: int) -> Iterator[Tuple[int, int]]:
+    for start in range(0, games, chunksize):
+        yield start, min(start + chunksize, games)
+
+
+def simulate_many(games: int, spec: str = "big_money", provinces: int = 4, seed: int = 0,
+                  max_turns: int = 50, workers: Optional[int] = None, chunksize: int = 1000,
+                  card_csv_path: str = str(DEFAULT_CARD_CSV)) -> Tuple[Counter, int]:
+    """Simulate `games` games in a process pool.
+
+    Returns (Counter of finishing turn -> games, None counting the unfinished ones, turns played).
+    """
+    # Fail on a bad spec here rather than once per chunk in the workers
+    PriorityPolicy.from_spec(spec, EffectTable.shared(card_csv_path).cards)
+    finished: Counter = Counter()
+    turns = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(card_csv_path,)) as pool:
+        futures = [pool.submit(_simulate_chunk, start, stop, spec, provinces, seed, max_turns, card_csv_path)
+                   for start, stop in _ranges(games, chunksize)]
+        for future in futures:
+            chunk, chunk_turns = future.result()
+            finished.update(chunk)
+            turns += chunk_turns
+    return finished, turns
+
+
+def summarize(finished: Mapping[Optional[int], int]) -> Dict[str, object]:
+    """Mean, percentiles and histogram of the turns the finished games took."""
+    turns = sorted(turn for turn in finished if turn is not None)
+    done = sum(finished[turn] for turn in turns)
+    summary: Dict[str, object] = {"games": done + finished.get(None, 0), "unfinished": finished.get(None, 0)}
+    if not done:
+        return summary
+
+    def percentile(fraction: float) -> int:
+        rank = max(1, round(fraction * done))
+        seen = 0
+        for turn in turns:
+            seen += finished[turn]
+            if seen >= rank:
+                return turn
+        return turns[-1]
+
+    summary["mean"] = round(sum(turn * finished[turn] for turn in turns) / done, 3)
+    for fraction in (0.1, 0.5, 0.9):
+        summary[f"p{round(fraction * 100)}"] = percentile(fraction)
+    summary["distribution"] = {str(turn): finished[turn] for turn in turns}
+    return summary
+
+
+def simulate_main(argv: Optional[List[str]] = None) -> None:
+    import argparse
+    import json
+    import time
+
+    parser = argparse.ArgumentParser(prog="dominion-tracker simulate")
+    parser.add_argument("--policy", default="big_money",
+                        help=f"Priority list such as 'Province,Gold,Smithy:1,Silver', or one of: {', '.join(POLICIES)}")
+    parser.add_argument("--games", type=int, default=10000, help="Games to simulate")
+    parser.add_argument("--provinces", type=int, default=4, help="Provinces that end a game")
+    parser.add_argument("--max-turns", type=int, default=50, help="Turns after which a game counts as unfinished")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunksize", type=int, default=1000, help="Games per submitted task")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        finished, turns = simulate_many(args.games, args.policy, args.provinces, args.seed, args.max_turns,
+                                        args.workers, args.chunksize)
+    except ValueError as e:
+        parser.error(str(e))
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"policy": POLICIES.get(args.policy, args.policy), "provinces": args.provinces,
+                      **summarize(finished)}))
+    print(f"{turns:,} turns in {elapsed:.2f}s ({turns / elapsed:,.0f} turns/s)", file=sys.stderr)
@@ -1,26 +1,112 @@
+from array import array
 from collections import defaultdict,Counter
-from typing import Dict, List
+import sys
+from typing import Callable, Dict, Iterable, List, Optional
+
+# Placeholder for a card whose identity the log does not show ("L draws 5 cards")
+UNKNOWN_CARD = "?"
+
+# Piles beyond deck/hand/discard/played; summaries only list them while they hold cards
+EXTRA_PILES = ("set_aside", "mats")
+PILES = ("deck", "hand", "discard", "played") + EXTRA_PILES
+# Pile names for the cards outside a player's piles
+OUTSIDE_PILES = ("supply", "trash")
+# Byte order of array("H") buffers, for reading a whole pile as one integer
+_BYTE_ORDER = sys.byteorder
+
 
 class InvalidCardMove(Exception):
-    """Raised when an invalid card move is attempted."""
-    pass
+    """Raised when an invalid card move is attempted; `card` names the card that was missing."""
+
+    def __init__(self, message: str, card: Optional[str] = None):
+        super().__init__(message)
+        self.card = card
 
 
 class PlayerState:
+    # Called with (pile, card, change) for every count a move changes; set by GameEngine.subscribe
+    on_change: Optional[Callable[[str, str, int], None]] = None
+
     def __init__(self):
         self.deck: Dict[str, int] = defaultdict(int)
         self.hand: Dict[str, int] = defaultdict(int)
         self.discard: Dict[str, int] = defaultdict(int)
         self.played: Dict[str, int] = defaultdict(int)
+        # Cards set aside by an effect (Library, Haven) and cards on mats (Native Village, Island, Exile)
+        self.set_aside: Dict[str, int] = defaultdict(int)
+        self.mats: Dict[str, int] = defaultdict(int)
 
-    def move_cards(self, source: Dict[str, int], target: Dict[str, int], cards: List[str], action: str = ""):
-        for card in cards:
-            if source[card] <= 0:
-                raise InvalidCardMove(f"Tried to {action} '{card}' but it's not in source pile.")
-            source[card] -= 1
-            if source[card] == 0:
-                del source[card]
-            target[card] += 1
+    def move_counts(self, source: Optional[Dict[str, int]], target: Optional[Dict[str, int]],
+                    counts: Dict[str, int], action: str = ""):
+        """Move a multiset of cards between piles; None stands for outside the tracked piles.
+
+        The whole move is validated in one pass over distinct cards before any pile changes.
+        """
+        if source is not None:
+            for card, count in counts.items():
+                if source.get(card, 0) < count:
+                    raise InvalidCardMove(f"Tried to {action} '{card}' but it's not in source pile.", card)
+            for card, count in counts.items():
+                remaining = source[card] - count
+                if remaining:
+                    source[card] = remaining
+                else:
+                    del source[card]
+        if target is not None:
+            for card, count in counts.items():
+                target[card] += count
+        if self.on_change is not None:
+            self._report_move(source, target, counts)
+
+    def _pile_name(self, pile: Dict[str, int]) -> str:
+        return next(name for name in PILES if getattr(self, name) is pile)
+
+    def _report_move(self, source, target, counts) -> None:
+        on_change = self.on_change
+        if source is not None:
+            name = self._pile_name(source)
+            for card, count in counts.items():
+                on_change(name, card, -count)
+        if target is not None:
+            name = self._pile_name(target)
+            for card, count in counts.items():
+                on_change(name, card, count)
+
+    def _counts(self, cards: List[str]) -> Dict[str, int]:
+        counts = Counter(cards)
+        # Only HiddenPlayerState follows cards the log does not name; here they move nothing
+        counts.pop(UNKNOWN_CARD, None)
+        return counts
+
+    def move_cards(self, source: Optional[Dict[str, int]], target: Optional[Dict[str, int]], cards: List[str], action: str = ""):
+        self.move_counts(source, target, self._counts(cards), action)
+
+    def move_between(self, source_name: Optional[str], target_name: Optional[str], cards: List[str], action: str = ""):
+        """move_cards by pile name; None, "supply" and "trash" stand for outside the tracked piles."""
+        source = None if source_name is None or source_name in OUTSIDE_PILES else getattr(self, source_name)
+        target = None if target_name is None or target_name in OUTSIDE_PILES else getattr(self, target_name)
+        self.move_cards(source, target, cards, action)
+
+    def has_cards(self, pile_name: str, cards: List[str]) -> bool:
+        pile = getattr(self, pile_name)
+        return all(pile.get(card, 0) >= count for card, count in self._counts(cards).items())
+
+    def move_whole_pile(self, source_name: str, target_name: str):
+        """Move every card from one pile to another in O(distinct cards)."""
+        source = getattr(self, source_name)
+        target = getattr(self, target_name)
+        if self.on_change is not None:
+            for card, count in source.items():
+                self.on_change(source_name, card, -count)
+                self.on_change(target_name, card, count)
+        if not target:
+            # Target is empty: swapping the two piles is a complete move
+            setattr(self, target_name, source)
+            setattr(self, source_name, target)
+            return
+        for card, count in source.items():
+            target[card] += count
+        source.clear()
 
     def move_from_hand_to_played(self, cards: List[str]):
         self.move_cards(self.hand, self.played, cards, action="play")
@@ -41,42 +127,374 @@ class PlayerState:
         self.move_cards(self.played, self.discard, cards, action="discard")
     
     def move_whole_discard_to_deck(self):
-        discard = list([k for k,v in self.discard.items() for _ in range(v)])
-        self.move_from_discard_to_deck(discard)
-    
+        self.move_whole_pile("discard", "deck")
+
     def move_whole_hand_to_discard(self):
-        hand = list([k for k,v in self.hand.items() for _ in range(v)])
-        self.move_from_hand_to_discard(hand)
-    
+        self.move_whole_pile("hand", "discard")
+
     def move_whole_played_to_discard(self):
-        played = list([k for k,v in self.played.items() for _ in range(v)])
-        self.move_from_played_to_discard(played)
-    
+        self.move_whole_pile("played", "discard")
+
+    def add_to_deck(self, counts: Dict[str, int]):
+        self.move_counts(None, self.deck, counts)
+
     def gain_cards(self, cards: List[str]):
         # Cards are gained from outside the tracked piles
-        synthetic_source = Counter(cards)
-        self.move_cards(synthetic_source, self.discard, cards, action="gain")
+        self.move_cards(None, self.discard, cards, action="gain")
 
     def trash_cards(self, cards: List[str]):
         # Cards are trashed out of the game; destination is ignored
-        synthetic_trash = defaultdict(int)
-        self.move_cards(self.hand, synthetic_trash, cards, action="trash")
+        self.move_cards(self.hand, None, cards, action="trash")
+
+    def load_summary(self, summary: Dict[str, Dict[str, int]]):
+        """Replace every pile with the counts from a summary() snapshot."""
+        for pile in PILES:
+            setattr(self, pile, defaultdict(int, summary.get(pile, {})))
 
     def summary(self):
-        return {
+        summary = {
             "deck": dict(self.deck),
             "hand": dict(self.hand),
             "discard": dict(self.discard),
             "played": dict(self.played)   
         }
+        for pile in EXTRA_PILES:
+            cards = getattr(self, pile)
+            if cards:
+                summary[pile] = dict(cards)
+        return summary
     
     def total_cards(self):
-        total = Counter()
-        for pile in [self.deck, self.hand, self.discard, self.played]:
-            total.update(pile)
-        return dict(total)
+        # Copy the deck, usually the biggest pile, then add the others; Counter.update
+        # would check each pile's type and only copies into an empty Counter
+        total = dict(self.deck)
+        get = total.get
+        for pile in PILES[1:]:
+            for card, count in getattr(self, pile).items():
+                total[card] = get(card, 0) + count
+        return total
     
     def __repr__(self):
         return f"Deck: {dict(self.deck)}, Hand: {dict(self.hand)}, Discard: {dict(self.discard)}, In Play: {dict(self.played)}"
 
 
+
+
+class HiddenPlayerState(PlayerState):
+    """PlayerState for a player whose draws may be hidden.
+
+    Hidden draws take no specific cards out of the deck. They add UNKNOWN_CARD
+    entries to the hand and bump `unresolved`, so the deck counts become the
+    candidate multiset those unknown cards were drawn from. When a card is later
+    revealed from hand (played, discarded, trashed) and there is no known copy in
+    hand, one unknown card is resolved to it and one candidate is removed from the
+    deck. Unknown cards that reach the discard pile are resolved in bulk by the next
+    shuffle, which puts them back into the deck they were counted in.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.unresolved = 0
+
+    def _counts(self, cards: List[str]) -> Dict[str, int]:
+        return Counter(cards)
+
+    def move_counts(self, source: Optional[Dict[str, int]], target: Optional[Dict[str, int]],
+                    counts: Dict[str, int], action: str = ""):
+        if source is self.hand and source.get(UNKNOWN_CARD, 0):
+            counts = self._resolve_from_hand(counts, action)
+        super().move_counts(source, target, counts, action)
+
+    def _resolve_from_hand(self, counts: Dict[str, int], action: str) -> Dict[str, int]:
+        """Turn unknown hand cards into the revealed cards that are missing from hand."""
+        hand, deck = self.hand, self.deck
+        resolved: Dict[str, int] = {}
+        for card, count in counts.items():
+            if card == UNKNOWN_CARD:
+                continue
+            missing = count - hand.get(card, 0)
+            if missing > 0:
+                if deck.get(card, 0) < missing:
+                    raise InvalidCardMove(f"Tried to {action} '{card}' but it's not in source pile.", card)
+                resolved[card] = missing
+        needed = sum(resolved.values()) + counts.get(UNKNOWN_CARD, 0)
+        if needed > hand.get(UNKNOWN_CARD, 0):
+            raise InvalidCardMove(f"Tried to {action} {needed} unknown cards but only {hand.get(UNKNOWN_CARD, 0)} are in hand.",
+                                  UNKNOWN_CARD)
+
+        for card, count in resolved.items():
+            deck[card] -= count
+            if not deck[card]:
+                del deck[card]
+            hand[card] += count
+            hand[UNKNOWN_CARD] -= count
+            self.unresolved -= count
+            if self.on_change is not None:
+                self.on_change("deck", card, -count)
+                self.on_change("hand", card, count)
+                self.on_change("hand", UNKNOWN_CARD, -count)
+        if not hand[UNKNOWN_CARD]:
+            del hand[UNKNOWN_CARD]
+        return counts
+
+    def move_from_deck_to_hand(self, cards: List[str]):
+        counts = Counter(cards)
+        hidden = counts.pop(UNKNOWN_CARD, 0)
+        if hidden:
+            available = sum(self.deck.values()) - self.unresolved - sum(counts.values())
+            if hidden > available:
+                raise InvalidCardMove(f"Tried to draw {hidden} unknown cards but only {available} are in the deck.", UNKNOWN_CARD)
+        self.move_counts(self.deck, self.hand, counts, action="draw")
+        if hidden:
+            self.hand[UNKNOWN_CARD] += hidden
+            self.unresolved += hidden
+            if self.on_change is not None:
+                self.on_change("hand", UNKNOWN_CARD, hidden)
+
+    def move_between(self, source_name: Optional[str], target_name: Optional[str], cards: List[str], action: str = ""):
+        if source_name == "deck" and target_name == "hand":
+            # Cards put into hand from the deck may be hidden, like draws
+            self.move_from_deck_to_hand(cards)
+        else:
+            super().move_between(source_name, target_name, cards, action)
+
+    def move_whole_discard_to_deck(self):
+        # Unknown discards were never taken out of the deck counts
+        unknown = self.discard.pop(UNKNOWN_CARD, 0)
+        self.unresolved -= unknown
+        if unknown and self.on_change is not None:
+            self.on_change("discard", UNKNOWN_CARD, -unknown)
+        super().move_whole_discard_to_deck()
+
+    def load_summary(self, summary: Dict[str, Dict[str, int]]):
+        super().load_summary(summary)
+        self.unresolved = sum(getattr(self, pile).get(UNKNOWN_CARD, 0) for pile in PILES if pile != "deck")
+
+    def total_cards(self):
+        total = super().total_cards()
+        total.pop(UNKNOWN_CARD, None)
+        return total
+
+
+class CardIndex:
+    """Interns card names as small integer ids.
+
+    Seed it with the CSV names for ids that are stable across games, or leave it
+    empty so a game only gets ids (and pile slots) for the cards it actually uses.
+    """
+
+    __slots__ = ("names", "ids")
+
+    def __init__(self, names: Iterable[str] = ()):
+        self.names: List[str] = []
+        self.ids: Dict[str, int] = {}
+        for name in names:
+            self.intern(name)
+
+    @classmethod
+    def from_csv(cls, card_csv_path: str) -> "CardIndex":
+        from dominion_tracker.matcher import load_card_names
+        return cls(load_card_names(card_csv_path).values())
+
+    def intern(self, name: str) -> int:
+        card_id = self.ids.get(name)
+        if card_id is None:
+            card_id = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return card_id
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+class CompactPlayerState:
+    """PlayerState with each pile stored as an array of counts indexed by card id."""
+
+    __slots__ = ("index", "on_change") + PILES
+
+    def __init__(self, index: Optional[CardIndex] = None):
+        self.index = index if index is not None else CardIndex()
+        self.on_change: Optional[Callable[[str, str, int], None]] = None
+        size = len(self.index)
+        self.deck = array("H", bytes(2 * size))
+        self.hand = array("H", bytes(2 * size))
+        self.discard = array("H", bytes(2 * size))
+        self.played = array("H", bytes(2 * size))
+        self.set_aside = array("H", bytes(2 * size))
+        self.mats = array("H", bytes(2 * size))
+
+    def _piles(self):
+        return (self.deck, self.hand, self.discard, self.played, self.set_aside, self.mats)
+
+    def _counts(self, cards: List[str]) -> Dict[int, int]:
+        """{card id: count} of the cards, interning only new ones; placeholders move nothing, like in PlayerState."""
+        ids = self.index.ids
+        counts: Dict[int, int] = {}
+        for card in cards:
+            card_id = ids.get(card)
+            if card_id is None:
+                if card == UNKNOWN_CARD:
+                    continue
+                card_id = self.index.intern(card)
+            counts[card_id] = counts.get(card_id, 0) + 1
+        if len(self.deck) < len(self.index):
+            self._grow()
+        return counts
+
+    def _grow(self) -> None:
+        """Give every pile a slot for each card the (possibly shared) index has interned since."""
+        padding = bytes(2 * (len(self.index) - len(self.deck)))
+        for pile in self._piles():
+            pile.frombytes(padding)
+
+    def _intern_counts(self, counts: Dict[str, int]) -> Dict[int, int]:
+        """Turn {card name: count} into {card id: count}, growing the piles for new cards."""
+        intern = self.index.intern
+        ids = {intern(card): count for card, count in counts.items()}
+        if len(self.deck) < len(self.index):
+            self._grow()
+        return ids
+
+    def move_counts(self, source: Optional[array], target: Optional[array], counts: Dict[int, int], action: str = ""):
+        """Move a count vector between piles; None stands for outside the tracked piles.
+
+        The whole move is validated before any pile changes.
+        """
+        if source is not None:
+            for card_id, count in counts.items():
+                if source[card_id] < count:
+                    card = self.index.names[card_id]
+                    raise InvalidCardMove(f"Tried to {action} '{card}' but it's not in source pile.", card)
+            for card_id, count in counts.items():
+                source[card_id] -= count
+        if target is not None:
+            for card_id, count in counts.items():
+                target[card_id] += count
+        if self.on_change is not None:
+            names = self.index.names
+            for pile, sign in ((source, -1), (target, 1)):
+                if pile is not None:
+                    name = next(name for name in PILES if getattr(self, name) is pile)
+                    for card_id, count in counts.items():
+                        self.on_change(name, names[card_id], sign * count)
+
+    def move_cards(self, source: Optional[array], target: Optional[array], cards: List[str], action: str = ""):
+        if len(cards) == 1 and self.on_change is None:
+            # Most moves are of one card that already has a slot: no count vector needed
+            card = cards[0]
+            card_id = self.index.ids.get(card)
+            if card_id is not None and card_id < len(self.deck):
+                if source is not None:
+                    if not source[card_id]:
+                        raise InvalidCardMove(f"Tried to {action} '{card}' but it's not in source pile.", card)
+                    source[card_id] -= 1
+                if target is not None:
+                    target[card_id] += 1
+                return
+        self.move_counts(source, target, self._counts(cards), action)
+
+    def move_between(self, source_name: Optional[str], target_name: Optional[str], cards: List[str], action: str = ""):
+        source = None if source_name is None or source_name in OUTSIDE_PILES else getattr(self, source_name)
+        target = None if target_name is None or target_name in OUTSIDE_PILES else getattr(self, target_name)
+        self.move_cards(source, target, cards, action)
+
+    def has_cards(self, pile_name: str, cards: List[str]) -> bool:
+        pile = getattr(self, pile_name)
+        return all(pile[card_id] >= count for card_id, count in self._counts(cards).items())
+
+    def move_whole_pile(self, source_name: str, target_name: str):
+        """Move every card from one pile to another with whole-array operations.
+
+        Both piles are read as one integer each, so adding them adds every count at
+        once; counts stay below 2**16, so no slot carries into the next.
+        """
+        source = getattr(self, source_name)
+        moved = int.from_bytes(source, _BYTE_ORDER)
+        if not moved:
+            return
+        target = getattr(self, target_name)
+        if self.on_change is not None:
+            names = self.index.names
+            for card_id, count in enumerate(source):
+                if count:
+                    self.on_change(source_name, names[card_id], -count)
+                    self.on_change(target_name, names[card_id], count)
+        held = int.from_bytes(target, _BYTE_ORDER)
+        if held:
+            size = 2 * len(source)
+            target[:] = array("H", (held + moved).to_bytes(size, _BYTE_ORDER))
+            source[:] = array("H", bytes(size))
+        else:
+            # Target is empty: swapping the two arrays is a complete move
+            setattr(self, source_name, target)
+            setattr(self, target_name, source)
+
+    def add_to_deck(self, counts: Dict[str, int]):
+        self.move_counts(None, self.deck, self._intern_counts(counts))
+
+    def move_from_hand_to_played(self, cards: List[str]):
+        self.move_cards(self.hand, self.played, cards, action="play")
+
+    def move_from_hand_to_discard(self, cards: List[str]):
+        self.move_cards(self.hand, self.discard, cards, action="discard")
+
+    def move_from_discard_to_deck(self, cards: List[str]):
+        self.move_cards(self.discard, self.deck, cards, action="shuffle")
+
+    def move_from_deck_to_hand(self, cards: List[str]):
+        self.move_cards(self.deck, self.hand, cards, action="draw")
+
+    def move_from_hand_to_deck(self, cards: List[str]):
+        self.move_cards(self.hand, self.deck, cards, action="return to deck")
+
+    def move_from_played_to_discard(self, cards: List[str]):
+        self.move_cards(self.played, self.discard, cards, action="discard")
+
+    def move_whole_discard_to_deck(self):
+        self.move_whole_pile("discard", "deck")
+
+    def move_whole_hand_to_discard(self):
+        self.move_whole_pile("hand", "discard")
+
+    def move_whole_played_to_discard(self):
+        self.move_whole_pile("played", "discard")
+
+    def gain_cards(self, cards: List[str]):
+        self.move_cards(None, self.discard, cards, action="gain")
+
+    def trash_cards(self, cards: List[str]):
+        self.move_cards(self.hand, None, cards, action="trash")
+
+    def _as_dict(self, pile: array) -> Dict[str, int]:
+        names = self.index.names
+        return {names[card_id]: count for card_id, count in enumerate(pile) if count}
+
+    def load_summary(self, summary: Dict[str, Dict[str, int]]):
+        """Replace every pile with the counts from a summary() snapshot."""
+        piles = {pile: self._intern_counts(summary.get(pile, {})) for pile in PILES}
+        for pile, counts in piles.items():
+            target = getattr(self, pile)
+            target[:] = array("H", bytes(2 * len(target)))
+            self.move_counts(None, target, counts)
+
+    def summary(self):
+        summary = {
+            "deck": self._as_dict(self.deck),
+            "hand": self._as_dict(self.hand),
+            "discard": self._as_dict(self.discard),
+            "played": self._as_dict(self.played)
+        }
+        for pile in EXTRA_PILES:
+            cards = self._as_dict(getattr(self, pile))
+            if cards:
+                summary[pile] = cards
+        return summary
+
+    def total_cards(self):
+        names = self.index.names
+        totals = [sum(counts) for counts in zip(*self._piles())]
+        return {names[card_id]: count for card_id, count in enumerate(totals) if count}
+
+    def __repr__(self):
+        summary = self.summary()
+        return f"Deck: {summary['deck']}, Hand: {summary['hand']}, Discard: {summary['discard']}, In Play: {summary['played']}"
@@ -0,0 +1,218 @@
+import re
+import sqlite3
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from dominion_tracker.engine import Action, ActionType
+from dominion_tracker.parser import GAME_HEADER
+
+_GAME_RE = re.compile(r"Game #(\d+)")
+_TURN_RE = re.compile(r"Turn (\d+)")
+_BUY = " buys and gains "
+
+# Points of the cards whose worth does not depend on the rest of the deck
+VICTORY_POINTS = {"Estate": 1, "Duchy": 3, "Province": 6, "Colony": 10, "Curse": -1}
+# Every player starts with 3 Estates
+STARTING_POINTS = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    game_id INTEGER PRIMARY KEY,
+    log_game_number INTEGER,
+    source TEXT
+);
+CREATE TABLE IF NOT EXISTS cards (
+    card_id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL
+);
+CREATE TABLE IF NOT EXISTS action_types (
+    action_type INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL
+);
+CREATE TABLE IF NOT EXISTS actions (
+    game_id INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    turn INTEGER NOT NULL,
+    player TEXT NOT NULL,
+    action_type INTEGER NOT NULL,
+    card_id INTEGER,
+    count INTEGER NOT NULL,
+    bought INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS actions_by_card ON actions (card_id, action_type);
+CREATE TABLE IF NOT EXISTS results (
+    game_id INTEGER NOT NULL,
+    player TEXT NOT NULL,
+    points INTEGER NOT NULL,
+    won INTEGER NOT NULL,
+    PRIMARY KEY (game_id, player)
+);
+"""
+
+
+class EventStore:
+    """On-disk store of parsed actions for analytics across many games.
+
+    One row per (action, distinct card) with a count, with cards and action types
+    interned as integers, e.g. Villages gained per game:
+
+        SELECT game_id, SUM(count)
+        FROM actions JOIN cards USING (card_id) JOIN action_types USING (action_type)
+        WHERE cards.name = 'Village' AND action_types.name = 'GAIN'
+        GROUP BY game_id
+
+    A gain that was bought has `bought` = 1. `results` holds every player's points
+    and whether they won (ties all win), so win rates can be set against what was
+    bought (see win_rates). Rows are buffered and written in batches of `batch_size`.
+    """
+
+    def __init__(self, path: Path, batch_size: int = 10000):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(actions)")}
+        if "bought" not in columns:
+            # Stores written before buys were told apart from other gains
+            self.conn.execute("ALTER TABLE actions ADD COLUMN bought INTEGER NOT NULL DEFAULT 0")
+        self.conn.executemany("INSERT OR IGNORE INTO action_types VALUES (?, ?)",
+                              [(t.value, t.name) for t in ActionType])
+        self.conn.commit()
+        self.card_ids: Dict[str, int] = dict(self.conn.execute("SELECT name, card_id FROM cards"))
+        self._rows: List[Tuple] = []
+
+    def __enter__(self) -> "EventStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def card_id(self, name: str) -> int:
+        card_id = self.card_ids.get(name)
+        if card_id is None:
+            # Another process may add the same card at the same time; the name stays unique either way
+            self.conn.execute("INSERT OR IGNORE INTO cards (name) VALUES (?)", (name,))
+            card_id = self.card_ids[name] = self.conn.execute(
+                "SELECT card_id FROM cards WHERE name = ?", (name,)).fetchone()[0]
+            # Don't hold the write lock until the next flush
+            self.conn.commit()
+        return card_id
+
+    def new_game(self, source: str = "", log_game_number: Optional[int] = None) -> int:
+        cursor = self.conn.execute("INSERT INTO games (log_game_number, source) VALUES (?, ?)",
+                                   (log_game_number, source))
+        self.conn.commit()
+        return cursor.lastrowid
+
+    def add(self, game_id: int, seq: int, turn: int, action: Action, bought: bool = False) -> None:
+        player = action.player or ""
+        action_type = action.type.value
+        if not action.cards:
+            self._rows.append((game_id, seq, turn, player, action_type, None, 0, bought))
+        else:
+            for card, count in Counter(action.cards).items():
+                self._rows.append((game_id, seq, turn, player, action_type, self.card_id(card), count, bought))
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+
+    def set_results(self, game_id: int, points: Dict[str, int]) -> None:
+        """Record every player's points in a game; the players with the most points win."""
+        best = max(points.values(), default=None)
+        self.conn.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                              [(game_id, player, score, score == best) for player, score in points.items()])
+
+    def flush(self) -> None:
+        if self._rows:
+            self.conn.executemany("INSERT INTO actions (game_id, seq, turn, player, action_type, card_id, count, bought) "
+                                  "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", self._rows)
+            self._rows = []
+        self.conn.commit()
+
+    def query(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        self.flush()
+        return self.conn.execute(sql, params).fetchall()
+
+    def card_totals(self, card: str, action_type: ActionType = ActionType.GAIN) -> Dict[int, int]:
+        """Copies of `card` per game for one action type, e.g. Villages gained per game."""
+        rows = self.query(
+            "SELECT game_id, SUM(count) FROM actions JOIN cards USING (card_id) "
+            "WHERE cards.name = ? AND action_type = ? GROUP BY game_id",
+            (card, action_type.value))
+        return dict(rows)
+
+    def win_rates(self, card: str) -> Dict[int, Tuple[int, float]]:
+        """Copies of `card` a player bought in a game -> (player-games, fraction of them won)."""
+        rows = self.query(
+            "SELECT bought, COUNT(*), AVG(won) FROM ("
+            "  SELECT results.won, COALESCE(SUM(actions.count), 0) AS bought FROM results"
+            "  LEFT JOIN actions ON actions.game_id = results.game_id AND actions.player = results.player"
+            "   AND actions.bought = 1 AND actions.card_id = (SELECT card_id FROM cards WHERE name = ?)"
+            "  GROUP BY results.game_id, results.player"
+            ") GROUP BY bought ORDER BY bought",
+            (card,))
+        return {bought: (games, rate) for bought, games, rate in rows}
+
+    def recorder(self, source: str = "") -> "GameRecorder":
+        return GameRecorder(self, source)
+
+    def close(self) -> None:
+        self.flush()
+        self.conn.close()
+
+
+class GameRecorder:
+    """Feeds one log's events and actions into an EventStore, tracking game and turn numbers.
+
+    Each game's results are estimated from the basic Victory and Curse cards every
+    player gained, trashed or returned (VICTORY_POINTS), on top of the starting
+    Estates. VP tokens and cards worth a variable number of points are not counted.
+    They are written when the next game starts or on finish().
+    """
+
+    def __init__(self, store: EventStore, source: str = ""):
+        self.store = store
+        self.source = source
+        self.game_id: Optional[int] = None
+        self.turn = 0
+        self.seq = 0
+        self.points: Dict[str, int] = {}
+
+    def observe(self, event_text: str, action: Optional[Action]) -> None:
+        if event_text.startswith(GAME_HEADER):
+            self.finish()
+            match = _GAME_RE.match(event_text)
+            self.game_id = self.store.new_game(self.source, int(match.group(1)) if match else None)
+            self.turn = self.seq = 0
+        elif event_text.startswith("Turn"):
+            match = _TURN_RE.match(event_text)
+            if match:
+                self.turn = int(match.group(1))
+        if action is None:
+            return
+        if self.game_id is None:
+            # Log without a "Game #" header
+            self.game_id = self.store.new_game(self.source)
+        bought = action.type is ActionType.GAIN and _BUY in event_text
+        self.store.add(self.game_id, self.seq, self.turn, action, bought)
+        self.seq += 1
+        self._score(action)
+
+    def _score(self, action: Action) -> None:
+        player = action.player or ""
+        points = self.points.setdefault(player, STARTING_POINTS)
+        if action.type is ActionType.GAIN:
+            sign = 1
+        elif action.type in (ActionType.TRASH, ActionType.RETURN_TO_SUPPLY):
+            sign = -1
+        else:
+            return
+        self.points[player] = points + sign * sum(VICTORY_POINTS.get(card, 0) for card in action.cards)
+
+    def finish(self) -> None:
+        """Write the results of the game being recorded, if any."""
+        if self.game_id is not None and self.points:
+            self.store.set_results(self.game_id, self.points)
+        self.points = {}
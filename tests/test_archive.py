@@ -0,0 +1,66 @@
+import json
+import mmap
+from pathlib import Path
+from dominion_tracker.archive import _batches, find_games, replay_archives, replay_game, scan_archive
+from dominion_tracker.batch import batch_main, replay_log
+from dominion_tracker.parser import Parser
+
+
+SAMPLE_LOG = Path(__file__).resolve().parent.parent / "sample_logs" / "game_log.txt"
+
+
+def make_archive(path, count=3):
+    text = SAMPLE_LOG.read_text()
+    path.write_text("".join(text.replace("162962491", str(i), 1) + "\n" for i in range(count)))
+    return path
+
+
+def test_find_games_splits_at_headers():
+    data = b"Game #1, unrated.\nO draws a Copper.\nGame #2, rated.\nL plays a Village.\n"
+    assert find_games(data) == [(0, 36), (36, len(data))]
+    # Preamble before the first header is skipped; "Game #" inside a line is not a header
+    assert find_games(b"export\nGame #3\nO says Game #4\n") == [(7, 30)]
+    assert find_games(b"O draws a Copper.\n") == [(0, 18)]
+    assert find_games(b"") == []
+
+
+def test_replay_game_matches_single_log_replay():
+    data = SAMPLE_LOG.read_bytes()
+    [(start, end)] = find_games(data)
+    result = replay_game(data, start, end, Parser("O", player_ids=("O", "L")), ("O", "L"))
+    assert result["game"] == "162962491"
+    assert result["players"] == replay_log(SAMPLE_LOG, ("O", "L"))["players"]
+
+
+def test_scan_archive_uses_a_mapping(tmp_path):
+    archive = make_archive(tmp_path / "archive.txt")
+    ranges = scan_archive(str(archive))
+    assert len(ranges) == 3
+    with open(archive, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        assert all(buffer[start:start + 6] == b"Game #" for start, _ in ranges)
+    (tmp_path / "empty.txt").write_text("")
+    assert scan_archive(str(tmp_path / "empty.txt")) == []
+
+
+def test_replay_archives_in_parallel(tmp_path):
+    archive = make_archive(tmp_path / "archive.txt")
+    expected = replay_log(SAMPLE_LOG, ("O", "L"))["players"]
+    results = list(replay_archives([archive, tmp_path / "missing.txt"], ("O", "L"), workers=2, batch_bytes=1))
+    assert [r.get("game") for r in results] == ["0", "1", "2", None]
+    assert all(r["players"] == expected for r in results[:3])
+    assert "error" in results[3]
+
+
+def test_batches_cap_bytes_and_games():
+    ranges = [(0, 10), (10, 20), (20, 30)]
+    assert list(_batches(ranges, 15)) == [[(0, 10), (10, 20)], [(20, 30)]]
+    assert list(_batches(ranges, 1 << 20, games_per_batch=1)) == [[r] for r in ranges]
+
+
+def test_batch_main_archive_mode(tmp_path):
+    archive = make_archive(tmp_path / "archive.txt", 2)
+    out = tmp_path / "out.jsonl"
+    batch_main([str(archive), "--archive", "--players", "O,L", "--workers", "1", "--output", str(out)])
+    lines = [json.loads(line) for line in out.read_text().splitlines()]
+    assert [line["game"] for line in lines] == ["0", "1"]
+    assert lines[1]["players"]["L"]["deck"]["Library"] == 1
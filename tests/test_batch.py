@@ -0,0 +1,72 @@
+import json
+import shutil
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from dominion_tracker.batch import batch_main, iter_log_paths, replay_log, replay_many, submit_bounded
+
+
+SAMPLE_LOG = Path(__file__).resolve().parent.parent / "sample_logs" / "game_log.txt"
+
+
+def make_archive(tmp_path, count=3):
+    for i in range(count):
+        shutil.copy(SAMPLE_LOG, tmp_path / f"game_{i}.txt")
+    return tmp_path
+
+
+def test_iter_log_paths_expands_dirs_and_globs(tmp_path):
+    make_archive(tmp_path, 2)
+    (tmp_path / "notes.md").write_text("")
+    assert [p.name for p in iter_log_paths([str(tmp_path)])] == ["game_0.txt", "game_1.txt"]
+    assert [p.name for p in iter_log_paths([str(tmp_path / "*_1.txt")])] == ["game_1.txt"]
+
+
+def test_replay_log_tracks_all_players():
+    result = replay_log(SAMPLE_LOG, ("O", "L"))
+    assert set(result["players"]) == {"O", "L"}
+    assert result["players"]["O"]["hand"]["Village"] == 2
+
+
+def test_replay_log_reports_missing_file(tmp_path):
+    result = replay_log(tmp_path / "missing.txt", ("O", "L"))
+    assert "error" in result
+
+
+def test_replay_many_matches_serial_replay(tmp_path):
+    paths = list(iter_log_paths([str(make_archive(tmp_path))]))
+    expected = [replay_log(path, ("O", "L")) for path in paths]
+    assert list(replay_many(paths, ("O", "L"), workers=2, chunksize=2)) == expected
+    unordered = replay_many(paths, ("O", "L"), workers=2, chunksize=1, ordered=False)
+    assert sorted(r["log"] for r in unordered) == [r["log"] for r in expected]
+
+
+def test_submit_bounded_keeps_a_window_of_tasks(tmp_path):
+    pulled = []
+
+    def tasks():
+        for number in range(20):
+            pulled.append(number)
+            yield (lambda n: [n]), (number,)
+
+    with ThreadPoolExecutor(2) as pool:
+        for ordered in (True, False):
+            pulled.clear()
+            results = []
+            for result in submit_bounded(pool, tasks(), window=3, ordered=ordered):
+                # Tasks are only pulled as results are consumed: the window plus the one being yielded
+                assert len(pulled) - len(results) <= 3 + 1
+                results.append(result)
+            assert sorted(results) == list(range(20))
+            if ordered:
+                assert results == list(range(20))
+
+
+def test_batch_main_writes_json_lines(tmp_path):
+    archive = tmp_path / "logs"
+    archive.mkdir()
+    make_archive(archive, 2)
+    out = tmp_path / "out.jsonl"
+    batch_main([str(archive), "--players", "O,L", "--workers", "1", "--output", str(out)])
+    lines = out.read_text().splitlines()
+    assert len(lines) == 2
+    assert json.loads(lines[0])["players"]["L"]["deck"]["Library"] == 1
@@ -0,0 +1,100 @@
+import os
+import shutil
+from pathlib import Path
+from unittest.mock import patch
+from dominion_tracker import cache as cache_module
+from dominion_tracker.cache import ActionCache, decode_actions, encode_actions
+from dominion_tracker.engine import Action, ActionType
+from dominion_tracker.matcher import DEFAULT_CARD_CSV
+from dominion_tracker.parser import Parser
+
+
+SAMPLE_LOG = Path(__file__).resolve().parent.parent / "sample_logs" / "game_log.txt"
+
+
+def make_parser():
+    return Parser("O", card_csv_path=str(DEFAULT_CARD_CSV), player_ids=("O", "L"))
+
+
+def as_tuples(actions):
+    return [(a.type, a.cards, a.player, a.source, a.target) for a in actions]
+
+
+def test_encode_decode_round_trip():
+    actions = [
+        Action(ActionType.DRAW, ["Copper", "Copper", "Estate"], "O"),
+        Action(ActionType.END_TURN, [], "O"),
+        Action(ActionType.GAIN, ["Throne Room"], "L"),
+        Action(ActionType.GAIN, ["Silver"], "O", target="hand"),
+        Action(ActionType.DISCARD_HAND, ["Gold"], "L", source="deck"),
+    ]
+    assert as_tuples(decode_actions(encode_actions(actions))) == as_tuples(actions)
+
+
+def test_second_run_skips_parsing(tmp_path):
+    cache = ActionCache(tmp_path / "cache")
+    parser = make_parser()
+    first = cache.actions(SAMPLE_LOG, parser, table=True)
+    with patch.object(Parser, "parse_table_event", side_effect=AssertionError("parsed again")):
+        second = ActionCache(tmp_path / "cache").actions(SAMPLE_LOG, parser, table=True)
+    assert as_tuples(second) == as_tuples(first)
+    # Single-player parsing is cached separately
+    assert all(a.player == "O" for a in cache.actions(SAMPLE_LOG, parser))
+
+
+def test_changed_log_is_parsed_again(tmp_path):
+    log = tmp_path / "log.txt"
+    shutil.copy(SAMPLE_LOG, log)
+    cache = ActionCache(tmp_path / "cache")
+    before = cache.actions(log, make_parser(), table=True)
+    with open(log, "a") as f:
+        f.write("O\n buys and gains \na Gold\n.\n")
+    after = cache.actions(log, make_parser(), table=True)
+    assert len(after) == len(before) + 1
+    assert after[-1].cards == ["Gold"]
+
+
+def test_lru_eviction_by_total_size(tmp_path):
+    logs = []
+    for i in range(3):
+        logs.append(tmp_path / f"log{i}.txt")
+        shutil.copy(SAMPLE_LOG, logs[-1])
+        with open(logs[-1], "a") as f:
+            f.write(f"O\n gains \n{i + 1} Golds\n.\n")
+    cache = ActionCache(tmp_path / "cache")
+    cache.actions(logs[0], make_parser())
+    entry_size = next((tmp_path / "cache").glob("*.actions")).stat().st_size
+    cache.max_bytes = 2 * entry_size + entry_size // 2
+    cache.actions(logs[1], make_parser())
+    # Touch the first entry so the second becomes least recently used
+    os.utime(tmp_path / "cache" / f"{cache.key(logs[0], make_parser(), False)}.actions", ns=(2**62, 2**62))
+    cache.actions(logs[2], make_parser())
+    remaining = {p.name for p in (tmp_path / "cache").glob("*.actions")}
+    assert remaining == {f"{cache.key(log, make_parser(), False)}.actions" for log in (logs[0], logs[2])}
+
+
+def test_parser_version_is_part_of_the_key(tmp_path):
+    cache = ActionCache(tmp_path / "cache")
+    key = cache.key(SAMPLE_LOG, make_parser(), True)
+    with patch.object(cache_module, "PARSER_VERSION", cache_module.PARSER_VERSION + 1):
+        assert cache.key(SAMPLE_LOG, make_parser(), True) != key
+
+
+def test_index_keeps_the_most_recently_hashed_files(tmp_path):
+    logs = []
+    for i in range(3):
+        logs.append(tmp_path / f"log{i}.txt")
+        logs[-1].write_text(f"O\n gains \n{i + 1} Golds\n.\n")
+    # The card CSV takes one entry too
+    cache = ActionCache(tmp_path / "cache", max_index_entries=3)
+    cache.fingerprint(logs[0])
+    cache.fingerprint(logs[1])
+    # Using log0 again makes log1 the least recently hashed entry
+    cache.fingerprint(DEFAULT_CARD_CSV)
+    cache.fingerprint(logs[0])
+    cache.fingerprint(logs[2])
+    expected = [Path(DEFAULT_CARD_CSV).name, "log0.txt", "log2.txt"]
+    assert [Path(path).name for path in cache._index] == expected
+    reopened = ActionCache(tmp_path / "cache", max_index_entries=3)
+    assert sorted(Path(path).name for path in reopened._index) == sorted(expected)
+    assert not list((tmp_path / "cache").glob("*.tmp"))
@@ -0,0 +1,90 @@
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+from dominion_tracker.checkpoint import CheckpointedReplay
+from dominion_tracker.engine import GameEngine, TableEngine
+from dominion_tracker.matcher import DEFAULT_CARD_CSV
+from dominion_tracker.parser import Parser
+
+
+SAMPLE_LOG = Path(__file__).resolve().parent.parent / "sample_logs" / "game_log.txt"
+PLAYER_IDS = ("O", "L")
+
+
+def make_replay(log=SAMPLE_LOG, every=1):
+    parser = Parser(PLAYER_IDS[0], card_csv_path=str(DEFAULT_CARD_CSV), player_ids=PLAYER_IDS)
+    return CheckpointedReplay(log, parser.parse_table_event, TableEngine(PLAYER_IDS), PLAYER_IDS, every=every)
+
+
+class TestCheckpointedReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.replay = make_replay()
+        self.replay.run()
+        self.final = self.replay.engine.summary()
+
+    def test_checkpoint_per_turn_line(self):
+        turns = [c.turn for c in self.replay.checkpoints]
+        self.assertEqual(turns, list(range(1, 10)))
+        self.assertEqual(self.replay.checkpoints[0].label, "Turn 1 - OneDayOfPeace")
+
+    def test_seek_matches_fresh_replay(self):
+        for every in (1, 3):
+            replay = make_replay(every=every)
+            replay.run()
+            self.assertEqual(replay.seek(0).summary(), make_replay().engine.summary())
+            for turn in range(1, 10):
+                fresh = make_replay()
+                fresh.run(until_turn=turn)
+                self.assertEqual(replay.seek(turn).summary(), fresh.engine.summary(), (every, turn))
+
+    def test_seek_then_run_reaches_final_state(self):
+        self.replay.seek(4)
+        self.assertEqual(self.replay.run().summary(), self.final)
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "checkpoints.json"
+            self.replay.save(path)
+            loaded = make_replay()
+            self.assertTrue(loaded.load(path))
+            self.assertEqual(loaded.seek(5).summary(), self.replay.seek(5).summary())
+
+            other_log = Path(tmp) / "other.txt"
+            shutil.copy(SAMPLE_LOG, other_log)
+            self.assertFalse(make_replay(other_log).load(path))
+
+    def test_load_rejects_other_setups(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            log = Path(tmp) / "game.txt"
+            shutil.copy(SAMPLE_LOG, log)
+            path = Path(tmp) / "checkpoints.json"
+            make_replay(log).save(path)
+
+            parser = Parser(PLAYER_IDS[0], card_csv_path=str(DEFAULT_CARD_CSV), player_ids=PLAYER_IDS)
+            single = CheckpointedReplay(log, parser.parse_event, GameEngine(), PLAYER_IDS)
+            self.assertFalse(single.load(path))
+            self.assertFalse(make_replay(log, every=3).load(path))
+            swapped = CheckpointedReplay(log, parser.parse_table_event, TableEngine(("L", "O")), ("L", "O"))
+            self.assertFalse(swapped.load(path))
+
+            # Same size, different content
+            text = log.read_text()
+            log.write_text(text.replace("Village", "Vilage!", 1))
+            self.assertEqual(log.stat().st_size, SAMPLE_LOG.stat().st_size)
+            self.assertFalse(make_replay(log).load(path))
+
+    def test_indented_turn_lines_are_turns(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            log = Path(tmp) / "game.txt"
+            log.write_text(SAMPLE_LOG.read_text().replace("\nTurn ", "\n  Turn "))
+            replay = make_replay(log)
+            self.assertEqual(replay.run().summary(), self.final)
+            self.assertEqual([c.turn for c in replay.checkpoints], list(range(1, 10)))
+            self.assertEqual(replay.checkpoints[0].label, "Turn 1 - OneDayOfPeace")
+            self.assertEqual(replay.seek(5).summary(), self.replay.seek(5).summary())
+
+
+if __name__ == "__main__":
+    unittest.main()
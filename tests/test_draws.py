@@ -0,0 +1,91 @@
+import itertools
+import math
+import pytest
+from dominion_tracker.draws import DrawPredictor, hypergeometric_pmf
+
+
+def brute_force_coin(deck, discard, hand_size=5, values={"Copper": 1, "Silver": 2, "Gold": 3}):
+    """Enumerate every equally likely hand, drawing the deck first and the discard after."""
+    deck_cards = [c for c, n in deck.items() for _ in range(n)]
+    discard_cards = [c for c, n in discard.items() for _ in range(n)]
+    if len(deck_cards) >= hand_size:
+        certain, pool, draws = [], deck_cards, hand_size
+    else:
+        certain, pool, draws = deck_cards, discard_cards, min(hand_size - len(deck_cards), len(discard_cards))
+    hands = list(itertools.combinations(range(len(pool)), draws))
+    distribution = {}
+    for hand in hands:
+        coin = sum(values.get(c, 0) for c in certain) + sum(values.get(pool[i], 0) for i in hand)
+        distribution[coin] = distribution.get(coin, 0) + 1 / len(hands)
+    return distribution
+
+
+def test_hypergeometric_pmf_sums_to_one():
+    pmf = hypergeometric_pmf(12, 7, 5)
+    assert math.isclose(sum(pmf), 1.0)
+    assert math.isclose(pmf[5], math.comb(7, 5) / math.comb(12, 5))
+
+
+def test_full_hand_from_deck():
+    predictor = DrawPredictor({"Copper": 7, "Estate": 3}, {})
+    assert math.isclose(predictor.expected_count("Copper"), 3.5)
+    assert math.isclose(predictor.prob_at_least("Copper", 5), math.comb(7, 5) / math.comb(10, 5))
+    assert predictor.prob_at_least("Gold", 1) == 0
+
+
+def test_short_deck_reshuffles_discard():
+    predictor = DrawPredictor({"Gold": 2}, {"Copper": 3, "Estate": 3})
+    assert predictor.count_distribution("Gold")[:3] == [0.0, 0.0, 1.0]
+    assert predictor.prob_at_least("Gold", 3) == 0
+    assert math.isclose(predictor.expected_count("Copper"), 1.5)
+    assert math.isclose(predictor.expected_coin(), 7.5)
+
+
+@pytest.mark.parametrize("deck, discard", [
+    ({"Copper": 4, "Silver": 2, "Estate": 3, "Gold": 1}, {}),
+    ({"Silver": 1, "Estate": 2}, {"Copper": 5, "Gold": 2, "Village": 2}),
+    ({}, {"Copper": 2, "Silver": 1}),
+])
+def test_coin_distribution_matches_enumeration(deck, discard):
+    exact = DrawPredictor(deck, discard).coin_distribution()
+    expected = brute_force_coin(deck, discard)
+    assert exact.keys() == expected.keys()
+    for coin, p in expected.items():
+        assert math.isclose(exact[coin], p)
+
+
+def test_from_summary_adds_hand_and_played_after_cleanup():
+    summary = {"deck": {"Copper": 1}, "hand": {"Silver": 2}, "discard": {"Estate": 1}, "played": {"Gold": 1}}
+    predictor = DrawPredictor.from_summary(summary)
+    assert predictor.pool == {"Estate": 1, "Silver": 2, "Gold": 1}
+    assert DrawPredictor.from_summary(summary, after_cleanup=False).pool == {"Estate": 1}
+
+
+def test_from_summary_with_unknown_cards_matches_enumeration():
+    # 4 of the 6 deck cards are the "?" cards in hand, so only 2 are left to draw
+    summary = {"deck": {"Copper": 3, "Silver": 2, "Gold": 1}, "hand": {"?": 4, "Estate": 1},
+               "discard": {"Copper": 2, "Estate": 1}}
+    values = {"Copper": 1, "Silver": 2, "Gold": 3}
+    deck_cards = [c for c, n in summary["deck"].items() for _ in range(n)]
+    discard_cards = ["Copper", "Copper", "Estate", "Estate"]
+    distribution, copper = {}, 0.0
+    lefts = list(itertools.combinations(range(len(deck_cards)), 2))
+    for left in lefts:
+        certain = [deck_cards[i] for i in left]
+        pool = discard_cards + [c for i, c in enumerate(deck_cards) if i not in left]
+        hands = list(itertools.combinations(pool, 3))
+        for hand in hands:
+            p = 1 / len(lefts) / len(hands)
+            coin = sum(values.get(c, 0) for c in certain + list(hand))
+            distribution[coin] = distribution.get(coin, 0) + p
+            copper += p * (certain + list(hand)).count("Copper")
+
+    predictor = DrawPredictor.from_summary(summary)
+    result = predictor.coin_distribution(values)
+    assert result.keys() == distribution.keys()
+    assert all(math.isclose(result[c], distribution[c]) for c in result)
+    assert math.isclose(predictor.expected_count("Copper"), copper)
+    assert math.isclose(sum(predictor.count_distribution("Gold")), 1.0)
+    # A deck that still covers the hand is drawn from all of its counts
+    summary["hand"] = {"?": 1}
+    assert DrawPredictor.from_summary(summary).pool == summary["deck"]
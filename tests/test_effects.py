@@ -0,0 +1,45 @@
+import pytest
+from pathlib import Path
+from dominion_tracker.effects import CardInfo, EffectTable, load_card_info, parse_effects
+from dominion_tracker.engine import ActionType
+
+
+CARD_CSV = str(Path(__file__).resolve().parent.parent / "cards" / "dominion_cards.csv")
+
+
+def test_parse_effects():
+    assert parse_effects("gain_to=deck; discard_from=set_aside") == {"gain_to": "deck", "discard_from": "set_aside"}
+    assert parse_effects("") == {}
+    with pytest.raises(ValueError):
+        parse_effects("gain_to=attic")
+    with pytest.raises(ValueError):
+        parse_effects("fly_to=deck")
+
+
+def test_card_table_types_cost_and_effects():
+    cards = load_card_info(CARD_CSV)
+    assert cards["Militia"].types == ("Action", "Attack")
+    assert cards["Province"].cost == 8
+    assert cards["Library"].effects == {"set_aside_from": "deck", "discard_from": "set_aside"}
+    # Cards without the extra columns filled in still load
+    assert cards["Prince"].types == () and cards["Prince"].cost is None
+    # Every card with a hint has its types and cost filled in
+    assert all(info.types and info.cost is not None for info in cards.values() if info.effects)
+
+
+def test_effect_table_compiles_hints():
+    table = EffectTable({
+        "Library": CardInfo("Library", ("Action",), 5, {"set_aside_from": "deck", "discard_from": "set_aside"}),
+        "Mine": CardInfo("Mine", ("Action",), 5, {"gain_to": "hand"}),
+    })
+    assert table.piles(ActionType.DISCARD_HAND, "Library") == ("set_aside", None)
+    assert table.piles(ActionType.GAIN, "Mine") == (None, "hand")
+    assert table.piles(ActionType.GAIN, "Library") == (None, None)
+    assert table.piles(ActionType.GAIN, None) == (None, None)
+    assert table.cost("Mine") == 5 and table.types("Nope") == ()
+
+
+def test_shared_table_is_keyed_by_real_path(tmp_path):
+    link = tmp_path / "cards.csv"
+    link.symlink_to(CARD_CSV)
+    assert EffectTable.shared(str(link)) is EffectTable.shared(CARD_CSV)
@@ -1,6 +1,22 @@
+import io
+import json
 import unittest
-from dominion_tracker.engine import GameEngine, Action, ActionType
-from dominion_tracker.state import InvalidCardMove
+from pathlib import Path
+from dominion_tracker.engine import GameEngine, TableEngine, Action, ActionType
+from dominion_tracker.main import emit_deltas
+from dominion_tracker.parser import Parser, read_events
+from dominion_tracker.profiling import Stats
+from dominion_tracker.state import HiddenPlayerState, InvalidCardMove, UNKNOWN_CARD
+
+SAMPLE_LOG = Path(__file__).resolve().parent.parent / "sample_logs" / "game_log.txt"
+
+
+def apply_deltas(summary, deltas):
+    for pile, card, change in deltas:
+        cards = summary.setdefault(pile, {})
+        cards[card] = cards.get(card, 0) + change
+        if not cards[card]:
+            del cards[card]
 
 
 class TestGameEngine(unittest.TestCase):
@@ -96,6 +112,28 @@ class TestGameEngine(unittest.TestCase):
             self.engine.apply(Action(ActionType.PLAY, ["Gold"]))  # Not in hand
             self.assertTrue(any("Invalid move" in message for message in log.output))
 
+    def test_source_and_target_override_default_piles(self):
+        self.engine.apply(Action(ActionType.GAIN, ["Silver"], target="hand"))
+        self.engine.apply(Action(ActionType.DISCARD_HAND, ["Estate"], source="deck"))
+        self.engine.apply(Action(ActionType.TRASH, ["Copper"], source="deck"))
+        summary = self.engine.summary()
+        self.assertEqual(summary["hand"], {"Silver": 1})
+        self.assertEqual(summary["discard"], {"Estate": 1})
+        self.assertEqual(summary["deck"], {"Copper": 6, "Estate": 2})
+
+    def test_set_aside_and_mats(self):
+        self.engine.apply(Action(ActionType.SET_ASIDE, ["Estate"]))
+        self.engine.apply(Action(ActionType.PUT_IN_HAND, ["Estate"]))
+        self.engine.apply(Action(ActionType.TO_MAT, ["Estate"]))
+        self.assertEqual(self.engine.summary()["mats"], {"Estate": 1})
+        self.assertNotIn("set_aside", self.engine.summary())
+
+        self.engine.apply(Action(ActionType.PUT_IN_HAND, ["Copper"]))
+        self.engine.apply(Action(ActionType.TOPDECK, ["Copper"]))
+        self.engine.apply(Action(ActionType.RETURN_TO_SUPPLY, ["Copper"], source="deck"))
+        self.assertEqual(self.engine.summary()["deck"], {"Copper": 6, "Estate": 2})
+        self.assertEqual(self.engine.state.total_cards(), {"Copper": 6, "Estate": 3})
+
     def test_unknown_action_raises(self):
         class FakeActionType:
             UNKNOWN = "unknown"
@@ -104,5 +142,127 @@ class TestGameEngine(unittest.TestCase):
             self.engine.apply(Action(FakeActionType.UNKNOWN, []))
 
 
+class TestTableEngine(unittest.TestCase):
+    def setUp(self):
+        self.engine = TableEngine(("O", "L"))
+
+    def test_actions_routed_by_player(self):
+        self.engine.apply(Action(ActionType.DRAW, ["Copper"], "O"))
+        self.engine.apply(Action(ActionType.GAIN, ["Silver"], "L"))
+        summary = self.engine.summary()
+        self.assertEqual(summary["O"]["hand"], {"Copper": 1})
+        self.assertEqual(summary["O"]["discard"], {})
+        self.assertEqual(summary["L"]["discard"], {"Silver": 1})
+        self.assertEqual(summary["L"]["hand"], {})
+
+    def test_compact_states_share_index(self):
+        engine = TableEngine(("O", "L"), compact=True)
+        engine.apply(Action(ActionType.DRAW, ["Copper"], "O"))
+        engine.apply(Action(ActionType.GAIN, ["Silver"], "L"))
+        self.assertIs(engine.engines["O"].state.index, engine.engines["L"].state.index)
+        self.assertEqual(engine.summary()["O"]["hand"], {"Copper": 1})
+        self.assertEqual(engine.summary()["L"]["discard"], {"Silver": 1})
+
+    def test_opponent_hidden_draws_do_not_drift(self):
+        with self.assertNoLogs("dominion_tracker.engine", level="WARNING"):
+            self.engine.apply(Action(ActionType.DRAW, [UNKNOWN_CARD] * 5, "L"))
+            self.engine.apply(Action(ActionType.PLAY, ["Copper", "Copper", "Copper"], "L"))
+            self.engine.apply(Action(ActionType.GAIN, ["Silver"], "L"))
+            self.engine.apply(Action(ActionType.END_TURN, [], "L"))
+            self.engine.apply(Action(ActionType.DRAW, [UNKNOWN_CARD] * 5, "L"))
+        summary = self.engine.summary()["L"]
+        self.assertEqual(summary["hand"], {UNKNOWN_CARD: 5})
+        self.assertEqual(summary["discard"], {"Copper": 3, "Silver": 1, UNKNOWN_CARD: 2})
+        self.assertEqual(self.engine.engines["L"].state.total_cards(), {"Copper": 7, "Estate": 3, "Silver": 1})
+
+    def test_states_without_hidden_tracking_skip_unknown_cards(self):
+        engines = [TableEngine(("L",), compact=True), TableEngine(("L",), hidden=False)]
+        single = GameEngine()
+        with self.assertNoLogs("dominion_tracker.engine", level="WARNING"):
+            for engine in engines:
+                engine.apply(Action(ActionType.DRAW, [UNKNOWN_CARD] * 5, "L"))
+                engine.apply(Action(ActionType.DISCARD_HAND, [UNKNOWN_CARD], "L"))
+            single.apply(Action(ActionType.DRAW, [UNKNOWN_CARD] * 5, "L"))
+        for engine in engines:
+            self.assertEqual(engine.summary()["L"]["deck"], {"Copper": 7, "Estate": 3})
+            self.assertEqual(engine.summary()["L"]["hand"], {})
+        self.assertEqual(single.summary()["hand"], {})
+
+    def test_compact_hidden_is_rejected(self):
+        with self.assertRaises(ValueError):
+            TableEngine(("O", "L"), compact=True, hidden=True)
+        self.assertNotIsInstance(TableEngine(("O",), compact=True).engines["O"].state, HiddenPlayerState)
+
+    def test_compact_state_tracks_extra_piles(self):
+        engine = TableEngine(("O",), compact=True)
+        engine.apply(Action(ActionType.SET_ASIDE, ["Copper"], "O"))
+        engine.apply(Action(ActionType.TO_MAT, ["Copper"], "O", source="set_aside"))
+        self.assertEqual(engine.summary()["O"]["mats"], {"Copper": 1})
+        engine.restore(engine.snapshot())
+        self.assertEqual(engine.summary()["O"]["mats"], {"Copper": 1})
+
+    def test_unknown_player_raises(self):
+        with self.assertRaises(ValueError):
+            self.engine.apply(Action(ActionType.DRAW, ["Copper"], "X"))
+
+
+class TestDeltas(unittest.TestCase):
+
+    def test_deltas_rebuild_every_summary(self):
+        for compact in (False, True):
+            engine = TableEngine(("O", "L"), compact=compact)
+            mirror = engine.summary()
+            received = []
+            engine.subscribe(lambda action, deltas: (received.append(action), apply_deltas(mirror[action.player], deltas)))
+            parser = Parser("O", player_ids=("O", "L"))
+            for event in read_events(str(SAMPLE_LOG), ("O", "L")):
+                action = parser.parse_table_event(event)
+                if action:
+                    engine.apply(action)
+                    expected = engine.summary()
+                    for pid in expected:
+                        self.assertEqual({pile: cards for pile, cards in mirror[pid].items() if cards},
+                                         {pile: cards for pile, cards in expected[pid].items() if cards})
+            self.assertTrue(received)
+
+    def test_deltas_are_netted_per_action(self):
+        engine = TableEngine(("L",))
+        received = []
+        engine.subscribe(lambda action, deltas: received.append(deltas))
+        engine.apply(Action(ActionType.DRAW, [UNKNOWN_CARD] * 2, "L"))
+        # An unknown card resolves to the Copper that is then played: it never shows up in hand
+        engine.apply(Action(ActionType.PLAY, ["Copper"], "L"))
+        engine.apply(Action(ActionType.PLAY, ["Gold"], "L"))
+        self.assertEqual(received, [[("hand", UNKNOWN_CARD, 2)],
+                                    [("deck", "Copper", -1), ("hand", UNKNOWN_CARD, -1), ("played", "Copper", 1)]])
+
+    def test_subscribers_and_instrumentation_combine(self):
+        engine = GameEngine()
+        stats = Stats()
+        received = []
+        engine.instrument(stats)
+        engine.subscribe(lambda action, deltas: received.append(deltas))
+        engine.apply(Action(ActionType.DRAW, ["Copper"]))
+        self.assertEqual(received, [[("deck", "Copper", -1), ("hand", "Copper", 1)]])
+        self.assertEqual(stats.actions["DRAW"], 1)
+        engine.unsubscribe(engine.subscribers[0])
+        engine.apply(Action(ActionType.DRAW, ["Copper"]))
+        self.assertEqual(len(received), 1)
+        self.assertEqual(stats.actions["DRAW"], 2)
+        engine.instrument(None)
+        self.assertNotIn("apply", engine.__dict__)
+
+    def test_emit_deltas_writes_json_lines(self):
+        engine = GameEngine()
+        out = io.StringIO()
+        emit_deltas(engine, out=out)
+        engine.apply(Action(ActionType.DRAW, ["Copper", "Copper"], "O"))
+        engine.apply(Action(ActionType.END_TURN, [], "O"))
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(lines[0], {"snapshot": {"deck": {"Copper": 7, "Estate": 3}, "hand": {}, "discard": {}, "played": {}}})
+        self.assertEqual(lines[1], {"player": "O", "action": "DRAW", "deltas": [["deck", "Copper", -2], ["hand", "Copper", 2]]})
+        self.assertEqual(lines[2]["deltas"], [["hand", "Copper", -2], ["discard", "Copper", 2]])
+
+
 if __name__ == "__main__":
     unittest.main()
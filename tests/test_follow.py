@@ -0,0 +1,111 @@
+import asyncio
+import io
+import os
+import unittest
+import tempfile
+from pathlib import Path
+from dominion_tracker.follow import LogFollower
+from dominion_tracker.engine import GameEngine
+from dominion_tracker.main import follow_log
+from dominion_tracker.parser import Parser
+from dominion_tracker.matcher import CardMatcher
+
+
+class TestLogFollower(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "log.txt"
+        self.path.write_text("")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def append(self, text):
+        with open(self.path, "a") as f:
+            f.write(text)
+
+    def test_reads_only_new_complete_lines(self):
+        with LogFollower(self.path) as follower:
+            self.append("O\n draws \n3 Cop")
+            self.assertEqual(follower.read_new_lines(), ["O", " draws "])
+            self.assertEqual(follower.read_new_lines(), [])
+            self.append("pers\n.\n")
+            self.assertEqual(follower.read_new_lines(), ["3 Coppers", "."])
+            self.assertEqual(follower.offset, self.path.stat().st_size)
+
+    def test_resumes_from_offset(self):
+        self.append("O\n draws \n")
+        with LogFollower(self.path, offset=2) as follower:
+            self.assertEqual(follower.read_new_lines(), [" draws "])
+
+    def test_truncated_file_starts_over(self):
+        self.append("O\n draws \n")
+        with LogFollower(self.path) as follower:
+            follower.read_new_lines()
+            self.path.write_text("L\n")
+            self.assertEqual(follower.read_new_lines(), ["L"])
+            self.assertEqual(follower.restarts, 1)
+
+    def test_replaced_file_starts_over(self):
+        self.append("O\n draws \n")
+        with LogFollower(self.path) as follower:
+            follower.read_new_lines()
+            replacement = Path(self.tmp.name) / "new.txt"
+            replacement.write_text("L\n draws \n3 Coppers\n")
+            os.replace(replacement, self.path)
+            self.assertEqual(follower.read_new_lines(), ["L", " draws ", "3 Coppers"])
+            self.assertEqual(follower.restarts, 1)
+
+    def test_follow_log_prints_updates(self):
+        matcher = CardMatcher({"copper": "Copper", "estate": "Estate"})
+        engine = GameEngine()
+        out = io.StringIO()
+
+        async def scenario():
+            task = asyncio.create_task(
+                follow_log(self.path, Parser("O", matcher=matcher).parse_event, engine, ("O", "L"), poll_interval=0.01, out=out))
+            self.append("O\n draws \n2 Coppers\n.\nTurn 1 - O\n")
+            for _ in range(100):
+                if out.getvalue():
+                    break
+                await asyncio.sleep(0.01)
+            task.cancel()
+
+        asyncio.run(scenario())
+        self.assertIn("'hand': {'Copper': 2}", out.getvalue())
+
+    def test_follow_log_shows_events_before_the_next_turn_and_restarts_cleanly(self):
+        matcher = CardMatcher({"copper": "Copper", "estate": "Estate"})
+        engine = GameEngine()
+        out = io.StringIO()
+        game = "O\n gains \na Copper\n.\nL\n"
+
+        async def wait_for(text):
+            for _ in range(100):
+                if text in out.getvalue():
+                    return
+                await asyncio.sleep(0.01)
+
+        async def scenario():
+            task = asyncio.create_task(
+                follow_log(self.path, Parser("O", matcher=matcher).parse_event, engine, ("O", "L"), poll_interval=0.01, out=out))
+            # No "Turn" line follows, yet the gain is shown
+            self.append(game)
+            await wait_for("'discard': {'Copper': 1}")
+            out.truncate(0)
+            out.seek(0)
+            # The same game written again from the top is not applied on top of the old piles
+            self.path.write_text("")
+            await asyncio.sleep(0.05)
+            self.path.write_text(game)
+            await wait_for("'discard': {'Copper': 1}")
+            task.cancel()
+
+        asyncio.run(scenario())
+        self.assertIn("'discard': {'Copper': 1}", out.getvalue())
+        self.assertNotIn("'Copper': 2", out.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
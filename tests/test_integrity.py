@@ -0,0 +1,139 @@
+import io
+from pathlib import Path
+from dominion_tracker.engine import Action, ActionType, GameEngine, TableEngine
+from dominion_tracker.integrity import IntegrityMonitor, supply_change
+from dominion_tracker.main import main
+from dominion_tracker.parser import Parser, read_events
+
+
+SAMPLE_LOG = Path(__file__).resolve().parent.parent / "sample_logs" / "game_log.txt"
+
+
+def test_supply_change_follows_piles_and_overrides():
+    assert supply_change(Action(ActionType.GAIN, ["Silver"])) == 1
+    assert supply_change(Action(ActionType.GAIN, ["Silver"], target="hand")) == 1
+    assert supply_change(Action(ActionType.TRASH, ["Estate"])) == -1
+    assert supply_change(Action(ActionType.RETURN_TO_SUPPLY, ["Estate"])) == -1
+    assert supply_change(Action(ActionType.PLAY, ["Village"])) == 0
+    # Lurker trashes straight from the supply: the player's cards never change
+    assert supply_change(Action(ActionType.TRASH, ["Mine"], source="supply")) == 0
+    assert supply_change(Action(ActionType.SHUFFLE, [])) == 0
+
+
+def test_sample_log_has_no_divergences():
+    ids = ("O", "L")
+    parser = Parser("O", player_ids=ids)
+    engine = TableEngine(ids)
+    monitor = IntegrityMonitor()
+    engine.check_integrity(monitor)
+    for event in read_events(str(SAMPLE_LOG), ids):
+        monitor.event = event
+        action = parser.parse_table_event(event)
+        if action:
+            engine.apply(action)
+    assert monitor.divergences == []
+    assert monitor.actions > 0
+    for pid, player_engine in engine.engines.items():
+        # Unknown cards in hand leave the candidates in the deck, so the totals stay whole
+        assert monitor.expected[pid] == player_engine.state.total_cards()
+
+
+def test_rejected_trash_names_the_event():
+    engine = GameEngine()
+    monitor = IntegrityMonitor()
+    engine.check_integrity(monitor, "O")
+    engine.apply(Action(ActionType.DRAW, ["Copper"] * 5, "O"))
+    monitor.event = "O trashes a Gold."
+    engine.apply(Action(ActionType.TRASH, ["Gold"], "O"))
+    [divergence] = monitor.divergences
+    assert (divergence.index, divergence.event, divergence.card) == (2, "O trashes a Gold.", "Gold")
+    assert (divergence.expected, divergence.actual) == (1, 0)
+    assert "not in source pile" in divergence.reason
+    # Resynced: later actions only report new divergences
+    engine.apply(Action(ActionType.TRASH, ["Copper"], "O"))
+    assert len(monitor.divergences) == 1
+    out = io.StringIO()
+    monitor.report(out)
+    assert "1 divergence(s) in 3 actions" in out.getvalue()
+    assert "'O trashes a Gold.'" in out.getvalue()
+
+
+def test_rejected_draw_play_and_discard_are_reported():
+    engine = TableEngine(("O", "L"), hidden=False)
+    monitor = IntegrityMonitor()
+    engine.check_integrity(monitor)
+    events = [("O draws a Gold.", Action(ActionType.DRAW, ["Gold"], "O")),
+              ("O plays a Gold.", Action(ActionType.PLAY, ["Gold"], "O")),
+              ("L discards a Village.", Action(ActionType.DISCARD_HAND, ["Village"], "L")),
+              ("O draws a Copper.", Action(ActionType.DRAW, ["Copper"], "O"))]
+    for event, action in events:
+        monitor.event = event
+        engine.apply(action)
+    assert [(d.index, d.event, d.player, d.action.type, d.card) for d in monitor.divergences] == [
+        (1, "O draws a Gold.", "O", ActionType.DRAW, "Gold"),
+        (2, "O plays a Gold.", "O", ActionType.PLAY, "Gold"),
+        (3, "L discards a Village.", "L", ActionType.DISCARD_HAND, "Village"),
+    ]
+    assert monitor.divergences[2].to_dict()["reason"].startswith("Tried to discard 'Village'")
+
+
+def test_restore_and_switching_off():
+    engine = GameEngine()
+    monitor = IntegrityMonitor()
+    engine.check_integrity(monitor)
+    engine.restore({"deck": {"Copper": 7, "Estate": 3, "Gold": 1}, "hand": {}, "discard": {}, "played": {}})
+    engine.apply(Action(ActionType.DRAW, ["Gold"]))
+    engine.apply(Action(ActionType.GAIN, ["Silver"], target="hand"))
+    assert monitor.divergences == []
+    assert monitor.expected[None]["Silver"] == 1
+    engine.check_integrity(None)
+    assert "apply" not in engine.__dict__
+    assert engine.state.on_change is None
+    engine.apply(Action(ActionType.TRASH, ["Province"]))
+    assert monitor.actions == 2
+
+
+def test_lost_cards_are_found_at_the_turn_end():
+    engine = GameEngine()
+    monitor = IntegrityMonitor()
+    engine.check_integrity(monitor, "O")
+    # Only subscribers need the per-action delta records
+    assert engine.state.on_change is None
+    engine.apply(Action(ActionType.DRAW, ["Copper"] * 5, "O"))
+    # A tracker bug that drops a card from hand, which no action reports
+    engine.state.hand["Copper"] -= 1
+    monitor.event = "O plays 4 Coppers."
+    engine.apply(Action(ActionType.PLAY, ["Copper"] * 4, "O"))
+    assert monitor.divergences == []
+    monitor.event = "O ends turn"
+    engine.apply(Action(ActionType.END_TURN, [], "O"))
+    [divergence] = monitor.divergences
+    assert (divergence.index, divergence.event, divergence.card) == (3, "O ends turn", "Copper")
+    assert (divergence.expected, divergence.actual) == (7, 6)
+    # Resynced, and the report checks the piles once more
+    engine.state.deck["Gold"] = 1
+    out = io.StringIO()
+    monitor.report(out)
+    assert [d.card for d in monitor.divergences] == ["Copper", "Gold"]
+    assert "2 divergence(s) in 3 actions" in out.getvalue()
+
+
+def test_integrity_keeps_subscribers_and_stats():
+    engine = GameEngine()
+    seen = []
+    engine.subscribe(lambda action, deltas: seen.append(deltas))
+    monitor = IntegrityMonitor()
+    engine.check_integrity(monitor)
+    engine.apply(Action(ActionType.DRAW, ["Copper"]))
+    engine.check_integrity(None)
+    engine.apply(Action(ActionType.PLAY, ["Copper"]))
+    assert seen == [[("deck", "Copper", -1), ("hand", "Copper", 1)], [("hand", "Copper", -1), ("played", "Copper", 1)]]
+    assert monitor.actions == 1
+
+
+def test_cli_check_integrity(capsys, monkeypatch):
+    monkeypatch.setattr("sys.argv", ["tracker", "--players", "O,L", "--log", str(SAMPLE_LOG), "--check-integrity", "--all-players"])
+    main()
+    captured = capsys.readouterr()
+    assert "card totals match the log" in captured.err
+    assert "'Militia': 1" in captured.out
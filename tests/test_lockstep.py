@@ -0,0 +1,90 @@
+import pytest
+from benchmarks.synthetic import generate_game, player_ids
+from dominion_tracker.engine import Action, ActionType, TableEngine
+from dominion_tracker import lockstep
+from dominion_tracker.lockstep import LockstepEngine
+from dominion_tracker.parser import Parser, iter_events
+from dominion_tracker.state import CardIndex
+
+
+def parse_game(seed, ids=("A", "B")):
+    parser = Parser(ids[0], player_ids=ids)
+    lines = generate_game(turns=8, players=len(ids), seed=seed)
+    return [action for action in map(parser.parse_table_event, iter_events(lines, ids)) if action]
+
+
+@pytest.mark.parametrize("lane_array_games", [0, 10 ** 9])
+def test_lockstep_replay_matches_table_engines(monkeypatch, lane_array_games):
+    # Both ways of encoding a step: lane arrays and shifted ints
+    monkeypatch.setattr(lockstep, "LANE_ARRAY_GAMES", lane_array_games)
+    ids = player_ids(2)
+    games = [parse_game(seed, ids) for seed in range(5)]
+    # Games of different lengths drop out of the later steps
+    games[2] = games[2][:40]
+    engine = LockstepEngine.for_games(games, ids)
+    engine.replay(games)
+    for number, actions in enumerate(games):
+        expected = TableEngine(ids, hidden=False)
+        for action in actions:
+            expected.apply(action)
+        assert engine.summary(number) == expected.summary()
+    assert engine.flagged() == []
+
+
+def test_invalid_moves_are_flagged_per_game():
+    games = [
+        [Action(ActionType.DRAW, ["Copper", "Copper"], "A"), Action(ActionType.PLAY, ["Copper", "Village"], "A")],
+        [Action(ActionType.DRAW, ["Copper", "Estate"], "A"), Action(ActionType.PLAY, ["Copper"], "A")],
+    ]
+    engine = LockstepEngine(("A",), [CardIndex(["Village"]), CardIndex()])
+    engine.apply_step(engine.encode_step((game, actions[0]) for game, actions in enumerate(games)))
+    assert engine.apply_step(engine.encode_step((game, actions[1]) for game, actions in enumerate(games))) == [0]
+    assert list(engine.invalid) == [1, 0]
+    # The whole move of the flagged game is skipped, the other game's move applies
+    assert engine.summary(0)["A"]["hand"] == {"Copper": 2}
+    assert engine.summary(1)["A"] == {"deck": {"Copper": 6, "Estate": 2}, "hand": {"Estate": 1},
+                                      "discard": {}, "played": {"Copper": 1}}
+
+
+def test_whole_pile_moves_and_overrides():
+    engine = LockstepEngine(("A", "B"), [CardIndex(["Mine", "Silver"])])
+    actions = [
+        Action(ActionType.DRAW, ["Copper"] * 5, "B"),
+        Action(ActionType.PLAY, ["Copper"], "B"),
+        Action(ActionType.GAIN, ["Silver"], "B", target="hand"),
+        Action(ActionType.END_TURN, [], "B"),
+        Action(ActionType.SHUFFLE, [], "B"),
+        Action(ActionType.TRASH, ["Estate"], "B", source="deck"),
+    ]
+    engine.replay([actions])
+    assert engine.summary(0)["B"] == {"deck": {"Copper": 7, "Estate": 2, "Silver": 1}, "hand": {},
+                                      "discard": {}, "played": {}}
+    assert engine.count(0, "A", "deck", "Copper") == 7
+    assert engine.count(0, "A", "hand", "Mine") == 0
+
+
+def test_put_in_hand_prefers_set_aside_cards():
+    engine = LockstepEngine(("A",), [CardIndex(), CardIndex()])
+    set_aside = Action(ActionType.SET_ASIDE, ["Estate"], "A", source="deck")
+    put = Action(ActionType.PUT_IN_HAND, ["Estate"], "A")
+    engine.replay([[set_aside, put], [Action(ActionType.DRAW, [], "A"), put]])
+    assert engine.summary(0)["A"]["hand"] == {"Estate": 1}
+    assert engine.summary(0)["A"]["deck"] == {"Copper": 7, "Estate": 2}
+    assert engine.summary(1)["A"]["hand"] == {"Estate": 1}
+    assert engine.summary(1)["A"]["deck"] == {"Copper": 7, "Estate": 2}
+
+
+def test_hidden_cards_are_skipped():
+    hidden = [Action(ActionType.DRAW, ["?"] * 5, "B"), Action(ActionType.DISCARD_HAND, ["?"], "B")]
+    engine = LockstepEngine.for_games([hidden], ("A", "B"))
+    engine.replay([hidden])
+    assert engine.flagged() == []
+    assert engine.summary(0)["B"]["deck"] == {"Copper": 7, "Estate": 3}
+
+
+def test_encode_rejects_unknown_cards_and_players():
+    engine = LockstepEngine(("A",), [CardIndex()])
+    with pytest.raises(ValueError):
+        engine.encode_step([(0, Action(ActionType.DRAW, ["Village"], "A"))])
+    with pytest.raises(ValueError):
+        engine.encode_step([(0, Action(ActionType.DRAW, ["Copper"], "Z"))])
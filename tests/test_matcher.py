@@ -0,0 +1,94 @@
+import subprocess
+import sys
+from pathlib import Path
+from dominion_tracker.matcher import CardMatcher, word_variants
+from dominion_tracker.parser import Parser
+
+
+CARD_CSV = str(Path(__file__).resolve().parent.parent / "cards" / "dominion_cards.csv")
+
+NAMES = {
+    "copper": "Copper",
+    "village": "Village",
+    "throne room": "Throne Room",
+    "throne": "Throne",
+    "party": "Party",
+    "gardens": "Gardens",
+    "jack of all trades": "Jack of All Trades",
+}
+
+
+def test_word_variants():
+    assert word_variants("village") == ["village", "villages"]
+    assert word_variants("party") == ["party", "partys", "parties"]
+    assert word_variants("gardens") == ["gardens"]
+
+
+def test_longest_match_wins():
+    matcher = CardMatcher(NAMES)
+    assert matcher.extract("plays a throne room and a throne") == ["Throne Room", "Throne"]
+
+
+def test_plurals_and_counts():
+    matcher = CardMatcher(NAMES)
+    text = "draws 3 coppers, 2 throne rooms and 2 parties. (+$3)"
+    assert matcher.extract(text) == ["Copper"] * 3 + ["Throne Room"] * 2 + ["Party"] * 2
+
+
+def test_names_ending_in_s_and_long_names():
+    matcher = CardMatcher(NAMES)
+    assert matcher.extract("gains a gardens and a jack of all trades") == ["Gardens", "Jack of All Trades"]
+
+
+def test_max_card_words_limits_names():
+    matcher = CardMatcher(NAMES, max_card_words=3)
+    assert matcher.max_card_words == 2
+    assert matcher.extract("gains a jack of all trades") == []
+
+
+def test_shared_matcher_is_reused():
+    first = Parser("O", card_csv_path=CARD_CSV)
+    second = Parser("L", card_csv_path=CARD_CSV)
+    assert first.matcher is second.matcher
+    assert first.extract_cards("o draws 2 villages and a copper") == ["Village", "Village", "Copper"]
+
+
+def test_precompiled_index_round_trip(tmp_path):
+    csv_path = tmp_path / "cards.csv"
+    csv_path.write_text(Path(CARD_CSV).read_text())
+    built = CardMatcher.from_csv(csv_path)
+    index_path = tmp_path / "cards.csv.idx"
+    assert index_path.exists()
+
+    loaded = CardMatcher.from_csv(csv_path)
+    text = "plays a throne room and draws 2 villages and a card."
+    assert loaded.extract(text) == built.extract(text)
+    assert loaded.to_bytes() == built.to_bytes()
+    assert loaded.cards["Mine"] == (("Action",), 5, {"gain_to": "hand"})
+
+
+def test_stale_index_is_rebuilt(tmp_path):
+    csv_path = tmp_path / "cards.csv"
+    csv_path.write_text("Name\nVillage\n")
+    assert CardMatcher.from_csv(csv_path).extract("plays a smithy") == []
+
+    csv_path.write_text("Name\nVillage\nSmithy\n")
+    assert CardMatcher.from_csv(csv_path).extract("plays a smithy") == ["Smithy"]
+
+
+def test_cli_import_skips_optional_modules():
+    code = ("import sys, dominion_tracker.main; "
+            "print(sorted({'asyncio', 'csv', 'sqlite3', 'json', 'concurrent.futures', 'pathlib'} & set(sys.modules)))")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         cwd=Path(CARD_CSV).parent.parent).stdout
+    assert out.strip() == "[]"
+
+
+def test_warm_parser_start_reads_no_csv():
+    # Warm the index first, then check that the matcher and effects both come from it
+    CardMatcher.from_csv(CARD_CSV)
+    code = ("import sys; from dominion_tracker.parser import Parser; parser = Parser('O'); "
+            "print('csv' in sys.modules, parser.effects.cost('Mine'))")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         cwd=Path(CARD_CSV).parent.parent).stdout
+    assert out.split() == ["False", "5"]
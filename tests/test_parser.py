@@ -1,7 +1,8 @@
 import pytest
 from unittest.mock import mock_open, patch
 from dominion_tracker.engine import Action, ActionType
-from dominion_tracker.parser import Parser, read_events, singularize
+from dominion_tracker.state import UNKNOWN_CARD
+from dominion_tracker.parser import Event, Parser, iter_events, read_events, singularize
 
 
 MOCK_CSV = "Name\nCopper\nEstate\nSilver\nVillage\nThrone Room\n"
@@ -64,3 +65,158 @@ def test_parse_event_none(mocked_parser):
     event = "P2 draws a copper"  # Not for P1
     action = mocked_parser.parse_event(event)
     assert action is None
+
+
+LOG_LINES = [
+    "O", " shuffles their deck.",
+    "O", " draws ", "3 Coppers", ".",
+    "Turn 1 - Someone",
+    "O", " plays ", "a Copper", ".",
+    "O", " draws ", "a Copper", ".",
+    "", "Turn 2 - Someone",
+]
+
+
+def test_iter_events_inserts_end_turn_before_shuffle_and_draw():
+    events = list(iter_events(iter(LOG_LINES), player_ids=("O", "L")))
+    assert events == [
+        "O ends turn",
+        "O shuffles their deck.",
+        "O draws 3 Coppers .",
+        "Turn 1 - Someone",
+        "O plays a Copper .",
+        "O ends turn",
+        "O draws a Copper .",
+        "Turn 2 - Someone",
+    ]
+
+
+def test_iter_events_splits_concatenated_games():
+    lines = ["Turn 5 - O", "O plays a Copper", "Game #7, unrated.", "Card Pool: level 10", "O starts with 7 Coppers"]
+    events = list(iter_events(iter(lines), player_ids=("O", "L")))
+    assert events == ["Turn 5 - O", "O plays a Copper", "Game #7, unrated. Card Pool: level 10",
+                      "O starts with 7 Coppers"]
+
+
+def test_iter_events_is_lazy():
+    def lines():
+        yield from ["O", " plays ", "a Copper", "O", " gains ", "a Silver", "O", " draws ", "a Copper", "O"]
+        raise AssertionError("reader consumed more lines than needed")
+
+    events = iter_events(lines(), player_ids=("O",))
+    assert next(events) == "O plays a Copper"
+
+
+def test_read_events_matches_streaming(tmp_path):
+    log = tmp_path / "log.txt"
+    log.write_text("\n".join(LOG_LINES))
+    assert read_events(str(log), ("O", "L")) == list(iter_events(iter(LOG_LINES), ("O", "L")))
+
+
+def test_parse_table_event_dispatches_by_player():
+    with patch("builtins.open", mock_open(read_data=MOCK_CSV)):
+        parser = Parser("P1", card_csv_path="fake.csv", player_ids=("P1", "P2"))
+    assert parser.parse_table_event("P2 gains a silver").player == "P2"
+    assert parser.parse_table_event("P1 plays a village").player == "P1"
+    assert parser.parse_table_event("P3 gains a silver") is None
+    assert parser.parse_table_event("Turn 1 - P1") is None
+
+
+def test_parse_event_classifies_verb_after_player(mocked_parser):
+    assert mocked_parser.parse_event("P1 gets +$ 2 .") is None
+    assert mocked_parser.parse_event("P1 ends turn").type == ActionType.END_TURN
+    action = mocked_parser.parse_event("P1 buys and gains a village")
+    assert action.type == ActionType.GAIN
+    assert action.cards == ["Village"]
+
+
+def test_hidden_cards_become_placeholders(mocked_parser):
+    action = mocked_parser.parse_event("P1 draws 5 cards .")
+    assert action.cards == [UNKNOWN_CARD] * 5
+    action = mocked_parser.parse_event("P1 discards a card and an estate .")
+    assert action.cards == [UNKNOWN_CARD, "Estate"]
+
+
+def test_iter_events_yields_tokenized_events():
+    lines = ["P1 plays a Village.", "P1 gains 2 Silvers (+$3)", "and a Copper."]
+    events = list(iter_events(lines, player_ids=("P1",)))
+    assert events == ["P1 plays a Village.", "P1 gains 2 Silvers (+$3) and a Copper."]
+    assert all(isinstance(event, Event) for event in events)
+    assert events[1].tokens == ["p1", "gains", "2", "silvers", "and", "a", "copper"]
+
+
+@pytest.mark.parametrize("text", [
+    "P1 draws 2 coppers and an estate",
+    "P1 buys and gains a Throne Room.",
+    "P1 plays a Village, a Silver and 2 Coppers. (+$4)",
+    "P1 trashes nothing.",
+])
+def test_event_tokens_match_plain_string_parsing(mocked_parser, text):
+    from_text = mocked_parser.parse_event(text)
+    from_event = mocked_parser.parse_event(Event(text))
+    assert (from_event.type, from_event.cards) == (from_text.type, from_text.cards)
+
+
+EFFECTS_CSV = (
+    "Name,Types,Cost,Effects\n"
+    "Copper,Treasure,0,\nSilver,Treasure,3,\nEstate,Victory,2,\n"
+    "Mine,Action,5,gain_to=hand\n"
+    "Bandit,Action - Attack,5,trash_from=deck;discard_from=deck\n"
+    "Native Village,Action,2,mat_from=deck\n"
+)
+
+
+@pytest.fixture
+def effects_parser():
+    with patch("builtins.open", mock_open(read_data=EFFECTS_CSV)):
+        parser = Parser("P1", card_csv_path="effects.csv", player_ids=("P1", "P2"))
+    return parser
+
+
+def test_effect_hints_follow_last_played_card(effects_parser):
+    assert effects_parser.parse_event("P1 gains a Silver.").target is None
+    effects_parser.parse_event("P1 plays a Mine.")
+    gain = effects_parser.parse_event("P1 gains a Silver.")
+    assert (gain.type, gain.target) == (ActionType.GAIN, "hand")
+    # Buying always gains to the discard pile
+    assert effects_parser.parse_event("P1 buys and gains a Silver.").target is None
+    effects_parser.parse_event("P1 ends turn")
+    assert effects_parser.parse_event("P1 gains a Silver.").target is None
+
+
+def test_effect_hint_routes_one_move_per_player(effects_parser):
+    effects_parser.parse_event("P1 plays a Mine.")
+    assert effects_parser.parse_event("P1 gains a Silver.").target == "hand"
+    # A second gain in the same turn is not the Mine's
+    assert effects_parser.parse_event("P1 gains a Silver.").target is None
+    effects_parser.parse_event("P1 plays a Mine.")
+    assert effects_parser.parse_event("P1 gains a Gold.").target == "hand"
+
+
+def test_other_players_attacks_set_the_source(effects_parser):
+    effects_parser.parse_event("P2 plays a Bandit.")
+    discard = effects_parser.parse_event("P1 discards a Copper and an Estate.")
+    assert (discard.cards, discard.source) == (["Copper", "Estate"], "deck")
+    effects_parser.parse_event("Turn 2 - P1")
+    assert effects_parser.parse_event("P1 discards an Estate.").source is None
+
+
+def test_text_destination_wins_over_hints(effects_parser):
+    effects_parser.parse_event("P1 plays a Mine.")
+    gain = effects_parser.parse_event("P1 gains a Silver onto their deck.")
+    assert (gain.cards, gain.target) == (["Silver"], "deck")
+    trash = effects_parser.parse_event("P1 trashes a Copper from their hand.")
+    assert (trash.cards, trash.source) == (["Copper"], "hand")
+
+
+@pytest.mark.parametrize("text, action_type, cards, source", [
+    ("P1 puts a Silver into their hand.", ActionType.PUT_IN_HAND, ["Silver"], None),
+    ("P1 puts an Estate on their Native Village mat.", ActionType.TO_MAT, ["Estate"], "deck"),
+    ("P1 topdecks a Copper.", ActionType.TOPDECK, ["Copper"], None),
+    ("P1 sets aside a Mine.", ActionType.SET_ASIDE, ["Mine"], None),
+    ("P1 returns an Estate to the supply.", ActionType.RETURN_TO_SUPPLY, ["Estate"], None),
+])
+def test_new_verbs(effects_parser, text, action_type, cards, source):
+    effects_parser.parse_event("P1 plays a Native Village.")
+    action = effects_parser.parse_event(text)
+    assert (action.type, action.cards, action.source) == (action_type, cards, source)
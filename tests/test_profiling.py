@@ -0,0 +1,62 @@
+import io
+from pathlib import Path
+from dominion_tracker.engine import Action, ActionType, GameEngine, TableEngine
+from dominion_tracker.parser import Parser
+from dominion_tracker.profiling import Histogram, Stats
+
+
+CARD_CSV = str(Path(__file__).resolve().parent.parent / "cards" / "dominion_cards.csv")
+
+
+def test_histogram_buckets_and_percentiles():
+    histogram = Histogram()
+    for ns in [100, 100, 100, 5000]:
+        histogram.add(ns)
+    assert histogram.count == 4
+    assert histogram.total_ns == 5300
+    assert histogram.percentile(50) == 128
+    assert histogram.percentile(100) == 8192
+
+
+def test_engine_counts_actions_and_invalid_moves():
+    engine = GameEngine()
+    stats = Stats()
+    engine.instrument(stats)
+    engine.apply(Action(ActionType.DRAW, ["Copper", "Copper"]))
+    engine.apply(Action(ActionType.PLAY, ["Gold"]))
+    engine.apply(Action(ActionType.PLAY, ["Copper"]))
+
+    assert stats.actions == {"DRAW": 1, "PLAY": 2}
+    assert stats.latency["PLAY"].count == 2
+    assert stats.invalid_moves == {"Gold": 1}
+    assert stats.invalid_by_action == {"PLAY": 1}
+
+
+def test_instrumentation_can_be_removed():
+    engine = TableEngine(["O", "L"])
+    stats = Stats()
+    engine.instrument(stats)
+    engine.apply(Action(ActionType.GAIN, ["Silver"], "L"))
+    engine.instrument(None)
+    engine.apply(Action(ActionType.GAIN, ["Silver"], "O"))
+
+    assert stats.actions == {"GAIN": 1}
+    assert "apply" not in vars(engine.engines["O"])
+
+
+def test_parser_stage_timings():
+    parser = Parser("O", card_csv_path=CARD_CSV)
+    stats = Stats()
+    parser.instrument(stats)
+    events = stats.timed_iter("read_events", ["O plays a Village.", "L draws 5 cards.", "O shuffles their deck."])
+    actions = [parser.parse_event(event) for event in events]
+
+    assert [a.type if a else None for a in actions] == [ActionType.PLAY, None, ActionType.SHUFFLE]
+    assert stats.stages["read_events"][0] == 3
+    assert stats.stages["parse_event"][0] == 3
+    assert stats.stages["extract_cards"][0] == 1
+
+    out = io.StringIO()
+    stats.report(out)
+    assert "extract_cards" in out.getvalue()
+    assert set(stats.to_dict()) == {"actions", "apply_latency", "stages", "invalid_moves", "invalid_by_action"}
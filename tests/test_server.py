@@ -0,0 +1,150 @@
+import asyncio
+import json
+import unittest
+from pathlib import Path
+from unittest import mock
+from dominion_tracker.matcher import CardMatcher
+from dominion_tracker.server import GamePool, GameServer, GameSession, UnknownGame
+
+
+CARD_CSV = str(Path(__file__).resolve().parent.parent / "cards" / "dominion_cards.csv")
+
+GAME = [
+    "O starts with 7 Coppers.",
+    "O starts with 3 Estates.",
+    "O draws 4 Coppers and an Estate.",
+    "Turn 1 - O",
+    "O plays 4 Coppers. (+$4)",
+    "O buys and gains a Silver.",
+    "O draws 3 Coppers and 2 Estates.",
+    "Turn 2 - O",
+]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestGamePool(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.pool = GamePool(max_games=2, idle_timeout=10, matcher=CardMatcher.shared(CARD_CSV), clock=self.clock)
+
+    def test_unknown_game_needs_players(self):
+        with self.assertRaises(UnknownGame):
+            self.pool.get("g1")
+        self.assertEqual(self.pool.get("g1", ["O"]).player_ids, ("O",))
+
+    def test_least_recently_used_game_is_evicted(self):
+        self.pool.get("g1", ["O"])
+        self.pool.get("g2", ["O"])
+        self.pool.get("g1")
+        self.pool.get("g3", ["O"])
+        self.assertEqual(list(self.pool.sessions), ["g1", "g3"])
+        self.assertEqual(self.pool.evicted, 1)
+
+    def test_idle_games_are_evicted(self):
+        self.pool.get("g1", ["O"])
+        self.clock.now = 8
+        self.pool.get("g2", ["O"])
+        self.clock.now = 15
+        self.assertEqual(self.pool.evict_idle(), 1)
+        self.assertEqual(list(self.pool.sessions), ["g2"])
+
+
+class TestGameServer(unittest.TestCase):
+
+    def setUp(self):
+        self.server = GameServer(GamePool(matcher=CardMatcher.shared(CARD_CSV)))
+
+    def test_feed_state_and_end(self):
+        response = self.server.handle({"op": "feed", "game": "g1", "players": ["O"], "lines": GAME})
+        self.assertTrue(response["ok"])
+        state = self.server.handle({"op": "state", "game": "g1"})["state"]["O"]
+        self.assertEqual(state["discard"], {"Copper": 4, "Estate": 1, "Silver": 1})
+        self.assertEqual(state["hand"], {"Copper": 3, "Estate": 2})
+
+        final = self.server.handle({"op": "end", "game": "g1"})
+        self.assertEqual(final["state"]["O"]["hand"], {"Copper": 3, "Estate": 2})
+        self.assertEqual(self.server.handle({"op": "stats"})["games"], 0)
+
+    def test_errors_are_responses(self):
+        self.assertFalse(self.server.handle({"op": "state", "game": "missing"})["ok"])
+        self.assertFalse(self.server.handle({"op": "state"})["ok"])
+        self.assertFalse(self.server.handle({"op": "explode"})["ok"])
+        self.assertFalse(self.server.handle({"op": ["feed"]})["ok"])
+
+    def test_internal_key_errors_are_not_unknown_games(self):
+        with mock.patch.object(GameSession, "feed", side_effect=KeyError("Copper")):
+            with self.assertRaises(KeyError):
+                self.server.handle({"op": "feed", "game": "g1", "players": ["O"], "lines": GAME})
+
+    def test_wrong_field_types_are_responses(self):
+        for request in ({"op": "feed", "game": "g1", "players": ["O", "L"], "lines": 5},
+                        {"op": "feed", "game": "g1", "players": ["O", "L"], "lines": "O plays a Village."},
+                        {"op": "feed", "game": ["x"], "players": ["O", "L"]},
+                        {"op": "feed", "game": "g1", "players": [1]},
+                        {"op": "feed", "game": "g1", "players": "O,L"},
+                        {"op": "state", "game": {"id": 1}}):
+            response = self.server.handle(request)
+            self.assertFalse(response["ok"], request)
+            self.assertIn("must be", response["error"])
+
+    def test_concurrent_clients_over_tcp(self):
+        async def client(port, game_id):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            responses = []
+            for request in ({"op": "feed", "game": game_id, "players": ["O"], "lines": GAME},
+                            {"op": "state", "game": game_id}):
+                writer.write(json.dumps(request).encode() + b"\n")
+                await writer.drain()
+                responses.append(json.loads(await reader.readline()))
+            writer.write(b"not json\n")
+            responses.append(json.loads(await reader.readline()))
+            writer.close()
+            await writer.wait_closed()
+            return responses
+
+        async def run():
+            server = await self.server.start("127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                return await asyncio.gather(*(client(port, f"g{i}") for i in range(20)))
+            finally:
+                self.server.close()
+
+        for feed, state, invalid in asyncio.run(run()):
+            self.assertTrue(feed["ok"])
+            self.assertEqual(state["state"]["O"]["hand"], {"Copper": 3, "Estate": 2})
+            self.assertFalse(invalid["ok"])
+        self.assertEqual(len(self.server.pool), 20)
+
+    def test_over_long_line_is_skipped(self):
+        async def run():
+            server = await self.server.start("127.0.0.1", 0, limit=1024)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.write(b'{"op": "stats", "pad": "' + b"x" * 10000 + b'"}\n')
+                writer.write(json.dumps({"op": "stats"}).encode() + b"\n")
+                await writer.drain()
+                responses = [json.loads(await reader.readline()) for _ in range(2)]
+                writer.close()
+                await writer.wait_closed()
+                return responses
+            finally:
+                self.server.close()
+
+        too_long, stats = asyncio.run(run())
+        self.assertFalse(too_long["ok"])
+        self.assertIn("size limit", too_long["error"])
+        self.assertTrue(stats["ok"])
+
+
+if __name__ == "__main__":
+    unittest.main()
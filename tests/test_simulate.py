@@ -0,0 +1,64 @@
+import json
+import pytest
+from dominion_tracker.effects import EffectTable
+from dominion_tracker.matcher import DEFAULT_CARD_CSV
+from dominion_tracker.simulate import (BuyPolicy, PriorityPolicy, _simulate_chunk, simulate_game, simulate_main, simulate_many,
+                                       summarize)
+
+
+CARDS = EffectTable.shared(str(DEFAULT_CARD_CSV)).cards
+
+
+def test_priority_policy_from_spec():
+    policy = PriorityPolicy.from_spec("smithy", CARDS)
+    assert policy.rules == [("Province", 8, None), ("Gold", 6, None), ("Smithy", 4, 1), ("Silver", 3, None)]
+    assert policy.choose(5, 1, {}) == "Smithy"
+    assert policy.choose(5, 1, {"Smithy": 1}) == "Silver"
+    assert policy.choose(2, 1, {}) is None
+    with pytest.raises(ValueError):
+        PriorityPolicy.from_spec("Province,Mine", CARDS)
+    with pytest.raises(ValueError):
+        PriorityPolicy.from_spec("Province,Nonexistent", CARDS)
+
+
+def test_buy_policy_requires_choose():
+    class Incomplete(BuyPolicy):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_simulate_game_is_seeded_and_makes_valid_moves(caplog):
+    policy = PriorityPolicy.from_spec("Province,Gold,Laboratory:2,Village:1,Silver", CARDS)
+    first = simulate_game(policy, CARDS, provinces=4, seed=7)
+    assert first == simulate_game(policy, CARDS, provinces=4, seed=7)
+    finish, turns = first
+    assert finish == turns and 8 <= finish <= 30
+    # Every drawn, played and gained card was where the engine expected it
+    assert not [record for record in caplog.records if "Invalid move" in record.getMessage()]
+    # Running out of turns leaves the game unfinished
+    assert simulate_game(policy, CARDS, provinces=4, seed=7, max_turns=3) == (None, 3)
+
+
+def test_chunking_does_not_change_results():
+    whole = _simulate_chunk(0, 20, "big_money", 2, 3, 50, str(DEFAULT_CARD_CSV))
+    first = _simulate_chunk(0, 8, "big_money", 2, 3, 50, str(DEFAULT_CARD_CSV))
+    rest = _simulate_chunk(8, 20, "big_money", 2, 3, 50, str(DEFAULT_CARD_CSV))
+    assert whole == (first[0] + rest[0], first[1] + rest[1])
+    assert simulate_many(20, "big_money", 2, seed=3, workers=1, chunksize=6) == whole
+
+
+def test_summarize():
+    summary = summarize({10: 1, 12: 2, 14: 1, None: 1})
+    assert summary == {"games": 5, "unfinished": 1, "mean": 12.0, "p10": 10, "p50": 12, "p90": 14,
+                       "distribution": {"10": 1, "12": 2, "14": 1}}
+    assert summarize({None: 2}) == {"games": 2, "unfinished": 2}
+
+
+def test_simulate_main(capsys):
+    simulate_main(["--games", "10", "--workers", "1", "--provinces", "1", "--policy", "big_money"])
+    result = json.loads(capsys.readouterr().out)
+    assert result["policy"] == "Province,Gold,Silver"
+    assert result["games"] == 10 and result["unfinished"] == 0
+    assert sum(result["distribution"].values()) == 10
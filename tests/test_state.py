@@ -1,6 +1,6 @@
 import unittest
 from collections import defaultdict
-from dominion_tracker.state import PlayerState, InvalidCardMove
+from dominion_tracker.state import CardIndex, CompactPlayerState, HiddenPlayerState, PlayerState, InvalidCardMove, UNKNOWN_CARD
 
 
 class TestPlayerState(unittest.TestCase):
@@ -70,6 +70,26 @@ class TestPlayerState(unittest.TestCase):
         with self.assertRaises(InvalidCardMove):
             self.state.move_from_hand_to_played(["Province"])  # not in hand
 
+    def test_invalid_move_leaves_piles_unchanged(self):
+        with self.assertRaises(InvalidCardMove):
+            self.state.move_from_hand_to_played(["Copper", "Copper"])  # only one in hand
+        self.assertEqual(self.state.hand["Copper"], 1)
+        self.assertNotIn("Copper", self.state.played)
+
+    def test_failed_check_does_not_add_empty_entries(self):
+        with self.assertRaises(InvalidCardMove):
+            self.state.move_from_hand_to_played(["Gold"])
+        self.assertNotIn("Gold", self.state.hand)
+
+    def test_move_whole_pile_into_empty_pile_swaps(self):
+        discard = self.state.discard = defaultdict(int, {"Silver": 2})
+        self.state.deck = defaultdict(int)
+        self.state.move_whole_discard_to_deck()
+        self.assertIs(self.state.deck, discard)
+        self.assertEqual(len(self.state.discard), 0)
+        self.state.discard["Gold"] = 1  # piles are still independent
+        self.assertNotIn("Gold", self.state.deck)
+
     def test_summary(self):
         summary = self.state.summary()
         self.assertIn("deck", summary)
@@ -87,5 +107,119 @@ class TestPlayerState(unittest.TestCase):
         self.assertEqual(total["Gold"], 2)
 
 
+class TestCompactPlayerState(unittest.TestCase):
+
+    def setUp(self):
+        self.state = CompactPlayerState()
+        self.state.add_to_deck({"Copper": 3, "Estate": 2})
+        self.state.move_from_deck_to_hand(["Copper", "Estate"])
+
+    def test_summary_matches_dict_state(self):
+        reference = PlayerState()
+        reference.add_to_deck({"Copper": 3, "Estate": 2})
+        reference.move_from_deck_to_hand(["Copper", "Estate"])
+        for state in (self.state, reference):
+            state.move_from_hand_to_played(["Copper"])
+            state.gain_cards(["Gold", "Gold"])
+            state.move_whole_played_to_discard()
+            state.move_whole_discard_to_deck()
+        self.assertEqual(self.state.summary(), reference.summary())
+        self.assertEqual(self.state.total_cards(), reference.total_cards())
+
+    def test_piles_grow_with_new_cards(self):
+        self.assertEqual(len(self.state.deck), 2)
+        self.state.gain_cards(["Silver"])
+        self.assertEqual(len(self.state.deck), 3)
+        self.assertEqual(self.state.summary()["discard"], {"Silver": 1})
+
+    def test_invalid_move_leaves_piles_unchanged(self):
+        with self.assertRaises(InvalidCardMove):
+            self.state.move_from_hand_to_played(["Copper", "Copper"])
+        self.assertEqual(self.state.summary()["hand"], {"Copper": 1, "Estate": 1})
+        self.assertEqual(self.state.summary()["played"], {})
+
+    def test_trash_cards(self):
+        self.state.trash_cards(["Estate"])
+        self.assertEqual(self.state.total_cards(), {"Copper": 3, "Estate": 1})
+
+    def test_load_summary_round_trip(self):
+        snapshot = {"deck": {"Gold": 1}, "hand": {"Copper": 2}, "discard": {}, "played": {"Village": 1}}
+        self.state.load_summary(snapshot)
+        self.assertEqual(self.state.summary(), snapshot)
+
+    def test_shared_index_keeps_ids_stable(self):
+        index = CardIndex(["Copper", "Estate"])
+        other = CompactPlayerState(index)
+        other.gain_cards(["Gold"])
+        self.assertEqual(index.ids, {"Copper": 0, "Estate": 1, "Gold": 2})
+
+    def test_move_whole_pile_adds_counts(self):
+        self.state.gain_cards(["Copper", "Gold"])
+        self.state.move_whole_hand_to_discard()
+        self.assertEqual(self.state.summary()["discard"], {"Copper": 2, "Estate": 1, "Gold": 1})
+        self.assertEqual(self.state.summary()["hand"], {})
+        # Into an empty pile the arrays are swapped
+        self.state.move_whole_discard_to_deck()
+        self.assertEqual(self.state.summary()["deck"], {"Copper": 4, "Estate": 2, "Gold": 1})
+        self.assertEqual(self.state.summary()["discard"], {})
+
+    def test_card_interned_by_another_state_gets_a_slot(self):
+        index = CardIndex()
+        first, second = CompactPlayerState(index), CompactPlayerState(index)
+        first.gain_cards(["Gold"])
+        second.gain_cards(["Gold"])
+        self.assertEqual(second.summary()["discard"], {"Gold": 1})
+        with self.assertRaises(InvalidCardMove):
+            second.move_from_hand_to_played(["Gold"])
+
+
+class TestHiddenPlayerState(unittest.TestCase):
+
+    def setUp(self):
+        self.state = HiddenPlayerState()
+        self.state.add_to_deck({"Copper": 7, "Estate": 3})
+        self.state.move_from_deck_to_hand([UNKNOWN_CARD] * 5)
+
+    def test_hidden_draw_keeps_candidates_in_deck(self):
+        self.assertEqual(self.state.hand, {UNKNOWN_CARD: 5})
+        self.assertEqual(self.state.deck, {"Copper": 7, "Estate": 3})
+        self.assertEqual(self.state.unresolved, 5)
+        self.assertEqual(self.state.total_cards(), {"Copper": 7, "Estate": 3})
+
+    def test_play_resolves_unknown_card(self):
+        self.state.move_from_hand_to_played(["Copper", "Copper"])
+        self.assertEqual(self.state.hand, {UNKNOWN_CARD: 3})
+        self.assertEqual(self.state.deck["Copper"], 5)
+        self.assertEqual(self.state.played, {"Copper": 2})
+        self.assertEqual(self.state.unresolved, 3)
+
+    def test_mixed_hidden_and_revealed_discard(self):
+        self.state.move_from_hand_to_discard([UNKNOWN_CARD, "Estate"])
+        self.assertEqual(self.state.hand, {UNKNOWN_CARD: 3})
+        self.assertEqual(self.state.discard, {UNKNOWN_CARD: 1, "Estate": 1})
+
+    def test_reveal_needs_candidate_in_deck(self):
+        with self.assertRaises(InvalidCardMove):
+            self.state.move_from_hand_to_played(["Gold"])
+        with self.assertRaises(InvalidCardMove):
+            self.state.move_from_hand_to_played(["Copper"] * 6)
+        self.assertEqual(self.state.hand, {UNKNOWN_CARD: 5})
+
+    def test_cannot_draw_more_than_remaining_deck(self):
+        self.state.move_from_deck_to_hand([UNKNOWN_CARD] * 5)
+        with self.assertRaises(InvalidCardMove):
+            self.state.move_from_deck_to_hand([UNKNOWN_CARD])
+
+    def test_shuffle_resolves_unknown_discards(self):
+        self.state.move_from_hand_to_played(["Copper", "Copper", "Copper"])
+        self.state.move_whole_played_to_discard()
+        self.state.move_whole_hand_to_discard()
+        self.state.move_from_deck_to_hand([UNKNOWN_CARD] * 5)
+        self.state.move_whole_discard_to_deck()
+        self.assertEqual(self.state.unresolved, 5)
+        self.assertEqual(self.state.discard, {})
+        self.assertEqual(self.state.deck, {"Copper": 7, "Estate": 3})
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,108 @@
+from pathlib import Path
+import pytest
+from dominion_tracker.engine import Action, ActionType
+from dominion_tracker.main import main
+from dominion_tracker.parser import Parser, iter_events
+from dominion_tracker.store import EventStore
+
+
+SAMPLE_LOG = Path(__file__).resolve().parent.parent / "sample_logs" / "game_log.txt"
+
+
+def record(store, events):
+    recorder = store.recorder(source="test.txt")
+    for event_text, action in events:
+        recorder.observe(event_text, action)
+
+
+GAME = [
+    ("Game #42, unrated. Card Pool: level 10", None),
+    ("Turn 1 - O", None),
+    ("O plays 3 Coppers", Action(ActionType.PLAY, ["Copper"] * 3, "O")),
+    ("O buys and gains a Village", Action(ActionType.GAIN, ["Village"], "O")),
+    ("O ends turn", Action(ActionType.END_TURN, [], "O")),
+    ("Turn 2 - O", None),
+    ("O buys and gains a Village", Action(ActionType.GAIN, ["Village"], "O")),
+]
+
+
+def test_actions_stored_per_distinct_card(tmp_path):
+    with EventStore(tmp_path / "events.db") as store:
+        record(store, GAME)
+        rows = store.query("SELECT seq, turn, player, action_type, card_id, count FROM actions ORDER BY seq")
+        copper = store.card_id("Copper")
+        assert rows[0] == (0, 1, "O", ActionType.PLAY.value, copper, 3)
+        assert rows[2] == (2, 1, "O", ActionType.END_TURN.value, None, 0)
+        assert rows[3][1] == 2
+        assert store.query("SELECT log_game_number, source FROM games") == [(42, "test.txt")]
+
+
+def test_card_totals_across_games_and_reopen(tmp_path):
+    path = tmp_path / "events.db"
+    with EventStore(path, batch_size=2) as store:
+        record(store, GAME)
+        record(store, GAME[:4])
+    with EventStore(path) as store:
+        assert store.card_totals("Village") == {1: 2, 2: 1}
+        assert store.card_totals("Copper", ActionType.PLAY) == {1: 3, 2: 3}
+        # Card ids survive reopening the store
+        assert store.card_id("Village") == store.card_ids["Village"]
+        assert len(store.card_ids) == 2
+
+
+def test_concatenated_log_records_separate_games(tmp_path):
+    text = SAMPLE_LOG.read_text()
+    log = tmp_path / "two_games.txt"
+    log.write_text(text + "\n" + text.replace("162962491", "7", 1))
+    ids = ("O", "L")
+    parser = Parser("O", player_ids=ids)
+    with EventStore(tmp_path / "events.db") as store:
+        recorder = store.recorder(source=str(log))
+        with open(log) as f:
+            for event_text in iter_events(f, ids):
+                recorder.observe(event_text, parser.parse_table_event(event_text))
+        assert store.query("SELECT game_id, log_game_number FROM games") == [(1, 162962491), (2, 7)]
+        per_game = store.query("SELECT game_id, COUNT(DISTINCT seq), MIN(turn), MAX(turn) FROM actions GROUP BY game_id")
+        # Both games hold the same actions, and the second one's turns start over
+        assert per_game[0][1:] == per_game[1][1:]
+        assert per_game[1][2] == 0
+
+
+def test_header_without_game_number(tmp_path):
+    with EventStore(tmp_path / "events.db") as store:
+        record(store, [("Game #unknown, unrated.", None)] + GAME[1:3])
+        assert store.query("SELECT log_game_number FROM games") == [(None,)]
+
+
+def test_buys_results_and_win_rates(tmp_path):
+    game = GAME[:5] + [
+        ("L buys and gains a Silver", Action(ActionType.GAIN, ["Silver"], "L")),
+        ("L gains a Province", Action(ActionType.GAIN, ["Province"], "L")),
+    ]
+    with EventStore(tmp_path / "events.db") as store:
+        recorder = store.recorder()
+        for event_text, action in game:
+            recorder.observe(event_text, action)
+        recorder.finish()
+        assert store.query("SELECT player, bought FROM actions WHERE action_type = ? ORDER BY seq",
+                           (ActionType.GAIN.value,)) == [("O", 1), ("L", 1), ("L", 0)]
+        assert store.query("SELECT player, points, won FROM results ORDER BY player") == [("L", 9, 1), ("O", 3, 0)]
+        # O bought a Village and lost, L bought none and won
+        assert store.win_rates("Village") == {0: (1, 1.0), 1: (1, 0.0)}
+
+
+def test_stores_sharing_a_file_agree_on_card_ids(tmp_path):
+    with EventStore(tmp_path / "events.db") as first, EventStore(tmp_path / "events.db") as second:
+        gold = first.card_id("Gold")
+        first.flush()
+        assert second.card_id("Silver") != gold
+        assert second.card_id("Gold") == gold
+
+
+@pytest.mark.parametrize("flags", [["--follow"], ["--turn", "3"], ["--cache-dir", "cache"]])
+def test_store_rejects_paths_that_would_skip_it(tmp_path, monkeypatch, flags):
+    monkeypatch.setattr("sys.argv", ["tracker", "--players", "O,L", "--log", str(SAMPLE_LOG),
+                                     "--store", str(tmp_path / "events.db")] + flags)
+    with pytest.raises(SystemExit):
+        main()
+    assert not (tmp_path / "events.db").exists()
@@ -0,0 +1,39 @@
+import logging
+import tempfile
+import unittest
+from pathlib import Path
+from benchmarks.synthetic import card_phrase, generate_game, player_ids, write_games
+from dominion_tracker.engine import TableEngine
+from dominion_tracker.matcher import DEFAULT_CARD_CSV
+from dominion_tracker.parser import Parser, iter_events, read_events
+
+
+class TestSyntheticLogs(unittest.TestCase):
+
+    def test_card_phrase(self):
+        self.assertEqual(card_phrase({"Copper": 3, "Estate": 1, "Village": 1}), "3 Coppers, an Estate, and a Village")
+        self.assertEqual(card_phrase({"Party": 2, "Gold": 1}), "2 Parties and a Gold")
+
+    def test_generated_game_replays_without_invalid_moves(self):
+        for players in (2, 4):
+            ids = player_ids(players)
+            parser = Parser(ids[0], card_csv_path=str(DEFAULT_CARD_CSV), player_ids=ids)
+            engine = TableEngine(ids)
+            with self.assertNoLogs("dominion_tracker.engine", level=logging.WARNING):
+                for event in iter_events(generate_game(turns=25, players=players, seed=players), ids):
+                    action = parser.parse_table_event(event)
+                    if action:
+                        engine.apply(action)
+            for summary in engine.summary().values():
+                self.assertEqual(sum(sum(pile.values()) for pile in summary.values()), 35)
+
+    def test_write_games_concatenates(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            log = write_games(Path(tmp) / "games.txt", games=3, turns=5)
+            text = log.read_text()
+            self.assertEqual(text.count("unrated."), 3)
+            self.assertTrue(read_events(str(log), player_ids(2)))
+
+
+if __name__ == "__main__":
+    unittest.main()